@@ -0,0 +1,122 @@
+from schedule2calendar.batch_executor import execute_in_batches
+from schedule2calendar.async_calendar import AsyncWriter, new_client
+from schedule2calendar.service_factory import calendar_service, warm_service_cache
+
+from concurrent.futures import ThreadPoolExecutor
+from google.oauth2.credentials import Credentials
+import subprocess
+import argparse
+import asyncio
+import json
+import time
+import sys
+
+""" Capacity comparison of the blocking batch worker and the asyncio worker, against a local fake Google API.
+
+The sync scenario runs like `gunicorn -w 3 -k gthread` workers each taking one job at a time; the async scenario
+runs every job on one event loop. Run: python -m benchmarks.async_capacity --jobs 60 --events 20 --latency 0.1
+"""
+
+def job_writes(job, events) -> list:
+    """Import writes shaped like a parsed schedule's."""
+    return [
+        (f"COURSE {number}", "import_", {"body": {
+            "summary": f"COURSE {number}",
+            "iCalUID": f"job{job}-event{number}@schedule2calendar",
+            "start": {"dateTime": "2026-09-28T09:00:00", "timeZone": "America/Los_Angeles"},
+            "end": {"dateTime": "2026-09-28T10:20:00", "timeZone": "America/Los_Angeles"},
+            "recurrence": ["RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261211T235959Z"],
+        }})
+        for number in range(events)
+    ]
+
+def percentile(samples, fraction) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def report(label, latencies, results, elapsed) -> dict:
+    latencies = [latency * 1000 for latency in latencies]
+    summary = {
+        "scenario": label,
+        "jobs": len(latencies),
+        "jobs_per_s": round(len(latencies) / elapsed, 2),
+        "writes_ok": sum(1 for result in results if result["status"] == "ok"),
+        "writes_failed": sum(1 for result in results if result["status"] != "ok"),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "elapsed_s": round(elapsed, 2),
+    }
+    print(json.dumps(summary))
+    return summary
+
+def run_sync(jobs, events, workers, batch_workers) -> dict:
+    """Each worker runs one job at a time with blocking batch requests, like the sync job worker."""
+    def run_one(job):
+        creds = Credentials(token = f"token-{job}")
+        service = calendar_service(creds)
+        requests = [
+            (label, lambda method = method, params = params: getattr(service.events(), method)(calendarId = 'primary', **params))
+            for label, method, params in job_writes(job, events)
+        ]
+        started = time.perf_counter()
+        results = execute_in_batches(service, creds, requests, max_workers = batch_workers)
+        return time.perf_counter() - started, results
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = workers) as pool:
+        outcomes = list(pool.map(run_one, range(jobs)))
+    elapsed = time.perf_counter() - started
+    return report(f"sync x{workers}", [latency for latency, _ in outcomes], [r for _, results in outcomes for r in results], elapsed)
+
+async def _run_async(jobs, events, job_concurrency, request_concurrency, max_connections) -> tuple:
+    slots = asyncio.Semaphore(job_concurrency)
+    connections = asyncio.Semaphore(max_connections)
+
+    async with new_client(max_connections) as client:
+        async def run_one(job):
+            async with slots:
+                writer = AsyncWriter(client, Credentials(token = f"token-{job}"), request_concurrency, connections = connections)
+                started = time.perf_counter()
+                results = await writer.run(job_writes(job, events))
+                return time.perf_counter() - started, results
+
+        return await asyncio.gather(*(run_one(job) for job in range(jobs)))
+
+def run_async(jobs, events, job_concurrency, request_concurrency, max_connections) -> dict:
+    """One event loop running up to job_concurrency jobs at once, like WORKER_MODE=async."""
+    started = time.perf_counter()
+    outcomes = asyncio.run(_run_async(jobs, events, job_concurrency, request_concurrency, max_connections))
+    elapsed = time.perf_counter() - started
+    return report(f"async x{job_concurrency}", [latency for latency, _ in outcomes], [r for _, results in outcomes for r in results], elapsed)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Compare sync and async job worker capacity against a fake Google API.")
+    parser.add_argument("--jobs", type = int, default = 60, help = "Jobs per scenario")
+    parser.add_argument("--events", type = int, default = 20, help = "Events per job")
+    parser.add_argument("--port", type = int, default = 8089, help = "Port for the fake Google API")
+    parser.add_argument("--latency", type = float, default = 0.1, help = "Seconds the fake API adds to each HTTP request")
+    parser.add_argument("--call-latency", type = float, default = 0.01, help = "Further seconds per call in a batch request")
+    parser.add_argument("--rate-limit", type = float, default = 0.0, help = "Fraction of calls the fake API answers 429")
+    parser.add_argument("--sync-workers", type = int, default = 3, help = "Blocking workers (gunicorn -w)")
+    parser.add_argument("--batch-workers", type = int, default = 4, help = "BATCH_MAX_WORKERS for the sync scenario")
+    parser.add_argument("--async-jobs", type = int, default = 50, help = "ASYNC_WORKER_CONCURRENCY")
+    parser.add_argument("--async-requests", type = int, default = 10, help = "ASYNC_REQUEST_CONCURRENCY")
+    parser.add_argument("--max-connections", type = int, default = 20, help = "ASYNC_MAX_CONNECTIONS")
+    args = parser.parse_args(argv)
+
+    # A separate process, so the fake API doesn't compete with the workers for the GIL
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_google", "--port", str(args.port),
+         "--latency", str(args.latency), "--call-latency", str(args.call_latency), "--rate-limit", str(args.rate_limit)],
+        stdout = subprocess.PIPE, text = True,
+    )
+    try:
+        root = fake.stdout.readline().split(" at ")[-1].strip() # Printed once it is listening
+        warm_service_cache(root)
+        run_sync(args.jobs, args.events, args.sync_workers, args.batch_workers)
+        run_async(args.jobs, args.events, args.async_jobs, args.async_requests, args.max_connections)
+    finally:
+        fake.terminate()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+from schedule2calendar.bulk import parse_item, stream_parse, iter_upload_items, DEFAULT_MAX_LENGTH
+from benchmarks.schedule_gen import ScheduleGenerator
+
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import argparse
+import json
+import time
+import io
+import os
+
+""" Bulk parsing throughput, serially and on process pools of increasing size: python -m benchmarks.bulk_bench
+
+Every pool's results must match the serial parse, in order. Also checks that an uploaded file whose markup
+takes it past the length limit is still accepted once the markup is stripped.
+"""
+
+class Upload():
+    """Stands in for a werkzeug FileStorage."""
+
+    def __init__(self, filename, text):
+        self.filename = filename
+        self.stream = io.BytesIO(text.encode("utf-8"))
+
+def corpus(count, seed) -> list:
+    generator = ScheduleGenerator(seed)
+    return [(f"synthetic-{index}", generator.schedule()) for index in range(count)]
+
+def markup_upload_accepted(max_length) -> bool:
+    """A schedule under the limit, wrapped in enough markup to take the raw file over it."""
+    schedule = ScheduleGenerator(1).schedule((2, 2))
+    lines = "".join(f"<div class=\"row\">{line}</div>" for line in schedule.splitlines())
+    padding = "<span></span>" * ((max_length - len(lines)) // 13 + 1)
+    items = list(iter_upload_items([Upload("schedule.html", lines + padding)], max_length))
+    result = parse_item(items[0], max_length)
+    return "events" in result
+
+def run_pool(items, workers, max_length) -> tuple:
+    with ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context("spawn")) as pool:
+        # Start every process and import the parser before timing
+        list(pool.map(parse_item, items[:workers * 2], [max_length] * (workers * 2)))
+        started = time.perf_counter()
+        results = list(stream_parse(iter(items), pool, max_length, 2 * workers))
+        return results, time.perf_counter() - started
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark /bulk-process parsing throughput by worker count.")
+    parser.add_argument("--count", type = int, default = 2000, help = "Schedules to parse")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--workers", type = int, nargs = "*", default = None, help = "Pool sizes (defaults to 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--max-length", type = int, default = DEFAULT_MAX_LENGTH)
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers or sorted({min(2 ** power, cpus) for power in range(cpus.bit_length() + 1)})
+    items = corpus(args.count, args.seed)
+
+    started = time.perf_counter()
+    expected = [parse_item(item, args.max_length) for item in items]
+    serial = time.perf_counter() - started
+    errors = sum(1 for result in expected if "error" in result)
+    print(f"{'serial':<10} {args.count / serial:>10.0f} schedules/s {'':>8} errors={errors}")
+
+    mismatched = 0
+    for size in workers:
+        results, elapsed = run_pool(items, size, args.max_length)
+        mismatched += json.dumps(results) != json.dumps(expected)
+        print(f"{f'{size} workers':<10} {args.count / elapsed:>10.0f} schedules/s {serial / elapsed:>7.2f}x")
+
+    accepted = markup_upload_accepted(args.max_length)
+    print(f"markup upload over the raw limit accepted: {accepted}")
+    raise SystemExit(1 if mismatched or errors or not accepted else 0)
+
+if __name__ == '__main__':
+    main()
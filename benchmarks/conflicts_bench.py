@@ -0,0 +1,80 @@
+from schedule2calendar.conflicts import WEEKDAY_NAMES, ConflictIndex, find_conflicts, _describe
+from schedule2calendar.models import Event, weekday_mask
+from schedule2calendar.recurrence import expand
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import argparse
+import random
+import time
+
+""" Times conflict detection over thousands of synthetic meetings: python -m benchmarks.conflicts_bench """
+
+TZ_NAME = "America/Los_Angeles"
+DAY_PATTERNS = ([0, 2, 4], [1, 3], [0, 2], [2, 4], [0, 1, 2, 3, 4], [3])
+
+def make_schedule(rng, meetings, spread = False) -> list:
+    """Synthetic meetings; with spread, each meets once a week at a random minute, so clashes stay sparse."""
+    tz = ZoneInfo(TZ_NAME)
+    events = []
+    for number in range(meetings):
+        if spread:
+            weekdays = [rng.randrange(7)]
+            hour, minute = divmod(rng.randrange(7 * 60, 22 * 60), 60)
+        else:
+            weekdays = rng.choice(DAY_PATTERNS)
+            hour, minute = rng.randint(8, 20), rng.choice((0, 10, 30, 40))
+        start = datetime(2025, 1, 6, hour, minute, tzinfo = tz) + timedelta(days = weekdays[0])
+        until = (start + timedelta(weeks = 10)).replace(hour = 23, minute = 59, second = 59).astimezone(timezone.utc)
+        events.append(Event(f"BENCH {number:03d}", "Lecture", "HALL 100", start, start + timedelta(minutes = rng.choice((50, 80, 110))),
+                            TZ_NAME, weekday_mask(weekdays), until))
+    return events
+
+def naive_conflicts(events) -> list:
+    """Every pair of meetings compared directly, the baseline the index replaces."""
+    tz = ZoneInfo(TZ_NAME)
+    meetings = [expand(event) for event in events]
+    conflicts = []
+    for i, first in enumerate(events):
+        for j in range(i + 1, len(events)):
+            second = events[j]
+            shared = first.weekdays & second.weekdays
+            if not shared or not (first.start.astimezone(tz).time() < second.end.astimezone(tz).time()
+                                  and second.start.astimezone(tz).time() < first.end.astimezone(tz).time()):
+                continue
+            last = min(meetings[i].last_date, meetings[j].last_date)
+            start = max(first.start.date(), second.start.date())
+            days = [WEEKDAY_NAMES[day.weekday()] for day in (start + timedelta(days = offset) for offset in range(7))
+                    if shared >> day.weekday() & 1 and day <= last]
+            if days:
+                conflicts.append({"summary": _describe(first), "other": _describe(second), "days": days})
+    return conflicts
+
+def timed(label, fn, count):
+    started = time.perf_counter()
+    found = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {found} found over {count} meetings")
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark meeting conflict detection.")
+    parser.add_argument("-m", "--meetings", type = int, default = 2000, help = "Meetings in the single large schedule")
+    parser.add_argument("-s", "--schedules", type = int, default = 2000, help = "Small schedules for the bulk run")
+    args = parser.parse_args(argv)
+    rng = random.Random(1)
+
+    events = make_schedule(rng, args.meetings, spread = True)
+    timed("naive pairwise", lambda: len(naive_conflicts(events)), len(events))
+    timed("interval index", lambda: len(find_conflicts(events)), len(events))
+
+    schedules = [make_schedule(rng, rng.randint(3, 12)) for _ in range(args.schedules)]
+    meetings = sum(len(schedule) for schedule in schedules)
+    timed("bulk naive pairwise", lambda: sum(len(naive_conflicts(schedule)) for schedule in schedules), meetings)
+    timed("bulk interval index", lambda: sum(len(find_conflicts(schedule)) for schedule in schedules), meetings)
+
+    index = ConflictIndex(events)
+    probe = datetime(2025, 2, 4, 12, 0, tzinfo = ZoneInfo(TZ_NAME))
+    timed("10k calendar lookups", lambda: sum(len(list(index.at(probe, probe + timedelta(hours = 1)))) for _ in range(10000)), len(events))
+
+if __name__ == '__main__':
+    main()
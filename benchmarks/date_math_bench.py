@@ -0,0 +1,101 @@
+from schedule2calendar import date_math
+from schedule2calendar.date_math import ParseContext
+from schedule2calendar.schedule_handler import parse_schedule
+from schedule2calendar.terms import load_term_calendar
+from schedule2calendar.config import Config
+from benchmarks.schedule_gen import ScheduleGenerator
+
+from contextlib import contextmanager
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import argparse
+import time
+
+""" Per-event cost of parsing with and without a per-parse ParseContext and memoized date math:
+python -m benchmarks.date_math_bench
+
+"Before" parses with date_math's lru_cache'd helpers swapped for the functions they wrap, and a context that
+looks the current instant up again on every use, as date_math did before ParseContext. "After" is the parser
+as it runs. Both must give the same events.
+"""
+
+class PerCallContext():
+    """Recomputes "now" on every attribute read, like the datetime.now() calls ParseContext replaced."""
+
+    def __init__(self, tz_name = None):
+        self.tz_name = tz_name or Config.SCHEDULE_TIMEZONE
+
+    @property
+    def tz(self):
+        return ZoneInfo(self.tz_name)
+
+    @property
+    def now(self):
+        return datetime.now(self.tz)
+
+    @property
+    def today(self):
+        return self.now.date()
+
+    @property
+    def year(self):
+        return self.today.year
+
+    @property
+    def weekday(self):
+        return self.today.weekday()
+
+    @property
+    def terms(self):
+        return load_term_calendar(Config.TERM_CALENDAR_PATH)
+
+@contextmanager
+def unmemoized():
+    """Swap date_math's memoized helpers for their undecorated functions while the block runs."""
+    # Only date_math's own helpers; the term calendar is loaded once per file either way
+    cached = {name: fn for name, fn in vars(date_math).items()
+              if hasattr(fn, "cache_info") and fn.__module__ == date_math.__name__}
+    for name, fn in cached.items():
+        setattr(date_math, name, fn.__wrapped__)
+    try:
+        yield sorted(cached)
+    finally:
+        for name, fn in cached.items():
+            setattr(date_math, name, fn)
+
+def parse_all(texts, make_ctx) -> list:
+    return [parse_schedule(text, make_ctx()) for text in texts]
+
+def timed(rounds, fn) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Compare per-event parse cost with and without ParseContext and memoized date math.")
+    parser.add_argument("--count", type = int, default = 1000, help = "Synthetic pastes to parse")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--rounds", type = int, default = 3, help = "Passes per measurement; the fastest is reported")
+    args = parser.parse_args(argv)
+
+    generator = ScheduleGenerator(args.seed)
+    texts = [generator.schedule() for _ in range(args.count)]
+
+    with unmemoized() as helpers:
+        before, expected = timed(args.rounds, lambda: parse_all(texts, PerCallContext))
+    after, actual = timed(args.rounds, lambda: parse_all(texts, ParseContext))
+
+    events = sum(map(len, actual))
+    print(f"unmemoized helpers: {', '.join(helpers)}")
+    print(f"{'before':<8} {before / events * 1e6:>8.2f} us/event")
+    print(f"{'after':<8} {after / events * 1e6:>8.2f} us/event   {before / after:.2f}x faster over {events} events")
+
+    # A run straddling midnight could legitimately differ; anything else is a bug
+    if actual != expected:
+        raise SystemExit("Memoized date math gave different events")
+
+if __name__ == '__main__':
+    main()
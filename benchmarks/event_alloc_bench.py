@@ -0,0 +1,155 @@
+from schedule2calendar.date_math import ParseContext
+from schedule2calendar.schedule_handler import parse_schedule
+from schedule2calendar.format_schedule import format_datetime
+from schedule2calendar.validate import validate_event
+from schedule2calendar.models import Event
+from schedule2calendar import ics_export
+from benchmarks.schedule_gen import ScheduleGenerator
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import tracemalloc
+import argparse
+import time
+import sys
+
+""" Allocation and date-parse calls per event, nested dicts of ISO strings against models.Event: python -m benchmarks.event_alloc_bench
+
+Both paths take the same parsed meetings through what a preview and an ICS download do with them: build the
+event, validate it, format its start and end for the preview, and format DTSTART/DTEND. "dicts" is the pipeline
+before models.Event, reproduced here, where parse_schedule returned ISO strings and every later stage parsed them
+back; "Event" is the pipeline as it runs, holding the datetimes the parser made rather than new strings. Reports
+microseconds, bytes the built events keep, peak bytes over the whole pass (outputs included), and
+datetime.fromisoformat/strptime calls per event, counted by a profiler hook so neither path is counted by hand.
+Exits 1 if the two paths' output differs or Event doesn't parse less.
+"""
+
+PARSE_CALLS = frozenset({"fromisoformat", "strptime"})
+
+def legacy_check_start_end(start_iso, end_iso):
+    """date_math.check_start_end as it was, on the ISO strings convert_datetime returned."""
+    start_time = datetime.fromisoformat(start_iso)
+    end_time = datetime.fromisoformat(end_iso)
+    if start_time > end_time:
+        start_time -= timedelta(hours=12)
+    return start_time.isoformat(), end_time.isoformat()
+
+def legacy_validate_event(event):
+    for field in ["summary", "location", "start", "end"]:
+        if field not in event:
+            raise ValueError(f"Missing required field: {field}")
+    if "dateTime" not in event["start"] or "dateTime" not in event["end"]:
+        raise ValueError("Missing start or end datetime in event")
+    datetime.fromisoformat(event["start"]["dateTime"].replace("Z", "+00:00"))
+    datetime.fromisoformat(event["end"]["dateTime"].replace("Z", "+00:00"))
+
+def legacy_ics_datetime(when) -> tuple:
+    dt = datetime.fromisoformat(when["dateTime"].replace("Z", "+00:00"))
+    return f";TZID={when['timeZone']}", dt.astimezone(ZoneInfo(when["timeZone"])).strftime("%Y%m%dT%H%M%S")
+
+def build_dict(meeting) -> dict:
+    """The dict parse_schedule appended, from the meeting's ISO start and end."""
+    start, end = legacy_check_start_end(meeting.start.isoformat(), meeting.end.isoformat())
+    event = {
+        "summary": meeting.summary,
+        "location": meeting.location,
+        "description": meeting.location,
+        "start": {"dateTime": start, "timeZone": meeting.tz_name},
+        "end": {"dateTime": end, "timeZone": meeting.tz_name},
+    }
+    if meeting.weekdays:
+        event["recurrence"] = meeting.recurrence()
+    event["reminders"] = {"useDefault": False, "overrides": [{"method": "popup", "minutes": minutes} for minutes in meeting.reminders]}
+    return event
+
+def use_dict(event) -> tuple:
+    legacy_validate_event(event)
+    return (format_datetime(event["start"]["dateTime"]), format_datetime(event["end"]["dateTime"]),
+            legacy_ics_datetime(event["start"]), legacy_ics_datetime(event["end"]))
+
+def build_event(meeting) -> Event:
+    return Event(
+        course = meeting.course,
+        meeting_type = meeting.meeting_type,
+        location = meeting.location,
+        start = meeting.start,
+        end = meeting.end,
+        tz_name = meeting.tz_name,
+        weekdays = meeting.weekdays,
+        until = meeting.until,
+        reminders = meeting.reminders,
+        exdates = meeting.exdates,
+        uid = meeting.uid,
+        term = meeting.term,
+    )
+
+def use_event(event) -> tuple:
+    validate_event(event)
+    return (format_datetime(event.start), format_datetime(event.end),
+            ics_export._format_datetime(event.start, event.tz_name), ics_export._format_datetime(event.end, event.tz_name))
+
+def count_parse_calls(fn, *args) -> int:
+    calls = 0
+    def profile(frame, event, arg):
+        nonlocal calls
+        if event == "c_call" and getattr(arg, "__name__", None) in PARSE_CALLS:
+            calls += 1
+    sys.setprofile(profile)
+    try:
+        fn(*args)
+    finally:
+        sys.setprofile(None)
+    return calls
+
+def measure(meetings, build, use, rounds) -> dict:
+    def run():
+        events = [build(meeting) for meeting in meetings]
+        return events, [use(event) for event in events]
+
+    seconds = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        _, output = run()
+        seconds = min(seconds, time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        events = [build(meeting) for meeting in meetings]
+        kept = tracemalloc.get_traced_memory()[0] - baseline
+        output = [use(event) for event in events]
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    count = len(meetings)
+    return {
+        "us": seconds / count * 1e6,
+        "kept": kept / count,
+        "peak": peak / count,
+        "parses": count_parse_calls(run) / count,
+        "output": output,
+    }
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Compare allocation and date parsing per event for dict events and models.Event.")
+    parser.add_argument("--count", type = int, default = 1000, help = "Synthetic pastes to parse into events")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--rounds", type = int, default = 3, help = "Timed passes; the fastest is reported")
+    args = parser.parse_args(argv)
+
+    generator = ScheduleGenerator(args.seed)
+    meetings = [event for _ in range(args.count) for event in parse_schedule(generator.schedule(), ParseContext())]
+
+    results = {"dicts": measure(meetings, build_dict, use_dict, args.rounds), "Event": measure(meetings, build_event, use_event, args.rounds)}
+    print(f"{len(meetings)} events")
+    print(f"{'path':<8} {'us/event':>9} {'kept B/event':>13} {'peak B/event':>13} {'parses/event':>13}")
+    for name, result in results.items():
+        print(f"{name:<8} {result['us']:>9.2f} {result['kept']:>13.0f} {result['peak']:>13.0f} {result['parses']:>13.2f}")
+
+    before, after = results["dicts"], results["Event"]
+    if before["output"] != after["output"] or after["parses"] >= before["parses"]:
+        raise SystemExit("Event output differs from the dict pipeline, or parses no less")
+
+if __name__ == '__main__':
+    main()
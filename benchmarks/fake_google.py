@@ -0,0 +1,290 @@
+from urllib.parse import urlsplit, parse_qs, unquote, urlencode
+from collections import Counter
+from http import HTTPStatus
+import threading
+import argparse
+import asyncio
+import random
+import json
+import uuid
+import re
+
+""" Local stand-in for the Google Calendar API, with configurable latency and rate limiting, for load tests and tests/.
+
+Serves events import/insert/patch/delete/list (paged) and the batch endpoint under /calendar/v3 and /batch/calendar/v3,
+and the OAuth consent redirect, token exchange and userinfo the login flow uses (see client_secrets).
+Each bearer token gets its own calendar; calls are served on one event loop, so no locking is needed.
+Run: python -m benchmarks.fake_google --port 8089 --client-secrets fake_secrets.json, then point the app at it with
+GOOGLE_API_ROOT=http://127.0.0.1:8089/ and GOOGLE_CREDENTIALS_PATH=fake_secrets.json
+"""
+
+EVENT_PATH = re.compile(r"^/calendar/v3/calendars/[^/]+/events(?:/(?P<event_id>[^/]+))?$")
+
+AUTH_PATH = "/o/oauth2/auth"
+TOKEN_PATH = "/token"
+USERINFO_PATH = "/oauth2/v2/userinfo"
+TOKEN_LIFETIME = 3600 # Seconds an access token is good for
+PAGE_SIZE = 250 # events().list page size when maxResults isn't given
+MAX_PAGE_SIZE = 2500 # Largest page events().list returns, whatever maxResults asks for
+
+def client_secrets(root) -> dict:
+    """An OAuth client secrets file whose consent and token endpoints are the fake at root."""
+    return {"web": {
+        "client_id": "fake-client",
+        "client_secret": "fake-secret",
+        "auth_uri": root + AUTH_PATH.lstrip("/"),
+        "token_uri": root + TOKEN_PATH.lstrip("/"),
+        "redirect_uris": [],
+    }}
+
+class FakeCalendar():
+    def __init__(self, latency = 0.05, rate_limit = 0.0, call_latency = 0.01):
+        self.latency = latency # Seconds added to every HTTP request
+        self.call_latency = call_latency # Further seconds per call inside a batch, which Google runs one by one
+        self.rate_limit = rate_limit # Fraction of calls answered 429
+        self.rejected = set() # Summaries whose imports and patches are answered 400, to test failed writes
+        self.calendars = {}
+        self.requests = 0
+        self.calls = Counter() # Calls by kind: "list", "lookup" (by iCalUID), "import", "patch", "delete", "get"
+        self.codes = {} # Authorization code -> email
+        self.emails = {} # Access or refresh token -> email
+
+    def _calendar(self, token) -> dict:
+        return self.calendars.setdefault(token, {})
+
+    def authorize(self, query) -> str:
+        """Consent granted at once: the URL to send the browser back to, with a code for a new user (or login_hint)."""
+        email = query.get("login_hint", [f"user-{uuid.uuid4().hex[:12]}@example.com"])[0]
+        code = uuid.uuid4().hex
+        self.codes[code] = email
+        params = {"code": code, "state": query.get("state", [""])[0]}
+        return f"{query['redirect_uri'][0]}?{urlencode(params)}"
+
+    def token(self, form) -> tuple:
+        """Exchange an authorization code or refresh token; one access token per user keeps their calendar."""
+        grant = form.get("grant_type", [""])[0]
+        if grant == "authorization_code":
+            email = self.codes.pop(form.get("code", [""])[0], None)
+        elif grant == "refresh_token":
+            email = self.emails.get(form.get("refresh_token", [""])[0])
+        else:
+            email = None
+        if email is None:
+            return 400, {"error": "invalid_grant"}
+
+        access_token, refresh_token = f"access-{email}", f"refresh-{email}"
+        self.emails[access_token] = self.emails[refresh_token] = email
+        return 200, {"access_token": access_token, "refresh_token": refresh_token, "expires_in": TOKEN_LIFETIME, "token_type": "Bearer"}
+
+    def userinfo(self, token) -> tuple:
+        email = self.emails.get(token)
+        if email is None:
+            return 401, {"error": {"code": 401, "message": "Invalid Credentials"}}
+        return 200, {"id": email, "email": email, "verified_email": True}
+
+    def handle(self, token, method, path, query, body) -> tuple:
+        """Apply one Calendar call, returning (status, json body or None)."""
+        self.requests += 1
+        if self.rate_limit and random.random() < self.rate_limit:
+            return 429, {"error": {"code": 429, "message": "Rate Limit Exceeded", "errors": [{"reason": "rateLimitExceeded"}]}}
+
+        if method in ("POST", "PATCH") and body and body.get("summary") in self.rejected:
+            return 400, {"error": {"code": 400, "message": "Invalid event"}}
+
+        match = EVENT_PATH.match(path)
+        if match is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        event_id = match.group("event_id")
+
+        events = self._calendar(token)
+
+        if method == "GET" and event_id is None:
+            uid = query.get("iCalUID", [None])[0]
+            self.calls["list" if uid is None else "lookup"] += 1
+            items = [event for event in events.values() if uid is None or event.get("iCalUID") == uid]
+
+            # Paged like the real API, so callers that stop at the first page are caught
+            size = min(int(query.get("maxResults", [PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+            offset = int(query.get("pageToken", ["0"])[0])
+            page = {"kind": "calendar#events", "items": items[offset:offset + size]}
+            if offset + size < len(items):
+                page["nextPageToken"] = str(offset + size)
+            return 200, page
+
+        self.calls[{"POST": "import", "PATCH": "patch", "DELETE": "delete", "GET": "get"}.get(method, method)] += 1
+        if method == "POST" and event_id in (None, "import"):
+            uid = body.get("iCalUID")
+            existing = next((event for event in events.values() if uid and event.get("iCalUID") == uid), None)
+            if existing is not None:
+                existing.update(body)
+                return 200, existing
+            event = dict(body, id = uuid.uuid4().hex, status = "confirmed")
+            event.setdefault("iCalUID", f"{event['id']}@google.com")
+            events[event["id"]] = event
+            return 200, event
+
+        if event_id not in events:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+        if method == "PATCH":
+            events[event_id].update(body)
+            return 200, events[event_id]
+        if method == "GET":
+            return 200, events[event_id]
+        if method == "DELETE":
+            del events[event_id]
+            return 204, None
+
+        return 405, {"error": {"code": 405, "message": "Method Not Allowed"}}
+
+def _split_http(message) -> tuple:
+    """Split a raw HTTP request into (method, target, headers, body)."""
+    head, _, body = message.partition("\r\n\r\n")
+    if not _:
+        head, _, body = message.partition("\n\n")
+    lines = head.splitlines()
+    method, target, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return method, target, headers, body
+
+def _parse_batch(body, boundary) -> list:
+    """Return (content_id, inner request) for each part of a multipart/mixed batch."""
+    parts = []
+    for chunk in body.split(f"--{boundary}"):
+        chunk = chunk.strip("\r\n")
+        if not chunk or chunk == "--":
+            continue
+        part_head, _, inner = chunk.partition("\r\n\r\n")
+        if not _:
+            part_head, _, inner = chunk.partition("\n\n")
+        content_id = next((line.split(":", 1)[1].strip() for line in part_head.splitlines() if line.lower().startswith("content-id:")), "")
+        parts.append((content_id, inner))
+    return parts
+
+def _response(status, payload, content_type = "application/json", location = None) -> bytes:
+    data = payload if isinstance(payload, bytes) else (json.dumps(payload).encode("utf-8") if payload is not None else b"")
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n")
+    if location:
+        head += f"Location: {location}\r\n"
+    return (head + "\r\n").encode("latin-1") + data
+
+class FakeServer():
+    """Serves a FakeCalendar over keep-alive HTTP/1.1 on asyncio streams, so latency costs a timer, not a thread."""
+
+    def __init__(self, fake):
+        self.fake = fake
+
+    def _token(self, headers) -> str:
+        return headers.get("authorization", "Bearer anonymous").split(" ", 1)[-1]
+
+    def _batch(self, body, boundary) -> tuple:
+        """Return the multipart response body, its content type and the number of calls it held."""
+        response_boundary = f"batch_{uuid.uuid4().hex}"
+        out = []
+        parts = _parse_batch(body, boundary)
+        for content_id, inner in parts:
+            method, target, headers, inner_body = _split_http(inner)
+            url = urlsplit(target)
+            status, payload = self.fake.handle(self._token(headers), method, unquote(url.path), parse_qs(url.query),
+                                               json.loads(inner_body) if inner_body.strip() else {})
+            # The client matches parts up by echoing its Content-ID back as <response-...>
+            response_id = f"<response-{content_id[1:-1]}>" if content_id.startswith("<") else content_id
+            out.append(f"--{response_boundary}\r\nContent-Type: application/http\r\nContent-ID: {response_id}\r\n\r\n")
+            out.append(_response(status, payload).decode("utf-8") + "\r\n")
+        out.append(f"--{response_boundary}--\r\n")
+        return "".join(out).encode("utf-8"), f"multipart/mixed; boundary={response_boundary}", len(parts)
+
+    def respond(self, method, target, headers, body) -> tuple:
+        """Return the raw HTTP response and how long the real API would have taken to produce it."""
+        url = urlsplit(target)
+        if url.path == AUTH_PATH:
+            return _response(302, None, location = self.fake.authorize(parse_qs(url.query))), 0.0
+        if url.path == TOKEN_PATH:
+            status, payload = self.fake.token(parse_qs(body.decode("utf-8")))
+            return _response(status, payload), self.fake.latency
+        if url.path == USERINFO_PATH:
+            status, payload = self.fake.userinfo(self._token(headers))
+            return _response(status, payload), self.fake.latency
+
+        if url.path.startswith("/batch/"):
+            boundary = re.search(r'boundary="?([^";]+)"?', headers.get("content-type", "")).group(1)
+            payload, content_type, calls = self._batch(body.decode("utf-8"), boundary)
+            return _response(200, payload, content_type), self.fake.latency + self.fake.call_latency * calls
+
+        status, payload = self.fake.handle(self._token(headers), method, url.path, parse_qs(url.query),
+                                           json.loads(body) if body else {})
+        return _response(status, payload), self.fake.latency
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                response, delay = self.respond(method, target, headers, body)
+                await asyncio.sleep(delay)
+                writer.write(response)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host, port):
+        return await asyncio.start_server(self.handle_connection, host, port, backlog = 1024)
+
+def serve(host = "127.0.0.1", port = 0, latency = 0.05, rate_limit = 0.0, call_latency = 0.01) -> tuple:
+    """Start the fake on a background thread's event loop, returning (fake, root_url).
+
+    It shares the caller's GIL, so run it as its own process (main) when measuring throughput.
+    """
+    fake = FakeCalendar(latency, rate_limit, call_latency)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(FakeServer(fake).start(host, port))
+    threading.Thread(target = loop.run_forever, daemon = True).start()
+    return fake, f"http://{host}:{server.sockets[0].getsockname()[1]}/"
+
+async def _serve_forever(host, port, fake):
+    server = await FakeServer(fake).start(host, port)
+    print(f"Fake Google API at http://{host}:{server.sockets[0].getsockname()[1]}/", flush = True)
+    async with server:
+        await server.serve_forever()
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run a fake Google Calendar API.")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8089)
+    parser.add_argument("--latency", type = float, default = 0.05, help = "Seconds added to each HTTP request")
+    parser.add_argument("--call-latency", type = float, default = 0.01, help = "Further seconds per call in a batch request")
+    parser.add_argument("--rate-limit", type = float, default = 0.0, help = "Fraction of calls answered 429")
+    parser.add_argument("--client-secrets", help = "Write an OAuth client secrets file for this server here")
+    args = parser.parse_args(argv)
+
+    if args.client_secrets:
+        with open(args.client_secrets, "w", encoding = "utf-8") as f:
+            json.dump(client_secrets(f"http://{args.host}:{args.port}/"), f)
+
+    try:
+        asyncio.run(_serve_forever(args.host, args.port, FakeCalendar(args.latency, args.rate_limit, args.call_latency)))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+from schedule2calendar.formats import detect_format, parse_any, registered_formats
+from schedule2calendar.date_math import ParseContext
+from schedule2calendar.sanitize import clean_schedule
+
+from pathlib import Path
+import argparse
+import time
+
+""" Times format detection and parsing for each fixture in benchmarks/fixtures: python -m benchmarks.formats_bench
+
+A fixture named after a format must be detected as that format; unmatched.txt must match none.
+"""
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+def cascade(text, ctx) -> list:
+    """Every parser in turn until one finds events, the cost detection saves."""
+    for fmt in registered_formats():
+        events = fmt.parse(text, ctx = ctx, normalized = True)
+        if events:
+            return events
+    return []
+
+def timed(fn, repeat) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark schedule format detection per fixture.")
+    parser.add_argument("--repeat", type = int, default = 200, help = "Calls per timing")
+    args = parser.parse_args(argv)
+
+    ctx = ParseContext()
+    names = {fmt.name for fmt in registered_formats()}
+    wrong = 0
+    print(f"{'fixture':<12} {'detected':<10} {'events':>6} {'detect us':>10} {'parse us':>10} {'cascade us':>11}")
+    for path in sorted(FIXTURES.glob("*.txt")):
+        text, error = clean_schedule(path.read_text(encoding = "utf-8"), 10000)
+        if error:
+            print(f"{path.stem:<12} rejected by the sanitizer: {error}")
+            wrong += 1
+            continue
+
+        fmt = detect_format(text)
+        detected = fmt.name if fmt else "none"
+        expected = path.stem if path.stem in names else "none"
+        wrong += detected != expected
+
+        events = parse_any(text, ctx = ctx, normalized = True)
+        detect_us = timed(lambda: detect_format(text), args.repeat * 10)
+        parse_us = timed(lambda: fmt.parse(text, ctx = ctx, normalized = True) if fmt else [], args.repeat)
+        cascade_us = timed(lambda: cascade(text, ctx), args.repeat)
+        print(f"{path.stem:<12} {detected:<10} {len(events):>6} {detect_us:>10.1f} {detect_us + parse_us:>10.1f} {cascade_us:>11.1f}")
+
+    raise SystemExit(1 if wrong else 0)
+
+if __name__ == '__main__':
+    main()
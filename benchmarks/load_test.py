@@ -0,0 +1,328 @@
+from benchmarks.preview_load import CSRF_RE, percentile
+from benchmarks.schedule_gen import ScheduleGenerator
+from benchmarks.fake_google import client_secrets
+
+from http.cookiejar import CookieJar
+from datetime import datetime, timezone
+from pathlib import Path
+import multiprocessing
+import urllib.request
+import urllib.error
+import subprocess
+import threading
+import tempfile
+import platform
+import argparse
+import socket
+import json
+import time
+import sys
+import os
+
+""" End-to-end load test: gunicorn and the job worker against a fake Google API and a local Redis, per worker config.
+
+Each config ("2x4" is 2 gunicorn workers of 4 threads) gets fresh servers. Signed-in clients, one per thread of load,
+preview, add and delete synthetic schedules (see schedule_gen) and every scenario reports p50/p95/p99 and RPS.
+Redis is --redis-host/--redis-port, or --fake-redis for an in-process fakeredis server (pip install fakeredis).
+
+Run: python -m benchmarks.load_test --fake-redis --configs 1x4,3x4 --output results.json
+Gate: python -m benchmarks.load_test --fake-redis --configs 1x4,3x4 --baseline results.json
+Exits 1 if any request got an unexpected status or any job failed, or on a regression from --baseline.
+"""
+
+ROOT = Path(__file__).resolve().parent.parent
+SCOPES = "openid https://www.googleapis.com/auth/userinfo.email https://www.googleapis.com/auth/calendar"
+SCENARIOS = {"preview": ("/process-schedule", 200), "add": ("/add-to-calendar", 202), "delete": ("/delete-from-calendar", 202)} # Route, expected status
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port, process, timeout = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args[2]} exited with {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout = 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout} seconds")
+
+def _serve_fake_redis(port):
+    from fakeredis import TcpFakeServer
+    TcpFakeServer(("127.0.0.1", port), server_type = "redis").serve_forever()
+
+class Stack():
+    """The processes of one run; stopped in reverse order, and their output kept in log files for failures."""
+
+    def __init__(self, log_dir):
+        self.log_dir = Path(log_dir)
+        self.processes = []
+
+    def start(self, name, args, env = None) -> subprocess.Popen:
+        log = open(self.log_dir / f"{name}.log", "wb")
+        process = subprocess.Popen(args, cwd = ROOT, env = env, stdout = log, stderr = subprocess.STDOUT)
+        self.processes.append((name, process, log))
+        return process
+
+    def tail(self, name, lines = 20) -> str:
+        return "\n".join((self.log_dir / f"{name}.log").read_text(errors = "replace").splitlines()[-lines:])
+
+    def stop(self):
+        for _, process, log in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout = 10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            log.close()
+        self.processes = []
+
+class Client():
+    """One signed-in user: logs in through the fake consent screen, then holds the session and CSRF token."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        # /login -> fake consent -> /callback -> home, with the redirects followed and the session cookie kept
+        with self.opener.open(self.base_url + "/login") as response:
+            self.csrf_token = CSRF_RE.search(response.read().decode("utf-8")).group(1)
+
+    def post(self, path, schedule) -> tuple:
+        """(seconds, status, JSON body or None) for a schedule posted as JSON."""
+        request = urllib.request.Request(self.base_url + path, method = "POST",
+                                         headers = {"Content-Type": "application/json", "X-CSRFToken": self.csrf_token},
+                                         data = json.dumps({"schedule": schedule}).encode("utf-8"))
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request) as response:
+                body, status = response.read(), response.status
+        except urllib.error.HTTPError as e:
+            body, status = e.read(), e.code
+        elapsed = time.perf_counter() - started
+
+        payload = None
+        if body[:1] == b"{":
+            payload = json.loads(body)
+        return elapsed, status, payload
+
+    def wait_job(self, status_url, timeout = 120.0) -> str:
+        """Poll a queued job until it finishes, returning its final status."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.opener.open(self.base_url + status_url) as response:
+                job = json.loads(response.read())
+            if job["status"] in ("done", "failed"):
+                return job["status"]
+            time.sleep(0.05)
+        return "timeout"
+
+def run_scenario(label, clients, schedules, requests, wait_jobs) -> dict:
+    """Each client sends its share of requests back to back from its own thread; closed-loop load."""
+    path, expected = SCENARIOS[label]
+    samples, jobs, lock = [], [], threading.Lock()
+
+    def drive(index, client):
+        for number in range(index, requests, len(clients)):
+            # Previews get a new schedule each time; add and delete reuse the client's own, so delete undoes add
+            schedule = schedules(number) if label == "preview" else schedules(index)
+            elapsed, status, payload = client.post(path, schedule)
+            job = None
+            if wait_jobs and payload and "status_url" in payload:
+                job_started = time.perf_counter()
+                job = (client.wait_job(payload["status_url"]), elapsed + time.perf_counter() - job_started)
+            with lock:
+                samples.append((elapsed, status))
+                if job is not None:
+                    jobs.append(job)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target = drive, args = (index, client)) for index, client in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [seconds * 1000 for seconds, _ in samples]
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    report = {
+        "scenario": label,
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "errors": len(samples) - statuses.get(str(expected), 0),
+        "statuses": statuses,
+    }
+    if jobs:
+        job_latencies = [seconds * 1000 for _, seconds in jobs]
+        report["job_p50_ms"] = round(percentile(job_latencies, 0.50), 2)
+        report["job_p95_ms"] = round(percentile(job_latencies, 0.95), 2)
+        report["jobs_failed"] = sum(1 for status, _ in jobs if status != "done")
+    return report
+
+def parse_config(text) -> tuple:
+    workers, _, threads = text.lower().partition("x")
+    return int(workers), int(threads or 1)
+
+def run_config(config, args, log_dir) -> list:
+    """Start fake Google, Redis, gunicorn and the worker for one config, run every scenario and tear them down."""
+    workers, threads = parse_config(config)
+    stack, fake_redis = Stack(log_dir), None
+    try:
+        google_port, app_port = free_port(), free_port()
+        google_root = f"http://127.0.0.1:{google_port}/"
+        secrets_path = Path(log_dir) / "client_secrets.json"
+        secrets_path.write_text(json.dumps(client_secrets(google_root)), encoding = "utf-8")
+        google = stack.start("fake_google", [sys.executable, "-m", "benchmarks.fake_google", "--port", str(google_port),
+                                             "--latency", str(args.latency), "--call-latency", str(args.call_latency),
+                                             "--rate-limit", str(args.rate_limit)])
+        wait_for_port(google_port, google)
+
+        redis_host, redis_port = args.redis_host, args.redis_port
+        if args.fake_redis:
+            redis_port = free_port()
+            fake_redis = multiprocessing.get_context("spawn").Process(target = _serve_fake_redis, args = (redis_port,), daemon = True)
+            fake_redis.start()
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", redis_port), timeout = 0.5).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline or not fake_redis.is_alive():
+                        raise RuntimeError("fakeredis server did not start; is fakeredis installed?")
+                    time.sleep(0.1)
+
+        env = dict(os.environ,
+                   PYTHONPATH = os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])),
+                   SECRET_KEY = "load-test", WTF_CSRF_SECRET_KEY = "load-test",
+                   REDIS_HOST = redis_host, REDIS_PORT = str(redis_port), REDIS_DB = str(args.redis_db),
+                   RATELIMIT_STORAGE_URI = f"redis://{redis_host}:{redis_port}/{args.redis_db}", RATELIMIT_ENABLED = "false",
+                   GOOGLE_API_ROOT = google_root, GOOGLE_CREDENTIALS_PATH = str(secrets_path), SCOPES = SCOPES,
+                   LOG_LEVEL = "WARNING")
+        if fake_redis is not None:
+            env["REDIS_HEALTH_CHECK_INTERVAL"] = "0" # fakeredis never marks a connection checked, so it would PING every command
+
+        app = stack.start("gunicorn", [sys.executable, "-m", "gunicorn", "-w", str(workers), "-k", "gthread", "--threads", str(threads),
+                                       "-b", f"127.0.0.1:{app_port}", "schedule2calendar.app:app"], env)
+        for index in range(args.job_workers):
+            stack.start(f"worker{index}", [sys.executable, "-m", "schedule2calendar.worker"], env)
+        try:
+            wait_for_port(app_port, app)
+        except RuntimeError:
+            print(stack.tail("gunicorn"), file = sys.stderr)
+            raise
+
+        base_url = f"http://127.0.0.1:{app_port}"
+        clients = [Client(base_url) for _ in range(args.concurrency)]
+        generator = ScheduleGenerator(args.seed)
+        pool = [generator.schedule() for _ in range(max(args.requests, args.concurrency))]
+
+        results = []
+        for label in args.scenarios:
+            report = run_scenario(label, clients, pool.__getitem__, args.requests, args.wait_jobs)
+            report = dict({"config": config, "workers": workers, "threads": threads}, **report)
+            print(json.dumps(report), flush = True)
+            results.append(report)
+        return results
+    finally:
+        stack.stop()
+        if fake_redis is not None:
+            fake_redis.terminate()
+
+def compare(results, baseline, tolerance) -> list:
+    """Regressions against a stored run: p95 up, RPS down by more than tolerance, or new errors."""
+    previous = {(report["config"], report["scenario"]): report for report in baseline["results"]}
+    regressions = []
+    for report in results:
+        old = previous.get((report["config"], report["scenario"]))
+        if old is None:
+            continue
+        name = f"{report['config']} {report['scenario']}"
+        if report["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['p95_ms']} -> {report['p95_ms']} ms")
+        if report["rps"] < old["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {old['rps']} -> {report['rps']}")
+        if report["errors"] > old.get("errors", 0):
+            regressions.append(f"{name}: errors {old.get('errors', 0)} -> {report['errors']}")
+        if report.get("jobs_failed", 0) > old.get("jobs_failed", 0):
+            regressions.append(f"{name}: failed jobs {old.get('jobs_failed', 0)} -> {report['jobs_failed']}")
+    return regressions
+
+def failures(results) -> list:
+    """Unexpected statuses or failed jobs; a run with any of them fails whatever its latency."""
+    found = []
+    for report in results:
+        name = f"{report['config']} {report['scenario']}"
+        if report["errors"]:
+            found.append(f"{name}: {report['errors']} unexpected statuses {report['statuses']}")
+        if report.get("jobs_failed"):
+            found.append(f"{name}: {report['jobs_failed']} jobs failed")
+    return found
+
+def metadata(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd = ROOT, capture_output = True, text = True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "time": datetime.now(timezone.utc).isoformat(),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("baseline", "output")},
+    }
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Load test the app end to end with a fake Google API.")
+    parser.add_argument("--configs", default = "1x4,3x4", help = "Comma separated gunicorn WORKERSxTHREADS")
+    parser.add_argument("--scenarios", default = "preview,add,delete", help = "Comma separated: preview, add, delete")
+    parser.add_argument("--requests", type = int, default = 200, help = "Requests per scenario")
+    parser.add_argument("--concurrency", type = int, default = 8, help = "Signed-in clients sending at once")
+    parser.add_argument("--job-workers", type = int, default = 1, help = "Job worker processes")
+    parser.add_argument("--wait-jobs", action = "store_true", help = "Poll each queued job to completion and report job latency")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--latency", type = float, default = 0.05, help = "Fake Google seconds per HTTP request")
+    parser.add_argument("--call-latency", type = float, default = 0.01, help = "Fake Google seconds per call in a batch")
+    parser.add_argument("--rate-limit", type = float, default = 0.0, help = "Fraction of fake Google calls answered 429")
+    parser.add_argument("--fake-redis", action = "store_true", help = "Serve Redis from fakeredis instead of --redis-host")
+    parser.add_argument("--redis-host", default = "127.0.0.1")
+    parser.add_argument("--redis-port", type = int, default = 6379)
+    parser.add_argument("--redis-db", type = int, default = 15, help = "Use a scratch database; the test writes sessions and jobs")
+    parser.add_argument("--output", help = "Write metadata and results as JSON here")
+    parser.add_argument("--baseline", help = "Results JSON to compare with; exits 1 on a regression")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "Allowed fractional change before a regression")
+    args = parser.parse_args(argv)
+    args.scenarios = [label.strip() for label in args.scenarios.split(",") if label.strip()]
+    unknown = [label for label in args.scenarios if label not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix = "load_test_") as log_dir:
+        for config in args.configs.split(","):
+            results.extend(run_config(config.strip(), args, log_dir))
+
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8") as f:
+            json.dump({"meta": metadata(args), "results": results}, f, indent = 2)
+
+    problems = [f"FAILED {failure}" for failure in failures(results)]
+    if args.baseline:
+        with open(args.baseline, encoding = "utf-8") as f:
+            problems += [f"REGRESSION {regression}" for regression in compare(results, json.load(f), args.tolerance)]
+    for problem in problems:
+        print(problem)
+    raise SystemExit(1 if problems else 0)
+
+if __name__ == '__main__':
+    main()
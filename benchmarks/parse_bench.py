@@ -0,0 +1,84 @@
+from schedule2calendar.schedule_handler import parse_schedule, tokenize_schedule
+from schedule2calendar.formats import parse_any
+from schedule2calendar.date_math import ParseContext
+from schedule2calendar.sanitize import clean_schedule
+from benchmarks.schedule_gen import ScheduleGenerator
+
+import argparse
+import json
+import time
+
+""" Parse throughput over a corpus of synthetic registrar pastes (benchmarks/schedule_gen.py): python -m benchmarks.parse_bench
+
+Reports schedules and events per second for the tokenizer alone, parse_schedule, and parse_any with format
+detection, best of --rounds. Each paste gets its own ParseContext, as each request does. Save a run with
+--output and pass it to a later run as --baseline to exit 1 when events per second drop by more than --tolerance.
+"""
+
+def corpus(count, seed) -> list:
+    """Pastes as clean_schedule hands them to the parser."""
+    generator = ScheduleGenerator(seed)
+    texts = []
+    for _ in range(count):
+        text, error = clean_schedule(generator.schedule(), 10000)
+        if error:
+            raise SystemExit(f"Synthetic schedule rejected by the sanitizer: {error}")
+        texts.append(text)
+    return texts
+
+def best_of(rounds, fn, texts) -> tuple:
+    """(fastest seconds for one pass over texts, items the pass produced)."""
+    best, produced = float("inf"), 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        produced = sum(len(fn(text)) for text in texts)
+        best = min(best, time.perf_counter() - started)
+    return best, produced
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark schedule parse throughput on synthetic pastes.")
+    parser.add_argument("--count", type = int, default = 3000, help = "Pastes in the corpus")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--rounds", type = int, default = 3, help = "Passes per measurement; the fastest is reported")
+    parser.add_argument("--output", help = "Write the results as JSON to this file")
+    parser.add_argument("--baseline", help = "Results JSON from an earlier run to compare events per second with")
+    parser.add_argument("--tolerance", type = float, default = 0.15, help = "Allowed fractional drop from the baseline")
+    args = parser.parse_args(argv)
+
+    texts = corpus(args.count, args.seed)
+    stages = {
+        "tokenize": lambda text: [token for course in tokenize_schedule(text) for token in course["meetings"]],
+        "parse_schedule": lambda text: parse_schedule(text, ParseContext(), normalized = True),
+        "parse_any": lambda text: parse_any(text, ctx = ParseContext(), normalized = True),
+    }
+
+    results = {}
+    print(f"{'stage':<16} {'schedules/s':>12} {'items/s':>12} {'items':>8}")
+    for name, fn in stages.items():
+        seconds, produced = best_of(args.rounds, fn, texts)
+        results[name] = {"schedules_per_s": round(len(texts) / seconds, 1), "items_per_s": round(produced / seconds, 1), "items": produced}
+        print(f"{name:<16} {len(texts) / seconds:>12,.0f} {produced / seconds:>12,.0f} {produced:>8}")
+
+    # Tokens are meetings; both parsers must find one event per meeting plus each course's final
+    if results["parse_schedule"]["items"] != results["parse_any"]["items"] or results["parse_schedule"]["items"] <= results["tokenize"]["items"]:
+        raise SystemExit("parse_schedule and parse_any disagree, or found fewer events than meetings")
+
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8") as f:
+            json.dump({"count": args.count, "seed": args.seed, "results": results}, f, indent = 2)
+
+    if args.baseline:
+        with open(args.baseline, encoding = "utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressed = False
+        for name, result in results.items():
+            before = baseline.get(name, {}).get("items_per_s")
+            if not before:
+                continue
+            change = result["items_per_s"] / before - 1
+            regressed |= change < -args.tolerance
+            print(f"{name:<16} {change:+.1%} events/s vs baseline{'  REGRESSION' if change < -args.tolerance else ''}")
+        raise SystemExit(1 if regressed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from pathlib import Path
+import urllib.request
+import urllib.error
+import argparse
+import json
+import time
+import re
+
+""" Load test for /process-schedule against a running server, comparing first-time, repeat and conditional (304) previews.
+
+Start the app with RATELIMIT_ENABLED=false, then run: python -m benchmarks.preview_load --url http://localhost:5000
+"""
+
+EXAMPLE_PATH = Path(__file__).resolve().parent.parent / "schedule-example.txt"
+CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+def example_schedule() -> str:
+    # First term of the example, so results compare with runs from when the whole example was over the length limit
+    return "\n".join(EXAMPLE_PATH.read_text(encoding = "utf-8").splitlines()[:6])
+
+def variant(schedule, number) -> str:
+    """A distinct schedule of the same shape, so it misses every cache."""
+    return schedule.replace("140A", f"{100 + number % 900}{chr(65 + number // 900 % 26)}", 1)
+
+class Client():
+    """Cookie-holding client, since CSRF tokens are tied to the session."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        with self.opener.open(self.base_url + "/") as response:
+            self.csrf_token = CSRF_RE.search(response.read().decode("utf-8")).group(1)
+
+    def preview(self, schedule, etag = None) -> tuple:
+        headers = {"Content-Type": "application/json", "X-CSRFToken": self.csrf_token}
+        if etag:
+            headers["If-None-Match"] = etag
+        request = urllib.request.Request(self.base_url + "/process-schedule", method = "POST", headers = headers,
+                                         data = json.dumps({"schedule": schedule}).encode("utf-8"))
+
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                status, etag = response.status, response.headers.get("ETag")
+        except urllib.error.HTTPError as e:
+            status, etag = e.code, e.headers.get("ETag")
+        return time.perf_counter() - started, status, etag
+
+def percentile(samples, fraction) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def run(label, client, jobs, concurrency) -> dict:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = concurrency) as pool:
+        results = list(pool.map(lambda job: client.preview(*job), jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency * 1000 for latency, _, _ in results]
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    report = {
+        "scenario": label,
+        "requests": len(results),
+        "rps": round(len(results) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "statuses": statuses,
+    }
+    print(json.dumps(report))
+    return report
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Compare first-time and repeat preview latency.")
+    parser.add_argument("--url", default = "http://localhost:5000", help = "Base URL of the running app")
+    parser.add_argument("-n", "--requests", type = int, default = 200, help = "Requests per scenario")
+    parser.add_argument("-c", "--concurrency", type = int, default = 8, help = "Concurrent requests")
+    args = parser.parse_args(argv)
+
+    client = Client(args.url)
+    schedule = example_schedule()
+    offset = int(time.time()) % 10000 # Fresh variants on each run, so "first-time" previews really miss
+
+    run("first-time", client, [(variant(schedule, offset + number),) for number in range(args.requests)], args.concurrency)
+    _, _, etag = client.preview(schedule)
+    run("repeat", client, [(schedule,)] * args.requests, args.concurrency)
+    run("conditional", client, [(schedule, etag)] * args.requests, args.concurrency)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+from schedule2calendar.models import Event, weekday_mask
+from schedule2calendar.recurrence import expand
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import argparse
+import random
+import time
+
+""" Times full-term RRULE expansion over large batches of synthetic schedules: python -m benchmarks.recurrence_bench """
+
+TZ_NAME = "America/Los_Angeles"
+DAY_PATTERNS = ([0, 2, 4], [1, 3], [0, 2], [2, 4], [0, 1, 2, 3, 4], [3])
+
+def make_events(count, seed = 1) -> list:
+    rng = random.Random(seed)
+    tz = ZoneInfo(TZ_NAME)
+    events = []
+    for _ in range(count):
+        weekdays = rng.choice(DAY_PATTERNS)
+        start = datetime(2025, 1, 6, rng.randint(8, 19), rng.choice((0, 10, 30)), tzinfo = tz) + timedelta(days = weekdays[0])
+        until = (start + timedelta(weeks = rng.randint(10, 16))).replace(hour = 23, minute = 59, second = 59).astimezone(timezone.utc)
+        holidays = tuple(start.date() + timedelta(weeks = week) for week in rng.sample(range(1, 10), 2))
+        events.append(Event("BENCH 001", "Lecture", "HALL 100", start, start + timedelta(minutes = 50), TZ_NAME,
+                            weekday_mask(weekdays), until, exdates = holidays))
+    return events
+
+def naive_count(event) -> int:
+    """Day-by-day stepping, the baseline the arithmetic expansion replaces."""
+    day = event.start
+    total = 0
+    while day <= event.until:
+        if event.weekdays & (1 << day.weekday()) and day.date() not in event.exdates:
+            total += 1
+        day += timedelta(days = 1)
+    return total
+
+def timed(label, fn, events):
+    started = time.perf_counter()
+    for event in events:
+        fn(event)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {elapsed * 1000:9.1f} ms  {elapsed / len(events) * 1e6:8.2f} us/event")
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark recurrence expansion.")
+    parser.add_argument("-n", "--events", type = int, default = 20000, help = "Synthetic events to expand")
+    args = parser.parse_args(argv)
+
+    events = make_events(args.events)
+    print(f"{len(events)} events")
+    timed("naive count", naive_count, events)
+    timed("count", lambda event: expand(event).count(), events)
+    timed("last meeting (nth)", lambda event: expand(event).nth(expand(event).count() - 1), events)
+    timed("next meeting", lambda event: expand(event).next_after(event.start + timedelta(weeks = 5)), events)
+    timed("full iteration", lambda event: sum(1 for _ in expand(event)), events)
+
+if __name__ == '__main__':
+    main()
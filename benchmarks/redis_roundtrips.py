@@ -0,0 +1,88 @@
+from schedule2calendar import create_app
+from schedule2calendar.google_service import store_credentials
+from benchmarks.fake_google import serve
+
+from google.oauth2.credentials import Credentials
+from datetime import datetime, timedelta
+from pathlib import Path
+from redis.connection import AbstractConnection
+import argparse
+import json
+import os
+
+""" Counts Redis round trips per request for the main endpoints, across sessions, the rate limiter, credentials and caches.
+
+Needs the app's Redis (REDIS_HOST etc.); Google calls go to an in-process fake. Run: python -m benchmarks.redis_roundtrips
+"""
+
+EXAMPLE_PATH = Path(__file__).resolve().parent.parent / "schedule-example.txt"
+
+# One count per write to a Redis socket: a command, or a whole pipeline or script call
+_round_trips = [0]
+_send_packed_command = AbstractConnection.send_packed_command
+
+# Labels measured so far; each scenario gets its own client address
+_scenarios = []
+
+def _counting_send(self, command, check_health = True):
+    _round_trips[0] += 1
+    return _send_packed_command(self, command, check_health)
+
+def example_schedule() -> str:
+    return "\n".join(EXAMPLE_PATH.read_text(encoding = "utf-8").splitlines()[:6])
+
+def login(app, client, email):
+    """Give the test client a session holding stored, unexpired credentials, as the OAuth callback would."""
+    creds = Credentials(
+        token = "token", refresh_token = "refresh", client_id = "client", client_secret = "secret",
+        token_uri = "https://oauth2.googleapis.com/token", expiry = datetime.utcnow() + timedelta(hours = 1),
+    )
+    with app.app_context():
+        store_credentials(email, creds)
+    with client.session_transaction() as session:
+        session["email"] = email
+
+def measure(label, requests, client, call) -> dict:
+    """Round trips per request once connections, scripts and caches are warm."""
+    # Rate limits are per address; a fresh one per scenario keeps them from tripping
+    client.environ_base["REMOTE_ADDR"] = f"10.0.0.{len(_scenarios) + 1}"
+    _scenarios.append(label)
+    call()
+    _round_trips[0] = 0
+    for _ in range(requests):
+        response = call()
+        assert response.status_code < 400, (label, response.status_code, response.get_data(as_text = True)[:200])
+    summary = {"scenario": label, "requests": requests, "round_trips_per_request": round(_round_trips[0] / requests, 2)}
+    print(json.dumps(summary))
+    return summary
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Count Redis round trips per request.")
+    parser.add_argument("--requests", type = int, default = 15, help = "Requests per scenario, under the 20 per minute route limit")
+    args = parser.parse_args(argv)
+
+    _, root = serve(latency = 0.0, call_latency = 0.0)
+    os.environ["GOOGLE_API_ROOT"] = root
+
+    app = create_app()
+    app.config["WTF_CSRF_ENABLED"] = False
+    AbstractConnection.send_packed_command = _counting_send
+
+    schedule = {"schedule": example_schedule()}
+    anonymous = app.test_client()
+    signed_in = app.test_client()
+    login(app, signed_in, "bench@example.com")
+
+    job = signed_in.post("/add-to-calendar", json = schedule).get_json()
+    results = [
+        measure("home page", args.requests, anonymous, lambda: anonymous.get("/")),
+        measure("preview, signed out", args.requests, anonymous, lambda: anonymous.post("/process-schedule", json = schedule)),
+        measure("preview, signed in", args.requests, signed_in, lambda: signed_in.post("/process-schedule", json = schedule)),
+        measure("queue add", args.requests, signed_in, lambda: signed_in.post("/add-to-calendar", json = schedule)),
+        measure("poll job", args.requests, signed_in, lambda: signed_in.get(job["status_url"])),
+    ]
+    total = sum(result["round_trips_per_request"] for result in results)
+    print(json.dumps({"scenario": "all", "round_trips_per_request": round(total / len(results), 2)}))
+
+if __name__ == '__main__':
+    main()
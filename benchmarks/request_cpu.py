@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import argparse
+import socket
+import json
+import time
+import os
+
+""" CPU per request for the schedule ingest stage, run on threads the way gunicorn's gthread workers run requests.
+
+Compares the routes' old flow, get_schedule() run twice (once for the isinstance check, once for the value) and
+then a parse, with one get_schedule() and the same parse; the difference is what sanitizing once saves. The same
+pair with the bleach-based sanitizer the routes used then (benchmarks/sanitize_bench.reference) shows the saving
+when the change was made. Then
+ingest_schedule as the routes run it, with the parse cache missing and hitting, for context: a hit still pays a
+Redis round trip and decoding, so on the fast parser it may cost no less than a parse. CPU is process time, so it counts every thread and the GIL contention between them; --fake-redis runs its
+server in another process so its CPU isn't counted.
+
+Needs the app's Redis (REDIS_HOST etc.), or --fake-redis: python -m benchmarks.request_cpu --fake-redis --threads 4
+"""
+
+def _serve_fake_redis(port):
+    from fakeredis import TcpFakeServer
+    TcpFakeServer(("127.0.0.1", port), server_type = "redis").serve_forever()
+
+def start_fake_redis() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    multiprocessing.get_context("spawn").Process(target = _serve_fake_redis, args = (port,), daemon = True).start()
+
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout = 0.5).close()
+            return port
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError("fakeredis server did not start; is fakeredis installed?")
+            time.sleep(0.1)
+
+def twice(get_schedule, parse_any):
+    """The routes before the ingest stage: two full sanitize passes, then an uncached parse."""
+    if not isinstance(get_schedule(), str):
+        raise AssertionError("schedule rejected")
+    schedule = get_schedule()
+    return parse_any(schedule, normalized = True)
+
+def once(get_schedule, parse_any):
+    schedule = get_schedule()
+    if not isinstance(schedule, str):
+        raise AssertionError("schedule rejected")
+    return parse_any(schedule, normalized = True)
+
+def measure(app, label, handler, schedules, threads) -> dict:
+    def request(schedule):
+        with app.test_request_context("/process-schedule", method = "POST", json = {"schedule": schedule}):
+            events = handler()
+            if not events:
+                raise AssertionError(f"{label}: no events")
+
+    with ThreadPoolExecutor(max_workers = threads) as pool:
+        list(pool.map(request, schedules[:threads])) # Start the threads and connections before timing
+        cpu, wall = time.process_time(), time.perf_counter()
+        list(pool.map(request, schedules))
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+
+    result = {"scenario": label, "threads": threads, "requests": len(schedules),
+              "cpu_us_per_request": round(cpu / len(schedules) * 1e6, 1), "requests_per_s": round(len(schedules) / wall, 1)}
+    print(json.dumps(result))
+    return result
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Measure CPU per request for schedule ingest, before and after sanitizing once.")
+    parser.add_argument("--requests", type = int, default = 2000)
+    parser.add_argument("--threads", type = int, default = 4, help = "Request threads, as gunicorn --threads")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--fake-redis", action = "store_true", help = "Run against a fakeredis server in a child process")
+    args = parser.parse_args(argv)
+
+    if args.fake_redis:
+        os.environ.update(REDIS_HOST = "127.0.0.1", REDIS_PORT = str(start_fake_redis()), REDIS_HEALTH_CHECK_INTERVAL = "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    # The app reads its config on import, so only import it once the environment is set
+    from benchmarks.schedule_gen import ScheduleGenerator
+    from schedule2calendar import create_app
+    from schedule2calendar.schedule_handler import get_schedule, ingest_schedule
+    from schedule2calendar.formats import parse_any
+    from benchmarks.sanitize_bench import reference
+    from flask import request
+
+    app = create_app()
+    generator = ScheduleGenerator(args.seed)
+    schedules = [generator.schedule() for _ in range(args.requests)]
+
+    def ingest():
+        events, error = ingest_schedule()
+        if error is not None:
+            raise AssertionError(error)
+        return events
+
+    def bleach_schedule():
+        schedule, error = reference(request.json["schedule"], app.config["SCHEDULE_MAX_LENGTH"])
+        return schedule if error is None else (error, 400)
+
+    bleach_before = measure(app, "bleach twice, parse", lambda: twice(bleach_schedule, parse_any), schedules, args.threads)
+    bleach_after = measure(app, "bleach once, parse", lambda: once(bleach_schedule, parse_any), schedules, args.threads)
+    before = measure(app, "get_schedule twice, parse", lambda: twice(get_schedule, parse_any), schedules, args.threads)
+    after = measure(app, "get_schedule once, parse", lambda: once(get_schedule, parse_any), schedules, args.threads)
+    measure(app, "ingest_schedule, cache miss", ingest, schedules, args.threads)
+    measure(app, "ingest_schedule, cache hit", ingest, schedules, args.threads)
+    for label, (twice_result, once_result) in {"bleach": (bleach_before, bleach_after), "get_schedule": (before, after)}.items():
+        saved = twice_result["cpu_us_per_request"] - once_result["cpu_us_per_request"]
+        print(json.dumps({"sanitizer": label, "saved_cpu_us_per_request": round(saved, 1), "saved_fraction": round(saved / twice_result["cpu_us_per_request"], 3)}))
+
+if __name__ == '__main__':
+    main()
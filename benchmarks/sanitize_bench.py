@@ -0,0 +1,96 @@
+from schedule2calendar.sanitize import clean_schedule
+
+import unicodedata
+import argparse
+import random
+import bleach
+import html
+import time
+import re
+
+""" Checks the single-pass sanitizer against bleach.clean + html.unescape + the character whitelist, then times both.
+
+Fuzz: python -m benchmarks.sanitize_bench --cases 20000
+Timing only: python -m benchmarks.sanitize_bench --cases 0 --repeat 200
+"""
+
+SCHEDULE_CHARS_RE = re.compile(r'^[a-zA-Z0-9\s,.\-:/#&()*\']+$')
+
+EXAMPLE = (
+    "CSE 120 - Computer Architecture\nMWF 10:00 - 10:50 AM CENTR 115\nF 12:00 - 12:50 PM WLH 2005\n"
+    "Final Exam: Mon. Dec 8 at 11:30 AM\n"
+)
+
+# Pieces the fuzzer strings together: schedule text, markup, entities and awkward characters
+FRAGMENTS = (
+    "CSE 120 - ", "MWF ", "10:00 - 10:50 AM ", "CENTR 115", "\n", "\r\n", "\r", " ", "\t", "&", ";", "#", "<", ">", "/",
+    "=", '"', "'", "*", "-", "!", "?", "<b>", "</b>", "<p>", "</p>", "<div class=\"x\">", "<br/>", "<li>", "<HR>", "<P ",
+    "<script>", "</script>", "<!--", "-->", "--!>", "<!-->", "<!DOCTYPE html>", "<?xml ?>", "<![CDATA[", "]]>", "</>",
+    "</ x>", "< b>", "<1>", "<b x", "<b x=", " x=y", "<i/", "<!", "<?", "</", "<a href=x>", "<a title='>'>", "&amp;", "&amp", "&lt;", "&gt;", "&nbsp;", "&#65;", "&#65",
+    "&#x41;", "&#65';", "&#xZ;", "&#;", "&noti;", "&ampx;", "&#0;", "&#128;", "&#12;", "&#x110000;", "&notit;", "&not;", "&AMP;", "\x00", "\x01", "\x0b", "\x0c",
+    "\x1c", "\x7f", "\x85", "\xa0", " ", "　", "é", "ｆ", "–", "’", "​",
+)
+
+def reference(dirty_schedule, max_length) -> tuple:
+    """What get_schedule accepted before: (schedule as the parser normalized it, None) or (None, error)."""
+    schedule = html.unescape(bleach.clean(dirty_schedule, tags = [], strip = True))
+    if len(schedule) == 0:
+        return None, "No input detected"
+    if len(schedule) > max_length:
+        return None, "Input too long"
+    if not SCHEDULE_CHARS_RE.match(schedule):
+        return None, "Invalid input: only characters that may appear in a schedule are allowed"
+    return unicodedata.normalize("NFKC", schedule).replace("\r\n", "\n"), None
+
+def random_case(rng) -> str:
+    if rng.random() < 0.2:
+        return "".join(rng.choice((chr(rng.randrange(0, 0x3100)), rng.choice(FRAGMENTS))) for _ in range(rng.randint(0, 12)))
+    return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 12)))
+
+def fuzz(cases, max_length, seed) -> int:
+    rng = random.Random(seed)
+    mismatches = 0
+    guarded = 0
+    for _ in range(cases):
+        dirty_schedule = random_case(rng)
+        expected = reference(dirty_schedule, max_length)
+        actual = clean_schedule(dirty_schedule, max_length)
+        if len(dirty_schedule) > max_length * 4 and actual[1] == "Input too long":
+            guarded += expected != actual # Rejected before scanning on purpose; bleach parsed it first
+        elif expected != actual:
+            mismatches += 1
+            if mismatches <= 20:
+                print(f"MISMATCH {dirty_schedule!r}\n  bleach: {expected!r}\n  single pass: {actual!r}")
+
+    print(f"{cases} cases, {mismatches} mismatches, {guarded} rejected by the raw length guard only")
+    return mismatches
+
+def timed(label, fn, text, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32}{len(text):>8} chars {elapsed / repeat * 1e6:>12.1f} us/call")
+
+def bench(repeat):
+    plain = EXAMPLE * 10
+    pasted = "".join(f"<p>{line}&nbsp;</p>" for line in plain.splitlines())
+    for name, text in (("plain", plain), ("pasted HTML", pasted)):
+        timed(f"bleach + unescape ({name})", lambda t: reference(t, len(t)), text, repeat)
+        timed(f"single pass ({name})", lambda t: clean_schedule(t, len(t)), text, repeat)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Fuzz and time the schedule sanitizer against bleach.")
+    parser.add_argument("--cases", type = int, default = 20000, help = "Random inputs to compare")
+    parser.add_argument("--seed", type = int, default = 1)
+    parser.add_argument("--max-length", type = int, default = 1000)
+    parser.add_argument("--repeat", type = int, default = 100, help = "Calls per timing")
+    args = parser.parse_args(argv)
+
+    mismatches = fuzz(args.cases, args.max_length, args.seed)
+    if args.repeat:
+        bench(args.repeat)
+    raise SystemExit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+    main()
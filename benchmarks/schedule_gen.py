@@ -0,0 +1,81 @@
+from schedule2calendar.schedule_handler import tokenize_schedule
+from schedule2calendar.date_math import WEEKDAY_NAMES
+from schedule2calendar.terms import load_term_calendar
+
+from datetime import date, timedelta
+from pathlib import Path
+import argparse
+import random
+import json
+import sys
+
+""" Synthetic UC Davis schedules for load tests, recombined from the titles, meetings and rooms in schedule-example.txt.
+
+Finals fall in the finals week of the current or next term of the term calendar, so every schedule parses to
+upcoming events. Output is NDJSON in the /bulk-process input format: python -m benchmarks.schedule_gen --count 100
+"""
+
+EXAMPLE_PATH = Path(__file__).resolve().parent.parent / "schedule-example.txt"
+
+FINAL_TIMES = ("8:00am", "10:30am", "1:00pm", "3:30pm", "6:00pm")
+
+class ScheduleGenerator():
+    """Draws schedules from the example's pieces; the same seed gives the same schedules."""
+
+    def __init__(self, seed = 0, today = None, example_path = EXAMPLE_PATH):
+        self.rng = random.Random(seed)
+        courses = tokenize_schedule(Path(example_path).read_text(encoding = "utf-8"))
+        self.depts = sorted({course["header"].group("dept") for course in courses})
+        self.titles = sorted({course["header"].group("title").strip() for course in courses})
+        self.meetings = [
+            (m.group("start"), m.group("end"), (m.group("ampm") or "PM").upper(), f"{m.group('building')} {m.group('room')}")
+            for course in courses for m in course["meetings"]
+        ]
+        self.day_patterns = sorted({m.group("days").upper() for course in courses for m in course["meetings"]})
+        self.finals_days = self._finals_days(today or date.today())
+
+    def _finals_days(self, today) -> list:
+        """Weekdays of the finals week ahead, or of a week two months out without a term calendar."""
+        term = load_term_calendar().current_or_next(today)
+        if term is not None and term.finals_end >= today:
+            first, last = max(term.end + timedelta(days = 1), today), term.finals_end
+        else:
+            first = today + timedelta(days = 60)
+            last = first + timedelta(days = 6)
+        days = [first + timedelta(days = offset) for offset in range((last - first).days + 1)]
+        return [day for day in days if day.weekday() < 5] or days
+
+    def course(self, number) -> str:
+        """One course: header, one or two meetings and a final, on the example's two-line layout."""
+        rng = self.rng
+        header = f"{rng.choice(self.depts)} {number:03d}{rng.choice(('', 'A', 'B'))} - {rng.choice(self.titles)}"
+        meetings = []
+        for _ in range(rng.randint(1, 2)):
+            start, end, ampm, room = rng.choice(self.meetings)
+            meetings.append(f"{rng.choice(self.day_patterns)} {start} - {end} {ampm} {room}")
+
+        final_day = rng.choice(self.finals_days)
+        final = (f"Final Exam: {WEEKDAY_NAMES[final_day.weekday()].title()}. {final_day.strftime('%b')}.{final_day.day:02d}"
+                 f" at {rng.choice(FINAL_TIMES)} show details...")
+        return f"{header}\n{' '.join(meetings)} {final}"
+
+    def schedule(self, courses = (3, 6)) -> str:
+        """A schedule of between courses[0] and courses[1] courses with distinct numbers."""
+        numbers = self.rng.sample(range(1, 200), self.rng.randint(*courses))
+        return "\n".join(self.course(number) for number in numbers)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Write synthetic schedules as NDJSON.")
+    parser.add_argument("--count", type = int, default = 100)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--min-courses", type = int, default = 3)
+    parser.add_argument("--max-courses", type = int, default = 6)
+    args = parser.parse_args(argv)
+
+    generator = ScheduleGenerator(args.seed)
+    for index in range(args.count):
+        schedule = generator.schedule((args.min_courses, args.max_courses))
+        sys.stdout.write(json.dumps({"id": f"synthetic-{index}", "schedule": schedule}) + "\n")
+
+if __name__ == '__main__':
+    main()
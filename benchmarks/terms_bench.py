@@ -0,0 +1,123 @@
+from schedule2calendar.date_math import ParseContext, DAY_MAP, WEEKDAY_NAMES, meeting_dates, resolve_final_date, convert_datetime
+from schedule2calendar.models import Event, weekday_mask
+from schedule2calendar.schedule_handler import parse_schedule
+from schedule2calendar.terms import load_term_calendar, TermCalendar
+from schedule2calendar.recurrence import expand
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from pathlib import Path
+import argparse
+import random
+import time
+
+""" Checks term-calendar date resolution against brute force over random dates, zones and meeting days, then times it.
+
+Properties: python -m benchmarks.terms_bench --cases 20000
+Timing only: python -m benchmarks.terms_bench --cases 0
+"""
+
+EXAMPLE_PATH = Path(__file__).resolve().parent.parent / "schedule-example.txt"
+
+ZONES = ("America/Los_Angeles", "America/New_York", "America/St_Johns", "Europe/London", "Asia/Kolkata",
+         "Australia/Lord_Howe", "Pacific/Auckland", "UTC")
+DAY_PATTERNS = ("MWF", "TR", "MW", "WF", "MTWRF", "R", "M", "S", "SU", "MTWRFSU")
+
+def brute_force(term, days) -> tuple:
+    """(first, last, skipped holidays) by walking every day of the term."""
+    weekdays = {DAY_MAP[day] for day in days}
+    meetings = []
+    day = term.start
+    while day <= term.end:
+        if day.weekday() in weekdays and day not in term.holidays:
+            meetings.append(day)
+        day += timedelta(days = 1)
+    if not meetings:
+        return None, None, ()
+    # Series start with the term whatever today is, so a mid-term rewrite keeps the meetings already held
+    first, last = meetings[0], meetings[-1]
+    skipped = tuple(day for day in term.holidays if first <= day <= last and day.weekday() in weekdays)
+    return first, last, skipped
+
+def check(rng, terms, failures) -> None:
+    term = rng.choice(terms.terms)
+    days = rng.choice(DAY_PATTERNS)
+    tz_name = rng.choice(ZONES)
+    today = term.start + timedelta(days = rng.randint(-60, (term.finals_end - term.start).days + 60))
+    ctx = ParseContext(now = datetime.combine(today, datetime.min.time(), tzinfo = ZoneInfo(tz_name)), tz_name = tz_name, terms = terms)
+
+    # First meeting, UNTIL and EXDATEs
+    first, until, exdates = meeting_dates(days, term, None, ctx)
+    expected_first, expected_last, expected_skipped = brute_force(term, days)
+    until_local = until.astimezone(ZoneInfo(tz_name))
+    if (first, until_local.date(), exdates) != (expected_first, expected_last, expected_skipped) or until_local.time().isoformat() != "23:59:59":
+        failures.append(("meeting dates", term.name, days, tz_name, today, first, until_local, exdates))
+        return
+
+    # The weekly series they describe meets exactly on the instruction days, DST changes included
+    start = convert_datetime("9:30", "AM", first, ctx)
+    event = Event("BENCH 001", "Lecture", "HALL 100", start, start + timedelta(minutes = 50), tz_name,
+                  weekday_mask(DAY_MAP[day] for day in days), until, exdates = exdates)
+    meetings = list(expand(event))
+    expected = (expected_last - expected_first).days + 1
+    expected = sum(1 for offset in range(expected)
+                   if (expected_first + timedelta(days = offset)).weekday() in {DAY_MAP[day] for day in days}) - len(expected_skipped)
+    wall_clock = {start.astimezone(ZoneInfo(tz_name)).strftime("%H:%M") for start, _ in meetings}
+    if len(meetings) != expected or wall_clock != {"09:30"}:
+        failures.append(("series", term.name, days, tz_name, today, len(meetings), expected, wall_clock))
+        return
+
+    # A final written as "Mon. Dec 8" resolves to its date from anywhere within half a year
+    final_day = term.end + timedelta(days = rng.randint(1, (term.finals_end - term.end).days))
+    ctx.today = final_day + timedelta(days = rng.randint(-180, 180))
+    ctx.year = ctx.today.year
+    resolved = resolve_final_date(WEEKDAY_NAMES[final_day.weekday()].title(), final_day.strftime("%b"), str(final_day.day), ctx)
+    if resolved != final_day:
+        failures.append(("final date", term.name, ctx.today, final_day, resolved))
+
+def properties(cases, seed) -> int:
+    rng = random.Random(seed)
+    terms = load_term_calendar()
+    failures = []
+    for _ in range(cases):
+        check(rng, terms, failures)
+
+    for failure in failures[:20]:
+        print("FAIL", failure)
+    print(f"{cases} cases, {len(failures)} failures")
+    return len(failures)
+
+def timed(label, fn, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed / count * 1e6:8.2f} us/call  {count / elapsed:12,.0f}/s")
+
+def bench(repeat):
+    terms = load_term_calendar()
+    ctx = ParseContext(tz_name = "America/New_York", terms = terms)
+    fallback = ParseContext(tz_name = "America/New_York", terms = TermCalendar())
+    term = terms.current_or_next(ctx.today)
+    final_day = term.finals_end if term else ctx.today
+    schedule = EXAMPLE_PATH.read_text(encoding = "utf-8")
+
+    timed("meeting dates (term table)", lambda: meeting_dates("MWF", term, final_day, ctx), repeat)
+    timed("meeting dates (weekday fallback)", lambda: meeting_dates("MWF", None, final_day, fallback), repeat)
+    timed("final date", lambda: resolve_final_date("Mon", "Dec", "8", ctx), repeat)
+    timed("parse example schedule", lambda: parse_schedule(schedule, ctx), max(repeat // 100, 1))
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Check and time term-calendar date resolution.")
+    parser.add_argument("--cases", type = int, default = 20000, help = "Random property checks")
+    parser.add_argument("--seed", type = int, default = 1)
+    parser.add_argument("--repeat", type = int, default = 20000, help = "Calls per timing")
+    args = parser.parse_args(argv)
+
+    failures = properties(args.cases, args.seed)
+    if args.repeat:
+        bench(args.repeat)
+    raise SystemExit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,7 @@
-from schedule2calendar.extensions import limiter, csrf, session_ext
+from schedule2calendar.extensions import limiter, csrf
+from schedule2calendar.redis_store import redis_pool, init_sessions
+from schedule2calendar.service_factory import warm_service_cache
+from schedule2calendar.telemetry import init_telemetry
 
 from dotenv import load_dotenv
 from flask import Flask
@@ -10,15 +13,23 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
-    # Redis client
-    app.extensions["redis_client"] = Redis.from_url(app.config["RATELIMIT_STORAGE_URI"])
+    # Redis client; one connection pool serves the app, sessions and the rate limiter
+    pool = redis_pool(app.config)
+    app.extensions["redis_client"] = Redis(connection_pool = pool)
     app.config["SESSION_REDIS"] = app.extensions["redis_client"]
+    app.config["RATELIMIT_STORAGE_OPTIONS"] = {"connection_pool": pool}
+
+    # Logging and request timing, before anything below logs
+    init_telemetry(app)
 
     # Initializes rate limiter
     limiter.init_app(app)
 
     csrf.init_app(app)
-    session_ext.init_app(app)
+    init_sessions(app, app.extensions["redis_client"])
+
+    # Parse Google discovery documents once per process
+    warm_service_cache(app.config["GOOGLE_API_ROOT"])
 
     # Blueprints
     from .routes import main_bp
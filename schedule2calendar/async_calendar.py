@@ -0,0 +1,133 @@
+from schedule2calendar.batch_executor import RETRYABLE_STATUSES
+from schedule2calendar.service_factory import api_root, HTTP_TIMEOUT
+from schedule2calendar.telemetry import timed
+
+from urllib.parse import quote
+from contextlib import nullcontext
+import asyncio
+import random
+import httpx
+
+""" Asynchronous Calendar API writes over a shared, pooled httpx client, so one worker can multiplex many jobs """
+
+# events() methods the calendar operations use, as (HTTP method, path under the calendar)
+METHODS = {
+    "import_": ("POST", "events/import"),
+    "patch": ("PATCH", "events/{eventId}"),
+    "delete": ("DELETE", "events/{eventId}"),
+    "list": ("GET", "events"),
+}
+
+def new_client(max_connections = 20) -> httpx.AsyncClient:
+    """One client per worker process; its connection pool is shared by every job in flight."""
+    limits = httpx.Limits(max_connections = max_connections, max_keepalive_connections = max_connections)
+    return httpx.AsyncClient(timeout = HTTP_TIMEOUT, limits = limits)
+
+def _is_retryable(response) -> bool:
+    if response.status_code in RETRYABLE_STATUSES:
+        return True
+
+    # 403 is only transient when Google reports a rate limit
+    return response.status_code == 403 and "ratelimitexceeded" in response.text.lower()
+
+class AsyncWriter():
+    """Runs writes as individual requests, at most `concurrency` at a time, retrying with jittered backoff.
+
+    Produces the same per-request result dicts as the batch executor. Writers sharing a client should share a
+    `connections` semaphore sized to its pool: httpcore rescans every queued request whenever a connection frees up,
+    so letting requests queue inside the pool costs CPU quadratic in the backlog.
+    """
+
+    def __init__(self, client, creds, concurrency = 10, max_retries = 5, base_delay = 1.0, connections = None):
+        self.client = client
+        self.creds = creds
+        self.concurrency = concurrency
+        self.connections = connections or nullcontext()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.base_url = f"{api_root()}calendar/v3/calendars/primary/"
+
+    async def _request(self, method, params):
+        http_method, path = METHODS[method]
+        params = dict(params)
+        body = params.pop("body", None)
+        url = self.base_url + path.format(eventId = quote(params.pop("eventId", ""), safe = ""))
+
+        headers = {"Authorization": f"Bearer {self.creds.token}"}
+        return await self.client.request(http_method, url, params = params or None, json = body, headers = headers)
+
+    async def _send(self, method, params) -> tuple:
+        """Send one request, retrying transient failures with jittered backoff: (response or None, error or None, attempts)."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.connections:
+                    response = await self._request(method, params)
+            except httpx.TransportError as e:
+                response = None
+                error = str(e)
+                retryable = True
+            else:
+                if response.is_success:
+                    return response, None, attempt + 1
+                retryable = _is_retryable(response)
+                error = response.text
+
+            if not retryable or attempt == self.max_retries:
+                return response, error, attempt + 1
+
+            await asyncio.sleep(random.uniform(0, self.base_delay * (2 ** attempt)))
+
+    async def _run_one(self, label, method, params, slots):
+        async with slots:
+            response, error, attempts = await self._send(method, params)
+
+        if error is None:
+            result = {"summary": label, "status": "ok", "attempts": attempts}
+            if response.content:
+                data = response.json()
+                if "id" in data:
+                    result["event_id"] = data["id"]
+            return result
+
+        result = {"summary": label, "status": "failed", "attempts": attempts, "error": error}
+        if response is not None:
+            result["code"] = response.status_code
+        return result
+
+    async def _get(self, params) -> dict:
+        """A retried events().list page; raises once retries run out."""
+        with timed("google_list"):
+            response, error, _ = await self._send("list", params)
+        if response is None:
+            raise httpx.TransportError(error)
+        response.raise_for_status()
+        return response.json()
+
+    async def run(self, writes, progress = None) -> list:
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def run_and_report(label, method, params):
+            result = await self._run_one(label, method, params, slots)
+            if progress is not None:
+                progress([result])
+            return result
+
+        with timed("async_execute"):
+            return list(await asyncio.gather(*(run_and_report(*write) for write in writes)))
+
+    async def find_event_by_uid(self, uid):
+        page = await self._get({"iCalUID": uid, "fields": "items(id,status)"})
+        for event in page.get("items", []):
+            if event.get("status") != "cancelled":
+                return event["id"]
+        return None
+
+    async def list_events(self, **params) -> list:
+        """Every event across the pages of events().list."""
+        items = []
+        while True:
+            page = await self._get(params)
+            items.extend(page.get("items", []))
+            if not page.get("nextPageToken"):
+                return items
+            params = dict(params, pageToken = page["nextPageToken"])
@@ -0,0 +1,112 @@
+from schedule2calendar.date_math import DAY_MAP, ParseContext, convert_datetime, end_of_day_utc, soonest_weekday_delta, check_start_end
+from schedule2calendar.formats import register_format
+from schedule2calendar.models import Event, weekday_mask, stable_uid
+from schedule2calendar.telemetry import Stopwatch
+from datetime import datetime, timedelta
+from functools import lru_cache
+import unicodedata
+import html
+import re
+
+""" Ellucian Banner "Student Detail Schedule" pastes, used by many registrars.
+
+Each course is a "Title - DEPT 1234 - 001" line followed by a Scheduled Meeting Times table whose rows
+give type, time, days, place, date range and schedule type, separated by tabs (or runs of spaces once pasted).
+"""
+
+# An "Associated Term:" field, the meeting table heading or a course line, at the start of a line
+BANNER_PROBE = re.compile(r'^(?:Associated Term:|Scheduled Meeting Times)|^.+ - [A-Z]{2,5} \d{2,5}[A-Z]? - [A-Z0-9]{1,4}[ \t]*$', re.M)
+
+COURSE_RE = re.compile(r'^(?P<title>\S.*?) - (?P<dept>[A-Z]{2,5}) (?P<num>\d{2,5}[A-Z]?) - (?P<section>[A-Z0-9]{1,4})[ \t]*$', re.M)
+
+SEP = r'(?:\t|[ ]{2,})' # Table cells
+DATE = r'[A-Za-z]{3} \d{1,2}, \d{4}'
+ROW_RE = re.compile(
+    rf'^(?P<type>[A-Za-z][A-Za-z ]*?){SEP}'
+    rf'(?P<start>\d{{1,2}}:\d{{2}}) ?(?P<start_ampm>[ap]m) - (?P<end>\d{{1,2}}:\d{{2}}) ?(?P<end_ampm>[ap]m){SEP}'
+    rf'(?P<days>[MTWRFSU]{{1,7}}){SEP}'
+    rf'(?P<where>[^\t\n]*?){SEP}'
+    rf'(?P<first>{DATE}) - (?P<last>{DATE}){SEP}'
+    rf'(?P<kind>[A-Za-z][A-Za-z /&-]*?)(?:{SEP}|[ \t]*$)',
+    re.M | re.I,
+)
+
+def _meeting_type(row) -> str:
+    kind = f"{row.group('type')} {row.group('kind')}".lower()
+    if "exam" in kind:
+        return "Final Exam"
+    if "lecture" in kind:
+        return "Lecture"
+    return "Discussion/Lab"
+
+@lru_cache(maxsize = 1024)
+def _date(text):
+    return datetime.strptime(text, "%b %d, %Y").date()
+
+@register_format("banner", BANNER_PROBE, priority = 50)
+def parse_banner_schedule(raw_text, ctx = None, normalized = False) -> list:
+    """Events from a Banner detail schedule; meeting rows carry their own date ranges, so no term table is needed."""
+    if ctx is None:
+        ctx = ParseContext()
+
+    text = raw_text
+    if not normalized:
+        text = html.unescape(text)
+        text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n")
+
+    events = []
+    date_math = Stopwatch("date_math")
+    courses = list(COURSE_RE.finditer(text))
+    for index, course in enumerate(courses):
+        block_end = courses[index + 1].start() if index + 1 < len(courses) else len(text)
+        course_code = f"{course.group('dept')} {course.group('num')}"
+        course_name = f"{course_code} - {course.group('title').strip()}"
+
+        type_counts = {}
+        for row in ROW_RE.finditer(text, course.end(), block_end):
+            meeting_type = _meeting_type(row)
+            ordinal = type_counts[meeting_type] = type_counts.get(meeting_type, 0) + 1
+            days = row.group("days").upper()
+
+            with date_math:
+                first, last = _date(row.group("first")), _date(row.group("last"))
+                term = last.strftime("%Y-%m")
+
+                # From the section's first meeting, so a series keeps its DTSTART however often it's parsed
+                anchor = first
+                if meeting_type != "Final Exam":
+                    anchor += timedelta(days = soonest_weekday_delta(days, anchor.weekday()))
+                start = convert_datetime(row.group("start"), row.group("start_ampm"), anchor, ctx)
+                end = convert_datetime(row.group("end"), row.group("end_ampm"), anchor, ctx)
+                start, end = check_start_end(start, end)
+
+            if meeting_type == "Final Exam":
+                events.append(Event(
+                    course = course_name,
+                    meeting_type = meeting_type,
+                    location = row.group("where").strip(),
+                    start = start,
+                    end = end,
+                    tz_name = ctx.tz_name,
+                    reminders = (60, 24 * 60),
+                    uid = stable_uid(course_code, meeting_type, ordinal, term),
+                    term = term,
+                ))
+                continue
+
+            events.append(Event(
+                course = course_name,
+                meeting_type = meeting_type,
+                location = row.group("where").strip(),
+                start = start,
+                end = end,
+                tz_name = ctx.tz_name,
+                weekdays = weekday_mask(DAY_MAP[day] for day in days),
+                until = end_of_day_utc(last, ctx.tz_name),
+                reminders = (60,),
+                uid = stable_uid(course_code, meeting_type, ordinal, term),
+                term = term,
+            ))
+
+    date_math.record()
+    return events
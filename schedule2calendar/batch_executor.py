@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from schedule2calendar.service_factory import authorized_http
+from googleapiclient.errors import HttpError
+from google.auth.exceptions import TransportError
+import http.client
+import threading
+import httplib2
+import random
+import time
+
+BATCH_LIMIT = 50 # Calendar API allows at most 50 calls per batch request
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# Failures to reach Google at all (timeouts, refused or dropped connections, DNS, token refresh), retried like a 503
+TRANSPORT_ERRORS = (OSError, http.client.HTTPException, httplib2.HttpLib2Error, TransportError)
+
+# Shared across calls so pool threads, and their keep-alive connections, are reused; one pool per size asked for
+_pools = {}
+_pool_lock = threading.Lock()
+
+def _get_pool(max_workers):
+    with _pool_lock:
+        if max_workers not in _pools:
+            _pools[max_workers] = ThreadPoolExecutor(max_workers = max_workers, thread_name_prefix = f"calendar-batch-{max_workers}")
+        return _pools[max_workers]
+
+def _is_retryable(exception) -> bool:
+    if isinstance(exception, TRANSPORT_ERRORS):
+        return True
+    if not isinstance(exception, HttpError):
+        return False
+    status = exception.resp.status
+    if status in RETRYABLE_STATUSES:
+        return True
+
+    # 403 is only transient when Google reports a rate limit
+    content = exception.content.decode("utf-8", "ignore") if isinstance(exception.content, bytes) else str(exception.content)
+    return status == 403 and "ratelimitexceeded" in content.lower()
+
+def _run_chunk(service, creds, chunk, max_retries, base_delay):
+    """Execute one chunk as a batch, retrying failed sub-requests with jittered exponential backoff."""
+    # httplib2 is not thread safe, so each pool thread uses its own authorized connection
+    http = authorized_http(creds)
+    results = {}
+    pending = list(chunk)
+
+    for attempt in range(max_retries + 1):
+        failures = {}
+        responses = {}
+
+        def callback(request_id, response, exception):
+            if exception is not None:
+                failures[request_id] = exception
+            else:
+                responses[request_id] = response
+
+        batch = service.new_batch_http_request(callback = callback)
+        for key, _, build_request in pending:
+            batch.add(build_request(), request_id = key)
+
+        try:
+            batch.execute(http = http)
+        except (HttpError, *TRANSPORT_ERRORS) as e:
+            # The whole batch was rejected or never got an answer, so every sub-request failed the same way
+            failures = {key: e for key, _, _ in pending}
+
+        retry = []
+        for key, label, build_request in pending:
+            exception = failures.get(key)
+            if exception is None:
+                results[key] = {"summary": label, "status": "ok", "attempts": attempt + 1}
+                response = responses.get(key)
+                if isinstance(response, dict) and "id" in response:
+                    results[key]["event_id"] = response["id"]
+            elif _is_retryable(exception) and attempt < max_retries:
+                retry.append((key, label, build_request))
+            else:
+                results[key] = {"summary": label, "status": "failed", "attempts": attempt + 1, "error": str(exception)}
+                if isinstance(exception, HttpError):
+                    results[key]["code"] = exception.resp.status
+
+        if not retry:
+            break
+
+        pending = retry
+        time.sleep(random.uniform(0, base_delay * (2 ** attempt)))
+
+    return results
+
+def execute_in_batches(service, creds, requests, chunk_size = BATCH_LIMIT, max_workers = 4, max_retries = 5, base_delay = 1.0, progress = None) -> list:
+    """Run (label, build_request) pairs as concurrent batches and return one result dict per request, in order.
+
+    Results carry the created or returned event's "event_id" on success, and the HTTP "code" on failure.
+
+    build_request() must return a fresh HttpRequest each time it's called so failed calls can be retried.
+    progress, if given, is called with each finished chunk's list of results.
+    """
+    if not requests:
+        return []
+
+    keyed = [(str(i), label, build_request) for i, (label, build_request) in enumerate(requests)]
+    chunk_size = min(chunk_size, BATCH_LIMIT)
+    chunks = [keyed[i:i + chunk_size] for i in range(0, len(keyed), chunk_size)]
+
+    pool = _get_pool(max_workers)
+    futures = [pool.submit(_run_chunk, service, creds, chunk, max_retries, base_delay) for chunk in chunks]
+
+    results = {}
+    for future in as_completed(futures):
+        chunk_results = future.result()
+        results.update(chunk_results)
+        if progress is not None:
+            progress(list(chunk_results.values()))
+
+    return [results[key] for key, _, _ in keyed]
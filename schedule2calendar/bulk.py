@@ -0,0 +1,121 @@
+from schedule2calendar.formats import parse_any
+from schedule2calendar.sanitize import clean_schedule
+from schedule2calendar.conflicts import find_conflicts
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import multiprocessing
+import threading
+import argparse
+import json
+import sys
+import os
+
+""" Parses many schedules at once (NDJSON in, NDJSON out) on a process pool with bounded memory """
+
+DEFAULT_MAX_LENGTH = 10000 # Per-schedule character limit for bulk input
+
+def parse_item(item, max_length = DEFAULT_MAX_LENGTH) -> dict:
+    """Sanitize, validate and parse one (id, schedule) pair. Runs inside a pool process."""
+    schedule_id, dirty_schedule = item
+    schedule, error = clean_schedule(dirty_schedule, max_length)
+    if error:
+        return {"id": schedule_id, "error": error}
+
+    try:
+        events = parse_any(schedule, normalized = True)
+        return {"id": schedule_id, "events": [event.to_api_body() for event in events], "conflicts": find_conflicts(events)}
+    except Exception as e:
+        return {"id": schedule_id, "error": f"Could not parse schedule: {e}"}
+
+def iter_ndjson_items(lines):
+    """Yield (id, schedule) pairs from NDJSON lines like {"id": ..., "schedule": "..."}.
+
+    Lines that aren't valid JSON objects yield (id, None) so they are reported rather than dropped.
+    """
+    for line_number, line in enumerate(lines, start = 1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "replace")
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+
+        if not isinstance(record, dict):
+            yield line_number, None
+            continue
+
+        yield record.get("id", line_number), record.get("schedule")
+
+def iter_upload_items(files, max_length = DEFAULT_MAX_LENGTH):
+    """Yield (id, schedule) pairs from uploaded files: NDJSON files hold many schedules, anything else holds one."""
+    for upload in files:
+        name = upload.filename or "upload"
+        if name.endswith((".ndjson", ".jsonl")):
+            for schedule_id, schedule in iter_ndjson_items(upload.stream):
+                yield f"{name}:{schedule_id}", schedule
+        else:
+            # The limit applies once markup is stripped, so hand clean_schedule the raw text up to its own cutoff
+            # (four times the limit); one character more still gets an oversized file rejected unread
+            raw_limit = max_length * 4 + 1
+            content = upload.stream.read(raw_limit * 4).decode("utf-8", "replace") # At most four bytes a character
+            yield name, content[:raw_limit]
+
+def stream_parse(items, pool, max_length = DEFAULT_MAX_LENGTH, window = None):
+    """Parse items on the pool, yielding results in input order with at most `window` schedules in flight."""
+    if window is None:
+        window = 2 * (os.cpu_count() or 1)
+
+    in_flight = deque()
+    for item in items:
+        in_flight.append(pool.submit(parse_item, item, max_length))
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+
+    while in_flight:
+        yield in_flight.popleft().result()
+
+def iter_ndjson(results):
+    for result in results:
+        yield json.dumps(result) + "\n"
+
+# One pool per process, created on first use. Spawned rather than forked since web workers are threaded.
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool(max_workers = None) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers = max_workers, mp_context = multiprocessing.get_context("spawn"))
+        return _pool
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Parse NDJSON schedules ({\"id\", \"schedule\"} per line) into NDJSON events.")
+    parser.add_argument("input", nargs = "?", default = "-", help = "NDJSON file to read, or - for stdin")
+    parser.add_argument("-o", "--output", default = "-", help = "File to write NDJSON results to, or - for stdout")
+    parser.add_argument("-w", "--workers", type = int, default = None, help = "Parser processes (defaults to the CPU count)")
+    parser.add_argument("--max-length", type = int, default = DEFAULT_MAX_LENGTH, help = "Per-schedule character limit")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding = "utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding = "utf-8")
+
+    try:
+        with ProcessPoolExecutor(max_workers = args.workers) as pool:
+            window = 2 * (args.workers or os.cpu_count() or 1)
+            for line in iter_ndjson(stream_parse(iter_ndjson_items(source), pool, args.max_length, window)):
+                sink.write(line)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+from schedule2calendar.event_index import (event_record, created_records, created_event_ids, record_created, forget_created, find_event_by_uid,
+                                           iter_events, is_legacy_event, legacy_event_ids, record_legacy_events, forget_legacy_events,
+                                           LEGACY_FIELDS, LEGACY_WINDOW)
+from schedule2calendar.batch_executor import execute_in_batches
+from schedule2calendar.validate import validate_ongoing_event
+from schedule2calendar.service_factory import calendar_service
+from schedule2calendar.telemetry import timed, EVENTS
+
+from flask import current_app
+from datetime import datetime, timezone
+import asyncio
+import logging
+
+""" Calendar writes shared by the web routes and the background job worker.
+
+Each operation is a coroutine that describes its writes as data, (label, events() method, params),
+and hands them to a writer: BatchWriter runs them as batch requests on a thread, AsyncWriter
+(async_calendar) multiplexes them over pooled connections. Redis reads and writes also run on a
+thread, so neither blocks the event loop other jobs share.
+"""
+
+log = logging.getLogger(__name__)
+
+GONE_STATUSES = {404, 410} # Deleting an event that is already gone
+
+def import_write(event):
+    return (event.summary, "import_", {"body": event.to_api_body()})
+
+def patch_write(event, record):
+    """Patch a stored event to match event; a series keeps its stored DTSTART unless its time of day changed."""
+    body = {key: value for key, value in event.to_api_body().items() if key != "iCalUID"} # Identity never changes
+    if event.weekdays and record.get("times") == event.times():
+        # Moving the start would drop the meetings already held from the calendar
+        del body["start"], body["end"]
+    return (event.summary, "patch", {"eventId": record["id"], "body": body})
+
+def delete_write(label, event_id):
+    return (label, "delete", {"eventId": event_id})
+
+class BatchWriter():
+    """Runs writes as concurrent, retried batch requests using the app's batch settings, on a thread off the event loop."""
+
+    def __init__(self, creds):
+        self.creds = creds
+        self.service = calendar_service(creds)
+
+    async def run(self, writes, progress = None) -> list:
+        requests = [
+            (label, lambda method = method, params = params: getattr(self.service.events(), method)(calendarId = 'primary', **params))
+            for label, method, params in writes
+        ]
+        cfg = current_app.config
+        with timed("batch_execute"):
+            return await asyncio.to_thread(
+                execute_in_batches,
+                self.service, self.creds, requests,
+                max_workers = cfg["BATCH_MAX_WORKERS"],
+                max_retries = cfg["BATCH_MAX_RETRIES"],
+                progress = progress,
+            )
+
+    async def find_event_by_uid(self, uid):
+        return await asyncio.to_thread(find_event_by_uid, self.service, uid, num_retries = current_app.config["BATCH_MAX_RETRIES"])
+
+    async def list_events(self, **params) -> list:
+        num_retries = current_app.config["BATCH_MAX_RETRIES"]
+        return await asyncio.to_thread(lambda: list(iter_events(self.service, num_retries = num_retries, **params)))
+
+async def add_events(writer, email, events, progress = None) -> dict:
+    """Import events that haven't ended. Imports are keyed by iCalUID, so repeating one updates rather than duplicates."""
+    imported = []
+    with timed("validate"):
+        for event in events:
+            ongoing = validate_ongoing_event(event)
+            if not ongoing:
+                log.debug("Skipping event as it has already passed", extra = {"fields": {"summary": event.summary}})
+            else:
+                imported.append(event)
+    EVENTS.labels("skipped").inc(len(events) - len(imported))
+
+    if not imported:
+        return {"message": "No events were added; all events have already passed.", "results": []}
+
+    results = await writer.run([import_write(event) for event in imported], progress)
+    await asyncio.to_thread(record_created, email, {
+        event.uid: event_record(event, result["event_id"])
+        for event, result in zip(imported, results)
+        if result["status"] == "ok" and "event_id" in result
+    })
+
+    added_count = sum(1 for result in results if result["status"] == "ok")
+    failed_count = len(results) - added_count
+    EVENTS.labels("added").inc(added_count)
+    EVENTS.labels("failed").inc(failed_count)
+    log.info("Batch import complete", extra = {"fields": {"added": added_count, "failed": failed_count}})
+
+    message = f"{added_count} events added successfully!"
+    if failed_count:
+        message += f" {failed_count} events could not be added."
+    return {"message": message, "results": results}
+
+async def legacy_targets(writer, email, summaries) -> dict:
+    """{summary: [event id]} of events written before events had uids; each user's calendar is scanned for them once."""
+    legacy = await asyncio.to_thread(legacy_event_ids, email)
+    if legacy is None:
+        time_min = (datetime.now(timezone.utc) - LEGACY_WINDOW).isoformat()
+        items = await writer.list_events(fields = LEGACY_FIELDS, timeMin = time_min, maxResults = 2500)
+        legacy = await asyncio.to_thread(record_legacy_events, email, [item for item in items if is_legacy_event(item)])
+        log.info("Scanned calendar for legacy events", extra = {"fields": {"scanned": len(items), "legacy": sum(map(len, legacy.values()))}})
+    return {summary: legacy[summary] for summary in summaries if summary in legacy}
+
+def _removed(result) -> bool:
+    # Already-deleted events count as removed
+    return result["status"] == "ok" or result.get("code") in GONE_STATUSES
+
+async def delete_events(writer, email, events, progress = None) -> dict:
+    """Delete exactly the calendar events this app created for the parsed schedule."""
+    summaries = {event.uid: event.summary for event in events if event.uid}
+
+    # Ids recorded when the events were written; anything missing is looked up by iCalUID
+    targets = await asyncio.to_thread(created_event_ids, email, summaries)
+    for uid in summaries.keys() - targets.keys():
+        event_id = await writer.find_event_by_uid(uid)
+        if event_id:
+            targets[uid] = event_id
+
+    # Whatever is still missing may predate uids, and is matched by summary instead
+    unresolved = {summaries[uid] for uid in summaries.keys() - targets.keys()}
+    legacy = await legacy_targets(writer, email, unresolved) if unresolved else {}
+    legacy_writes = [(summary, event_id) for summary, event_ids in legacy.items() for event_id in event_ids]
+
+    uids = list(targets)
+    writes = [delete_write(summaries[uid], targets[uid]) for uid in uids]
+    writes += [delete_write(summary, event_id) for summary, event_id in legacy_writes]
+    results = await writer.run(writes, progress)
+
+    removed = [uid for uid, result in zip(uids, results) if _removed(result)]
+    await asyncio.to_thread(forget_created, email, removed)
+    kept = {summary for (summary, _), result in zip(legacy_writes, results[len(uids):]) if not _removed(result)}
+    await asyncio.to_thread(forget_legacy_events, email, legacy.keys() - kept)
+
+    deleted_count = sum(1 for result in results if result["status"] == "ok")
+    failed_count = sum(1 for result in results if not _removed(result))
+    EVENTS.labels("deleted").inc(deleted_count)
+    EVENTS.labels("failed").inc(failed_count)
+    log.info("Batch deletion complete", extra = {"fields": {"deleted": deleted_count, "legacy": len(legacy_writes), "failed": failed_count}})
+    return {"message": f"Deleted {deleted_count} events from Google Calendar!", "results": results}
+
+def plan_sync(email, events) -> dict:
+    """Diff parsed events against what we wrote for the user last time, without calling the Calendar API.
+
+    Returns {"insert": [event], "patch": [(event, record)], "delete": [(uid, record)], "unchanged": [event]}.
+    Only events from the schedule's own terms are candidates for deletion, so other terms are left alone.
+    """
+    records = created_records(email)
+    terms = {event.term for event in events}
+    plan = {"insert": [], "patch": [], "delete": [], "unchanged": []}
+
+    for event in events:
+        record = records.get(event.uid)
+        if record is None:
+            # Past events aren't added, as in add_events
+            if validate_ongoing_event(event):
+                plan["insert"].append(event)
+        elif record["fingerprint"] != event.fingerprint():
+            plan["patch"].append((event, record))
+        else:
+            plan["unchanged"].append(event)
+
+    uids = {event.uid for event in events}
+    plan["delete"] = [(uid, record) for uid, record in records.items() if uid not in uids and record.get("term") in terms]
+    return plan
+
+def describe_plan(plan) -> dict:
+    """JSON-safe summary of a sync plan, for dry runs."""
+    return {
+        "insert": [event.summary for event in plan["insert"]],
+        "patch": [event.summary for event, _ in plan["patch"]],
+        "delete": [record.get("summary", uid) for uid, record in plan["delete"]],
+        "unchanged": len(plan["unchanged"]),
+    }
+
+async def sync_events(writer, email, events, progress = None) -> dict:
+    """Bring the calendar in line with the parsed schedule, writing only the meetings that changed."""
+    plan = await asyncio.to_thread(plan_sync, email, events)
+    if not (plan["insert"] or plan["patch"] or plan["delete"]):
+        return {"message": "Your calendar is already up to date.", "results": []}
+
+    writes = [import_write(event) for event in plan["insert"]]
+    writes += [patch_write(event, record) for event, record in plan["patch"]]
+    writes += [delete_write(record.get("summary", uid), record["id"]) for uid, record in plan["delete"]]
+    results = await writer.run(writes, progress)
+    inserted = results[:len(plan["insert"])]
+    patched = results[len(plan["insert"]):len(plan["insert"]) + len(plan["patch"])]
+    deleted = results[len(plan["insert"]) + len(plan["patch"]):]
+
+    written = {}
+    failed = []
+    added_count = updated_count = 0
+    for event, result in zip(plan["insert"], inserted):
+        if result["status"] == "ok" and "event_id" in result:
+            written[event.uid] = event_record(event, result["event_id"])
+            added_count += 1
+        else:
+            failed.append(result)
+
+    # Events removed from the calendar by hand can't be patched; import them again instead
+    missing = []
+    for index, ((event, record), result) in enumerate(zip(plan["patch"], patched), start = len(inserted)):
+        if result["status"] == "ok":
+            written[event.uid] = event_record(event, record["id"])
+            updated_count += 1
+        elif result.get("code") in GONE_STATUSES:
+            missing.append((index, event))
+        else:
+            failed.append(result)
+
+    if missing:
+        reimported = await writer.run([import_write(event) for _, event in missing], progress)
+        for (index, event), result in zip(missing, reimported):
+            results[index] = result # The import stands in for the patch that found the event gone
+            if result["status"] == "ok" and "event_id" in result:
+                written[event.uid] = event_record(event, result["event_id"])
+                updated_count += 1
+            else:
+                failed.append(result)
+
+    removed = []
+    for (uid, _), result in zip(plan["delete"], deleted):
+        if _removed(result):
+            removed.append(uid)
+        else:
+            failed.append(result)
+    deleted_count = sum(1 for result in deleted if result["status"] == "ok")
+
+    await asyncio.to_thread(record_created, email, written)
+    await asyncio.to_thread(forget_created, email, removed)
+    EVENTS.labels("added").inc(added_count)
+    EVENTS.labels("updated").inc(updated_count)
+    EVENTS.labels("deleted").inc(deleted_count)
+    EVENTS.labels("failed").inc(len(failed))
+    log.info("Sync complete", extra = {"fields": {
+        "added": added_count, "updated": updated_count, "deleted": deleted_count, "failed": len(failed),
+    }})
+
+    message = f"Calendar updated: {added_count} added, {updated_count} changed, {len(removed)} removed."
+    if failed:
+        message += f" {len(failed)} changes could not be applied."
+    return {"message": message, "results": results}
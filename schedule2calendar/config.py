@@ -19,6 +19,7 @@ class Config():
     SESSION_PERMANENT = True
     SESSION_USE_SIGNER = True
     SESSION_KEY_PREFIX = "flask_session:"
+    SESSION_REFRESH_INTERVAL = int(os.getenv("SESSION_REFRESH_INTERVAL", 60 * 60)) # Seconds between expiry rewrites of an unchanged session
 
     REDIS_HOST = os.getenv("REDIS_HOST", "localHost") # Use local host instead of Redis
     REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
@@ -27,6 +28,13 @@ class Config():
     REDIS_DB = int(os.getenv("REDIS_DB", "0"))
     REDIS_SCHEME = "rediss" if REDIS_USE_SSL else "redis"
 
+    # Connection pool shared by the app, sessions and the rate limiter
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 20)) # Per process; cover the server's threads plus the worker's
+    REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5)) # Seconds to wait for a free connection
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 10)) # Seconds per command; longer than the worker's 5 second BLMOVE
+    REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 10))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)) # Seconds idle before a connection is checked
+
     # Flask-Limiter (reads these via init_app)
     # Allow direct override via env; otherwise build from parts
     RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI")
@@ -35,11 +43,55 @@ class Config():
         _AUTH = f":{REDIS_PASSWORD}@" if REDIS_PASSWORD else ""
         RATELIMIT_STORAGE_URI = f"{_SCHEME}://{_AUTH}{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
         
-    RATELIMIT_STORAGE_OPTIONS = {"socket_connect_timeout": 30}
-    RATELIMIT_STRATEGY = "fixed-window"
+    RATELIMIT_STORAGE_OPTIONS = {} # create_app adds the shared connection pool
+    RATELIMIT_STRATEGY = os.getenv("RATELIMIT_STRATEGY", "moving-window") # Checked and counted by one Lua script per limit
     RATELIMIT_DEFAULT = "200 per day"
     RATELIMIT_HEADERS_ENABLED = True
+    RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "true").lower() == "true" # Turn off for local load tests
+
+    # Parsed schedule cache (Redis, with a per-process LRU in front)
+    PARSE_CACHE_TTL = int(os.getenv("PARSE_CACHE_TTL", 60 * 60)) # Seconds
+    PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", 10000))
+    PARSE_CACHE_LOCAL_SIZE = int(os.getenv("PARSE_CACHE_LOCAL_SIZE", 256))
+
+    # Rendered preview fragments (keyed by ETag) and per-user calendar conflict checks
+    PREVIEW_CACHE_TTL = int(os.getenv("PREVIEW_CACHE_TTL", 60 * 60)) # Seconds
+    CALENDAR_CONFLICT_TTL = int(os.getenv("CALENDAR_CONFLICT_TTL", 5 * 60)) # Seconds
+
+    # Calendar batch writes
+    BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", 4)) # Concurrent batch requests per write
+    BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", 5)) # Retries for rate limited or 5xx sub-requests, and batches that hit a network error
+
+    # Pasted schedules; sanitizing is linear, so long multi-term pastes are fine
+    SCHEDULE_MAX_LENGTH = int(os.getenv("SCHEDULE_MAX_LENGTH", 10000)) # Characters after markup is stripped
+    SCHEDULE_TIMEZONE = os.getenv("SCHEDULE_TIMEZONE", "America/Los_Angeles") # IANA zone meeting times are read in
+    SCHEDULE_PARSER_MODULES = tuple(filter(None, os.getenv("SCHEDULE_PARSER_MODULES", "schedule2calendar.schedule_handler,schedule2calendar.banner_parser").split(","))) # Modules that register paste formats
+    TERM_CALENDAR_PATH = os.getenv("TERM_CALENDAR_PATH", os.path.join(os.path.dirname(__file__), "data", "terms.json")) # Empty to use weekday rules only
+
+    # Bulk schedule parsing
+    BULK_MAX_SCHEDULE_LENGTH = int(os.getenv("BULK_MAX_SCHEDULE_LENGTH", 10000))
+    BULK_PROCESS_WORKERS = int(os.getenv("BULK_PROCESS_WORKERS", 0)) or None # Defaults to the CPU count
+    BULK_API_TOKEN = os.getenv("BULK_API_TOKEN") # Lets scripts call /bulk-process with "Authorization: Bearer <token>"
+
+    # Calendar job worker: "sync" runs one job at a time; "async" multiplexes many jobs over pooled HTTP connections
+    WORKER_MODE = os.getenv("WORKER_MODE", "sync")
+    ASYNC_WORKER_CONCURRENCY = int(os.getenv("ASYNC_WORKER_CONCURRENCY", 50)) # Jobs in flight
+    ASYNC_REQUEST_CONCURRENCY = int(os.getenv("ASYNC_REQUEST_CONCURRENCY", 10)) # Calendar requests in flight per job
+    ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", 20)) # Shared pool; httpx pool bookkeeping grows with the square of its size
+    JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", 120)) # Seconds a claimed job may go without a heartbeat (one a second while it runs) before it's requeued
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3)) # Claims before a job that keeps stalling its worker is failed
+
+    # Observability: /metrics, logs, and per-stage request traces (Server-Timing header and a log line per request)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text") # "text" or "json"
+    TRACE_REQUESTS = os.getenv("TRACE_REQUESTS", "false").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN") # If set, /metrics requires "Authorization: Bearer <token>"
+    WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", 0)) # Port for the worker's metrics; 0 turns them off
+
+    # Seconds a worker may reuse its in-process credentials before rechecking Redis
+    CREDENTIAL_CACHE_TTL = int(os.getenv("CREDENTIAL_CACHE_TTL", 300))
 
     # Google OAUTH2
     SCOPES = os.getenv("SCOPES", "").split()
     GOOGLE_CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH")
+    GOOGLE_API_ROOT = os.getenv("GOOGLE_API_ROOT") # Defaults to https://www.googleapis.com/; set for local fakes
@@ -0,0 +1,143 @@
+from schedule2calendar.recurrence import expand
+from schedule2calendar.event_index import iter_events
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from bisect import bisect_left, bisect_right
+from heapq import heappush, heappop
+
+""" Finds overlapping meetings with a per-weekday interval index over the parsed schedule """
+
+WEEKDAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# Instance fields needed to place an existing calendar event on the week
+CALENDAR_FIELDS = "nextPageToken,items(id,summary,start,end,status,transparency)"
+
+def _minutes(dt) -> int:
+    return dt.hour * 60 + dt.minute
+
+def _first_on_weekday(day, weekday):
+    return day + timedelta(days = (weekday - day.weekday()) % 7)
+
+class ConflictIndex():
+    """Weekly interval index: (start minute, end minute, event position) slots bucketed by weekday and sorted.
+
+    Pairwise conflicts come from a sweep over each bucket; point lookups (an existing calendar
+    event on a given date) bisect the bucket, bounded by the longest slot on that weekday.
+    Recurrences are only expanded for slots whose times actually overlap.
+    """
+
+    def __init__(self, events, tz_name = None):
+        self.events = events
+        self.tz = ZoneInfo(tz_name or (events[0].tz_name if events else "UTC"))
+        self._meetings = {}
+        self.buckets = [[] for _ in WEEKDAY_NAMES]
+
+        for position, event in enumerate(events):
+            start = event.start.astimezone(self.tz)
+            start_minute = _minutes(start)
+            end_minute = start_minute + max(int((event.end - event.start).total_seconds() // 60), 1)
+            weekdays = event.weekdays or 1 << start.weekday()
+            for weekday in range(7):
+                if weekdays >> weekday & 1:
+                    self.buckets[weekday].append((start_minute, end_minute, position))
+
+        for bucket in self.buckets:
+            bucket.sort()
+        self.starts = [[slot[0] for slot in bucket] for bucket in self.buckets]
+        self.longest = [max((end - start for start, end, _ in bucket), default = 0) for bucket in self.buckets]
+
+    def meetings(self, position):
+        if position not in self._meetings:
+            self._meetings[position] = expand(self.events[position])
+        return self._meetings[position]
+
+    def _share_date(self, first, second, weekday) -> bool:
+        """Whether two events both meet on some date falling on weekday."""
+        first, second = self.meetings(first), self.meetings(second)
+        day = _first_on_weekday(max(first.start.date(), second.start.date()), weekday)
+        lasts = [last for last in (first.last_date, second.last_date) if last is not None]
+        return not lasts or day <= min(lasts)
+
+    def overlapping_pairs(self):
+        """Yield (position, position, weekday) for events whose meetings overlap on at least one date."""
+        for weekday, bucket in enumerate(self.buckets):
+            active = [] # Heap of (end, position) for slots still running
+            for start, end, position in bucket:
+                while active and active[0][0] <= start:
+                    heappop(active)
+                for _, other in active:
+                    if self._share_date(other, position, weekday):
+                        yield other, position, weekday
+                heappush(active, (end, position))
+
+    def at(self, when_start, when_end):
+        """Events that meet during [when_start, when_end)."""
+        when_start = when_start.astimezone(self.tz)
+        when_end = when_end.astimezone(self.tz)
+        weekday = when_start.weekday()
+
+        start_minute = _minutes(when_start)
+        if when_end.date() > when_start.date():
+            end_minute = 24 * 60 # Runs past midnight; the next day isn't checked
+        else:
+            end_minute = max(_minutes(when_end), start_minute + 1)
+
+        starts = self.starts[weekday]
+        low = bisect_left(starts, start_minute - self.longest[weekday] + 1)
+        high = bisect_right(starts, end_minute - 1)
+        day = when_start.date()
+        for _, end, position in self.buckets[weekday][low:high]:
+            if end > start_minute and self.meetings(position).occurs_on(day):
+                yield self.events[position]
+
+def _describe(event) -> str:
+    return f"{event.summary} ({event.start.strftime('%-I:%M %p')} - {event.end.strftime('%-I:%M %p')})"
+
+def find_conflicts(events) -> list:
+    """Return overlapping meeting pairs in the schedule as [{"summary", "other", "days"}]."""
+    pairs = {}
+    descriptions = {}
+    for first, second, weekday in ConflictIndex(events).overlapping_pairs():
+        if (first, second) not in pairs:
+            for position in (first, second):
+                if position not in descriptions:
+                    descriptions[position] = _describe(events[position])
+            pairs[first, second] = {"summary": descriptions[first], "other": descriptions[second], "days": []}
+        pairs[first, second]["days"].append(WEEKDAY_NAMES[weekday])
+
+    return list(pairs.values())
+
+def find_calendar_conflicts(service, events) -> list:
+    """Return clashes between the schedule and the user's existing Calendar events over the term.
+
+    Events that already carry one of the schedule's summaries are the schedule itself, and are skipped,
+    as are all-day and "free" (transparent) events.
+    """
+    if not events:
+        return []
+
+    index = ConflictIndex(events)
+    summaries = {event.summary for event in events}
+    time_min = min(event.start for event in events)
+    lasts = [expand(event).last_date for event in events]
+    last = max((day for day in lasts if day is not None), default = time_min.date())
+    time_max = datetime.combine(last + timedelta(days = 1), datetime.min.time(), tzinfo = index.tz)
+
+    conflicts = {}
+    for existing in iter_events(service, fields = CALENDAR_FIELDS, maxResults = 2500, singleEvents = True,
+                                orderBy = "startTime", timeMin = time_min.isoformat(), timeMax = time_max.isoformat()):
+        if existing.get("status") == "cancelled" or existing.get("transparency") == "transparent":
+            continue
+        if existing.get("summary") in summaries or "dateTime" not in existing.get("start", {}):
+            continue
+
+        start = datetime.fromisoformat(existing["start"]["dateTime"])
+        end = datetime.fromisoformat(existing["end"]["dateTime"])
+        for event in index.at(start, end):
+            key = (id(event), existing.get("summary"))
+            if key not in conflicts:
+                conflicts[key] = {"summary": _describe(event), "other": existing.get("summary") or "(busy)", "dates": []}
+            conflicts[key]["dates"].append(start.astimezone(index.tz).strftime("%b %-d"))
+
+    return list(conflicts.values())
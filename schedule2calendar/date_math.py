@@ -1,100 +1,161 @@
-from datetime import datetime, timedelta
-from pytz import timezone
-
-def calc_recur(days, month, date):
+from schedule2calendar.terms import load_term_calendar
+from schedule2calendar.config import Config
+from datetime import datetime, date, time as dt_time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import logging
+
+log = logging.getLogger(__name__)
+
+# Map days to weekday numbers
+DAY_MAP = {"M": 0, "T": 1, "W": 2, "R": 3, "F": 4, "S": 5, "U": 6}
+
+WEEKDAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+class ScheduleDateError(ValueError):
+    """A weekly meeting whose dates can't be bounded, shown to the user as a preview error rather than written."""
+
+class ParseContext():
+    """Reference date, timezone and term calendar fixed once per parse so every meeting agrees on "today"."""
+
+    def __init__(self, now = None, tz_name = None, terms = None):
+        self.tz_name = tz_name or Config.SCHEDULE_TIMEZONE
+        self.tz = ZoneInfo(self.tz_name)
+        self.now = now or datetime.now(self.tz)
+        self.today = self.now.date()
+        self.year = self.today.year
+        self.weekday = self.today.weekday()  # 0 = Monday, 6 = Sunday
+        self.terms = terms if terms is not None else load_term_calendar(Config.TERM_CALENDAR_PATH)
+
+def resolve_final_date(wday, month, date_str, ctx = None) -> date:
+    """Date of a final given as "Mon. Dec 8": the year that matches the weekday and a known term, nearest today.
+
+    A December final pasted in January resolves to the December just gone, and a March final pasted in
+    December to the coming March.
+    """
+    if ctx is None:
+        ctx = ParseContext()
+
+    return _final_date(wday[:3].lower() if wday else None, convert_month(month), int(date_str), ctx.today, ctx.terms)
+
+@lru_cache(maxsize = 1024)
+def _final_date(wday, month, day_of_month, today, terms):
+    weekday = WEEKDAY_NAMES.index(wday) if wday in WEEKDAY_NAMES else None
+
+    candidates = []
+    for year in (today.year - 1, today.year, today.year + 1):
+        try:
+            day = date(year, int(month), day_of_month)
+        except ValueError:
+            continue # Feb 29 outside a leap year
+        rank = (weekday is not None and day.weekday() != weekday, terms.term_on(day) is None, abs((day - today).days))
+        candidates.append((rank, day))
+
+    if not candidates:
+        raise ValueError(f"Invalid final exam date: {month}/{day_of_month}")
+    return min(candidates)[1]
+
+def course_term(final_day, ctx):
+    """The term a course belongs to: the one its final falls in, or without a final the current or next term."""
+    term = ctx.terms.term_on(final_day) if final_day is not None else ctx.terms.current_or_next(ctx.today)
+    if term is None:
+        # Outside the term calendar meetings are dated from today and the final alone; it likely needs a new year
+        log.warning("No term in the term calendar covers this course", extra = {"fields": {
+            "final": final_day.isoformat() if final_day else None, "today": ctx.today.isoformat(),
+        }})
+    return term
+
+def meeting_dates(schedule_days, term, final_day = None, ctx = None) -> tuple:
+    """(first meeting date, UTC UNTIL or None, holiday dates to exclude) for a weekly meeting.
+
+    Within a known term: the term's first and last instruction days on a meeting day, and its holidays in
+    between. The series starts with the term, not today, so parsing it again mid-term gives the same DTSTART
+    and rewriting it keeps the meetings already held. Otherwise the next meeting day from today, and the last
+    meeting day of the week before the final. Raises ScheduleDateError when that leaves no end (no final) or
+    ends before it starts, rather than writing a series that repeats forever or never occurs.
+    """
+    if ctx is None:
+        ctx = ParseContext()
+
+    if term is not None:
+        dates = _term_meeting_dates(term, schedule_days, ctx.tz_name)
+        if dates is not None:
+            return dates
+
+    if final_day is None:
+        raise ScheduleDateError("it has no final exam and no known term, so its meetings would repeat forever")
+
+    first = ctx.today + timedelta(days = soonest_weekday_delta(schedule_days, ctx.weekday))
+    last = _last_day_before_final(schedule_days, final_day)
+    if last < first:
+        raise ScheduleDateError(f"its final exam ({final_day:%b %d, %Y}) comes before its next meeting and no known term covers it")
+    return first, end_of_day_utc(last, ctx.tz_name), ()
+
+@lru_cache(maxsize = 1024)
+def _term_meeting_dates(term, schedule_days, tz_name):
+    weekdays = sorted({DAY_MAP[day] for day in schedule_days if day in DAY_MAP})
+    last = term.last_meeting(weekdays)
+    if last is None:
+        return None
+    first = term.first_meeting(weekdays)
+    return first, end_of_day_utc(last, tz_name), term.holidays_between(weekdays, first, last)
+
+@lru_cache(maxsize = 1024)
+def _last_day_before_final(days, final_day):
     # SETS END DATE TO LAST OCCURING SCHEDULE DAY (i.e. in MWF, find last occuring of the three) FOR WEEK PRIOR TO FINAL DAY
-    current_year = datetime.now().year
-    datetime_str = f"{current_year}-{month}-{date}"
-    end = datetime.strptime(datetime_str, "%Y-%b-%d")
-
-    # Map days to weekday numbers
-    day_map = {"M": 0, "T": 1, "W": 2, "R": 3, "F": 4}
-    schedule_weekdays = [day_map[day] for day in days]  # Convert days to weekday numbers
-
-    # Find the last day of the week prior to the final day
-    final_week = end - timedelta(days = end.weekday() + 1)  # Previous Sunday
-    last_occurrence = schedule_weekdays[-1]
-
-    loop_check = 0
-
-    while (final_week.weekday() != last_occurrence):
-        final_week -= timedelta(days = 1)
-        loop_check += 1
-        if (loop_check > 31):
-            raise ValueError("Infinite loop detected while searching for the last occurrence of the schedule.")
-
-    # Format last occurrence date for RRULE
-    until_date = final_week.strftime("%Y%m%dT235959Z")
-
-    # Generate RRULE
-    recurrence_days = ",".join([convert_day(day) for day in days])
-    rrule = f"RRULE:FREQ=WEEKLY;BYDAY={recurrence_days};UNTIL={until_date}"
-
-    return rrule
-
-# UTC for Universal, America/Los_Angeles for PST
-# USE Z for UTC time zone, converts to ISO 8601 - EXAMPLE FORMAT: {"dateTime": "2025-01-06T12:10:00Z", "timeZone": "UTC"}
-def convert_datetime(time, apm = None, month = None, date = None, schedule_days = None):
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    pacific = timezone('America/Los_Angeles')
+    last_occurrence = max(DAY_MAP[day] for day in days if day in DAY_MAP)
+    previous_sunday = final_day - timedelta(days = final_day.weekday() + 1)
+    return previous_sunday - timedelta(days = (previous_sunday.weekday() - last_occurrence) % 7)
+
+@lru_cache(maxsize = 1024)
+def end_of_day_utc(day, tz_name) -> datetime:
+    """The last second of a local date, in UTC (the RRULE UNTIL)."""
+    local = datetime.combine(day, dt_time(23, 59, 59), tzinfo = ZoneInfo(tz_name))
+    return local.astimezone(timezone.utc)
+
+@lru_cache(maxsize = 256)
+def soonest_weekday_delta(schedule_days, current_weekday):
+    """Days from current_weekday until the soonest occurring day in schedule_days (i.e. in MWF, find soonest of the three)."""
+    schedule_weekdays = [DAY_MAP[day] for day in schedule_days if day in DAY_MAP]
+
+    min_delta = float('inf')
+    for day in schedule_weekdays:
+        delta = (day - current_weekday) % 7  # Days until the next occurrence
+        if delta < min_delta:
+            min_delta = delta
+
+    return min_delta
+
+# Builds a timezone-aware datetime on a local date (today by default) in the context's zone
+def convert_datetime(time, apm = None, day = None, ctx = None) -> datetime:
+    if ctx is None:
+        ctx = ParseContext()
 
     if apm != None:
         time = f"{time}{apm.lower()}"
 
-    if month is None:
-        month = current_month
-    else:
-        month = convert_month(month)
-
-    # SETS DATE TO SOONEST OCCURING SCHEDULE DAY (i.e. in MWF, find soonest occuring of the three)
-    if date is None and schedule_days:
-        # Current date and weekday
-        today = datetime.now()
-        current_weekday = today.weekday()  # 0 = Monday, 6 = Sunday
-
-        # Map schedule days to weekday numbers
-        day_map = {"M": 0, "T": 1, "W": 2, "R": 3, "F": 4}
-        schedule_weekdays = [day_map[day] for day in schedule_days]
-
-        # Find the soonest occurring day
-        min_delta = float('inf')
-        for day in schedule_weekdays:
-            delta = (day - current_weekday) % 7  # Days until the next occurrence
-            if delta < min_delta:
-                min_delta = delta
+    return _localize(day or ctx.today, time, ctx.tz_name)
 
-        # Set date to the soonest occurrence
-        soonest_date = today + timedelta(days = min_delta)
-        date = soonest_date.day
+@lru_cache(maxsize = 1024)
+def _localize(day, time, tz_name):
+    clock = datetime.strptime(time, "%I:%M%p").time()
 
-    # Combine into a full datetime string and parse
-    datetime_str = f"{current_year}-{month}-{date} {time}"
-    naive_datetime = datetime.strptime(datetime_str, "%Y-%m-%d %I:%M%p")
-    #datetime_obj = datetime.strptime(datetime_str, "%Y-%m-%d %I:%M%p")# + timedelta(hours=8) # Only use the timedelta for UTC
-
-    # Convert to ISO 8601
-    local_datetime = pacific.localize(naive_datetime, is_dst=None)
-    #iso_datetime = datetime_obj.strftime("%Y-%m-%dT%H:%M:%S-08:00") #replace -08:00 with %Z for UTC
-
-    return local_datetime.isoformat()
+    # Wall-clock time in the zone; a time skipped or repeated by a DST change resolves as zoneinfo's fold=0
+    return datetime.combine(day, clock, tzinfo = ZoneInfo(tz_name))
 
+@lru_cache(maxsize = None)
 def convert_month(month):
     month_map = {"Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04", "May": "05", "Jun": "06", "Jul": "07", "Aug": "08", "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12"}
-    return month_map[month]
+    return month_map[month[:3].capitalize()]
 
+@lru_cache(maxsize = None)
 def convert_day(day):
-    day_map = { "M": "MO", "T": "TU", "W": "WE", "R": "TH", "F": "FR"}
+    day_map = { "M": "MO", "T": "TU", "W": "WE", "R": "TH", "F": "FR", "S": "SA", "U": "SU"}
     return day_map[day]
 
-def check_start_end(start_iso, end_iso):
-    # Parse ISO 8601 times into datetime objects
-    start_time = datetime.fromisoformat(start_iso)
-    end_time = datetime.fromisoformat(end_iso)
-
+def check_start_end(start_time, end_time):
     # Adjust if the start time is later than the end time (e.g., PM -> AM issue)
     if start_time > end_time:
         start_time -= timedelta(hours=12)
 
-    # Return the adjusted times in ISO 8601 format
-    return start_time.isoformat(), end_time.isoformat()
\ No newline at end of file
+    return start_time, end_time
@@ -0,0 +1,158 @@
+from schedule2calendar.telemetry import timed
+from schedule2calendar.models import UID_PROPERTY
+from redis.exceptions import RedisError
+from flask import current_app
+from datetime import timedelta
+import logging
+import json
+import re
+
+""" Tracks the calendar events this app created for each user, by iCalUID, so writes never have to scan the calendar """
+
+log = logging.getLogger(__name__)
+
+INDEX_TTL = int(timedelta(days = 365).total_seconds())
+
+def _index_key(email):
+    return f"user:{email}:created_events"
+
+def _legacy_key(email):
+    return f"user:{email}:legacy_events"
+
+# Only the fields lookups need, so pages stay small
+EVENT_FIELDS = "id,summary,recurringEventId,iCalUID,status"
+PAGE_FIELDS = f"nextPageToken,items({EVENT_FIELDS})"
+
+# Events written before events carried our uid are matched by summary, as the old summary scan did
+LEGACY_SUMMARY_RE = re.compile(r'^[A-Z]{2,5} \d{2,5}[A-Z]? - .+(?: \((?:Lecture|Discussion/Lab)\)| Final Exam)$')
+LEGACY_WINDOW = timedelta(days = 180) # How far back the old summary scan looked
+LEGACY_FIELDS = "nextPageToken,items(id,summary,status,extendedProperties)"
+LEGACY_SCANNED = "__scanned__" # Field marking a user's calendar as already scanned
+
+def iter_event_pages(service, fields = PAGE_FIELDS, num_retries = 0, **params):
+    """Yield each page of events().list lazily, following nextPageToken."""
+    page_token = None
+    while True:
+        with timed("google_list"):
+            page = (service.events().list(calendarId = 'primary', pageToken = page_token, fields = fields, **params)
+                    .execute(num_retries = num_retries))
+        yield page
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return
+
+def iter_events(service, **params):
+    """Yield events one at a time across every page."""
+    for page in iter_event_pages(service, **params):
+        yield from page.get("items", [])
+
+def event_record(event, event_id) -> dict:
+    """What we remember about an event we wrote: its calendar id, summary, term, time of day and a fingerprint of the body."""
+    return {"id": event_id, "summary": event.summary, "term": event.term, "times": event.times(), "fingerprint": event.fingerprint()}
+
+def created_records(email, uids = None) -> dict:
+    """Return {uid: record} for the given uids (or every event we created for the user)."""
+    r = current_app.extensions["redis_client"]
+    try:
+        if uids is None:
+            stored = r.hgetall(_index_key(email)).items()
+        else:
+            uids = list(uids)
+            stored = zip(uids, r.hmget(_index_key(email), uids)) if uids else []
+    except RedisError as e:
+        log.warning("Created event index unavailable", extra = {"fields": {"error": str(e)}})
+        return {}
+
+    return {
+        (uid.decode("utf-8") if isinstance(uid, bytes) else uid): json.loads(value)
+        for uid, value in stored
+        if value is not None
+    }
+
+def created_event_ids(email, uids) -> dict:
+    """Return {uid: event_id} for the given uids that we have recorded creating."""
+    return {uid: record["id"] for uid, record in created_records(email, uids).items()}
+
+def record_created(email, records):
+    """Remember {uid: record} (see event_record) for events we just wrote."""
+    if not records:
+        return
+
+    r = current_app.extensions["redis_client"]
+    try:
+        pipe = r.pipeline()
+        pipe.hset(_index_key(email), mapping = {uid: json.dumps(record) for uid, record in records.items()})
+        pipe.expire(_index_key(email), INDEX_TTL)
+        pipe.execute()
+    except RedisError as e:
+        log.warning("Failed to record created events", extra = {"fields": {"email": email, "error": str(e)}})
+
+def forget_created(email, uids):
+    uids = list(uids)
+    if not uids:
+        return
+
+    r = current_app.extensions["redis_client"]
+    try:
+        r.hdel(_index_key(email), *uids)
+    except RedisError as e:
+        log.warning("Failed to update created event index", extra = {"fields": {"email": email, "error": str(e)}})
+
+def find_event_by_uid(service, uid, num_retries = 0) -> str | None:
+    """Targeted lookup of one event's id by iCalUID, for events written before their ids were recorded.
+
+    num_retries retries rate limits, 5xx responses and connection errors with backoff, like batch calls.
+    """
+    with timed("google_list"):
+        page = service.events().list(calendarId = 'primary', iCalUID = uid, fields = "items(id,status)").execute(num_retries = num_retries)
+    for event in page.get("items", []):
+        if event.get("status") != "cancelled":
+            return event["id"]
+    return None
+
+def is_legacy_event(item) -> bool:
+    """An event in our summary format without our uid property: written before events had identities."""
+    if item.get("status") == "cancelled" or not LEGACY_SUMMARY_RE.match(item.get("summary", "")):
+        return False
+    return UID_PROPERTY not in item.get("extendedProperties", {}).get("private", {})
+
+def legacy_event_ids(email) -> dict | None:
+    """{summary: [event id]} found by the user's legacy scan, or None if their calendar hasn't been scanned."""
+    r = current_app.extensions["redis_client"]
+    try:
+        stored = r.hgetall(_legacy_key(email))
+    except RedisError as e:
+        log.warning("Legacy event index unavailable", extra = {"fields": {"error": str(e)}})
+        return None
+
+    if LEGACY_SCANNED.encode("utf-8") not in stored:
+        return None
+    return {summary.decode("utf-8"): json.loads(ids) for summary, ids in stored.items() if summary.decode("utf-8") != LEGACY_SCANNED}
+
+def record_legacy_events(email, items) -> dict:
+    """Remember the legacy events a scan found, so the calendar is only scanned once; returns {summary: [event id]}."""
+    legacy = {}
+    for item in items:
+        legacy.setdefault(item["summary"], []).append(item["id"])
+
+    r = current_app.extensions["redis_client"]
+    try:
+        pipe = r.pipeline()
+        pipe.delete(_legacy_key(email))
+        pipe.hset(_legacy_key(email), mapping = dict({summary: json.dumps(ids) for summary, ids in legacy.items()}, **{LEGACY_SCANNED: 1}))
+        pipe.expire(_legacy_key(email), INDEX_TTL)
+        pipe.execute()
+    except RedisError as e:
+        log.warning("Failed to record legacy events", extra = {"fields": {"email": email, "error": str(e)}})
+    return legacy
+
+def forget_legacy_events(email, summaries):
+    summaries = list(summaries)
+    if not summaries:
+        return
+
+    r = current_app.extensions["redis_client"]
+    try:
+        r.hdel(_legacy_key(email), *summaries)
+    except RedisError as e:
+        log.warning("Failed to update legacy event index", extra = {"fields": {"email": email, "error": str(e)}})
@@ -1,8 +1,7 @@
+from schedule2calendar.telemetry import count_rate_limited
 from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect
 from flask_limiter import Limiter
-from flask_session import Session
 
 csrf = CSRFProtect()
-limiter = Limiter(key_func = get_remote_address)
-session_ext = Session()
\ No newline at end of file
+limiter = Limiter(key_func = get_remote_address, on_breach = count_rate_limited)
\ No newline at end of file
@@ -1,7 +1,8 @@
-from datetime import datetime
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
 
 """ Formats pieces of an event so that they are more human readable """
-def format_recurrence(recurrence_list):
+def format_recurrence(recurrence_list, tz_name = None):
     if not recurrence_list:
         return ""
 
@@ -44,10 +45,12 @@ def format_recurrence(recurrence_list):
         # Unknown/less common—just show the raw rule
         return body
 
-    # Until date (UTC Z form)
+    # Until date (UTC Z form), shown as the local date of the last meeting when the event's zone is known
     if until:
         try:
             dt = datetime.strptime(until, "%Y%m%dT%H%M%SZ")
+            if tz_name:
+                dt = dt.replace(tzinfo = timezone.utc).astimezone(ZoneInfo(tz_name))
             pieces.append("until " + dt.strftime("%b %d, %Y"))
         except ValueError:
             # If it’s not in the usual Z format, just append as-is
@@ -55,10 +58,11 @@ def format_recurrence(recurrence_list):
 
     return " ".join(pieces)
 
-"""Convert Google Calendar datetime string to human readable AM/PM format."""
-def format_datetime(dt_str: str) -> str:
+"""Convert a datetime (or Google Calendar datetime string) to human readable AM/PM format."""
+def format_datetime(dt: datetime | str) -> str:
     try:
-        dt = datetime.fromisoformat(dt_str)
+        if isinstance(dt, str):
+            dt = datetime.fromisoformat(dt)
         return dt.strftime("%B %-d, %Y at %-I:%M %p")  # e.g. March 21, 2025 at 2:10 PM
     except Exception:
-        return dt_str
\ No newline at end of file
+        return str(dt)
\ No newline at end of file
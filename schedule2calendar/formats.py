@@ -0,0 +1,132 @@
+from schedule2calendar.telemetry import SCHEDULE_FORMATS
+from schedule2calendar.config import Config
+from flask import current_app, has_app_context
+from redis.exceptions import RedisError
+from datetime import datetime, timezone
+import importlib
+import threading
+import hashlib
+import logging
+import json
+import re
+
+""" Registry of registrar paste formats: cheap detection on the start of a paste, then one parser per paste.
+
+A format module registers a parser with @register_format. Parsers take (text, ctx = None, normalized = False)
+and return a list of Event, like schedule_handler.parse_schedule. Modules listed in SCHEDULE_PARSER_MODULES
+are imported on first use.
+"""
+
+log = logging.getLogger(__name__)
+
+PROBE_CHARS = 512 # Signatures are looked for in this much of the start of a paste
+UNMATCHED_KEY = "parse_unmatched" # Capped list of recent pastes no parser understood
+UNMATCHED_MAX = 500
+
+# Word characters folded to one letter each, so a recorded paste keeps its layout but not its contents
+SHAPE_LETTERS_RE = re.compile(r'[A-Za-z]')
+SHAPE_DIGITS_RE = re.compile(r'[0-9]')
+
+class ScheduleFormat():
+    """A named parser and the anchored signature that identifies its pastes."""
+
+    __slots__ = ("name", "probe", "parse", "priority")
+
+    def __init__(self, name, probe, parse, priority = 100):
+        self.name = name
+        self.probe = probe # Compiled regex; should anchor with ^ (re.M) so a miss fails fast
+        self.parse = parse
+        self.priority = priority # Lower runs first, in detection and in the fallback
+
+    def matches(self, head) -> bool:
+        return self.probe.search(head) is not None
+
+_formats = []
+_formats_lock = threading.Lock()
+_loaded = False
+
+def register_format(name, probe, priority = 100):
+    """Decorator registering a parser for pastes whose first PROBE_CHARS characters match probe."""
+    def decorator(parse):
+        with _formats_lock:
+            _formats[:] = [fmt for fmt in _formats if fmt.name != name]
+            _formats.append(ScheduleFormat(name, probe, parse, priority))
+            _formats.sort(key = lambda fmt: fmt.priority)
+        return parse
+    return decorator
+
+def registered_formats() -> list:
+    """Formats in priority order, importing SCHEDULE_PARSER_MODULES the first time."""
+    global _loaded
+    if not _loaded:
+        for module in Config.SCHEDULE_PARSER_MODULES:
+            importlib.import_module(module)
+        _loaded = True
+    return list(_formats)
+
+def detect_format(text):
+    """The first format, by priority, whose signature matches the start of text; None if none does."""
+    head = text[:PROBE_CHARS]
+    for fmt in registered_formats():
+        if fmt.matches(head):
+            return fmt
+    return None
+
+def parse_any(text, ctx = None, normalized = False) -> list:
+    """Parse a paste with the format detected from its start.
+
+    If no signature matches, or the detected parser finds nothing, the other parsers are tried in
+    priority order. A paste none of them understand is recorded (see record_unmatched) and gives [].
+    """
+    fmt = detect_format(text)
+    if fmt is not None:
+        events = fmt.parse(text, ctx = ctx, normalized = normalized)
+        if events:
+            SCHEDULE_FORMATS.labels(fmt.name, "probe").inc()
+            return events
+
+    for fallback in registered_formats():
+        if fallback is fmt:
+            continue
+        events = fallback.parse(text, ctx = ctx, normalized = normalized)
+        if events:
+            SCHEDULE_FORMATS.labels(fallback.name, "fallback").inc()
+            log.info("Schedule format found by fallback", extra = {"fields": {"format": fallback.name, "probed": fmt.name if fmt else None}})
+            return events
+
+    SCHEDULE_FORMATS.labels("none", "none").inc()
+    record_unmatched(text, fmt.name if fmt else None)
+    return []
+
+def paste_shape(text) -> str:
+    """The start of a paste with letters as "a" and digits as "9": its layout without its contents."""
+    return SHAPE_DIGITS_RE.sub("9", SHAPE_LETTERS_RE.sub("a", text[:PROBE_CHARS]))
+
+def record_unmatched(text, probed = None):
+    """Keep a recent-pastes list of what no parser understood, for adding formats later.
+
+    Only a digest, the length and the paste's shape are kept. Outside the app (bulk parsing) it is logged instead.
+    """
+    record = {
+        "time": datetime.now(timezone.utc).isoformat(),
+        "digest": hashlib.sha256(text.encode("utf-8")).hexdigest()[:16],
+        "length": len(text),
+        "probed": probed,
+        "shape": paste_shape(text),
+    }
+    if not has_app_context():
+        log.info("Schedule matched no format", extra = {"fields": {key: record[key] for key in ("digest", "length", "probed")}})
+        return
+
+    try:
+        pipe = current_app.extensions["redis_client"].pipeline(transaction = False)
+        pipe.lpush(UNMATCHED_KEY, json.dumps(record))
+        pipe.ltrim(UNMATCHED_KEY, 0, UNMATCHED_MAX - 1)
+        pipe.execute()
+    except RedisError as e:
+        log.warning("Failed to record unmatched schedule", extra = {"fields": {"error": str(e)}})
+
+def unmatched_pastes(limit = 50) -> list:
+    """The most recent unmatched pastes, newest first."""
+    r = current_app.extensions["redis_client"]
+    return [json.loads(item) for item in r.lrange(UNMATCHED_KEY, 0, limit - 1)]
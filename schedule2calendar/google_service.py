@@ -1,45 +1,140 @@
+from schedule2calendar.telemetry import timed, CREDENTIALS
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
+from redis.exceptions import LockError
 from flask import session, current_app
 from datetime import timedelta
+import threading
+import logging
+import time
 import json
 
+log = logging.getLogger(__name__)
+
+CREDENTIALS_TTL = int(timedelta(days = 7).total_seconds())
+
+# Live credential objects for this process, keyed by email: (version, creds, cached_at)
+_credential_cache = {}
+_cache_lock = threading.Lock()
+
+CREDENTIAL_STATS = {
+    "cache_hits": 0,
+    "cache_misses": 0,
+    "refreshes": 0,
+    "refresh_failures": 0,
+    "refresh_waits": 0, # Another worker refreshed while we waited on the lock
+}
+
+def _credentials_key(email):
+    return f"user:{email}:credentials"
+
+def _version_key(email):
+    return f"user:{email}:credentials_version"
+
+def _count(stat):
+    CREDENTIALS.labels(stat).inc()
+    with _cache_lock:
+        CREDENTIAL_STATS[stat] += 1
+
+def _cache_credentials(email, version, creds):
+    with _cache_lock:
+        _credential_cache[email] = (version, creds, time.monotonic())
+
+def _drop_cached(email):
+    with _cache_lock:
+        _credential_cache.pop(email, None)
+
+def store_credentials(email, creds):
+    """Save credentials to Redis and bump their version so every worker drops its cached copy."""
+    r = current_app.extensions["redis_client"]
+    pipe = r.pipeline()
+    pipe.setex(_credentials_key(email), CREDENTIALS_TTL, creds.to_json())
+    pipe.incr(_version_key(email))
+    pipe.expire(_version_key(email), CREDENTIALS_TTL)
+    version = pipe.execute()[1]
+
+    _cache_credentials(email, str(version).encode("utf-8"), creds)
+
 def get_user_credentials():
-    """Retrieve stored user credentials from the database."""
+    """Retrieve stored credentials for the user in the current session."""
     email = session.get("email")
     if not email:
         return None
 
+    return load_credentials(email)
+
+def load_credentials(email):
+    """Retrieve user credentials, preferring this process's cached copy while its version is current."""
     r = current_app.extensions["redis_client"]
-    credentials_json = r.get(f"user:{email}:credentials")
+
+    with _cache_lock:
+        cached = _credential_cache.get(email)
+
+    # With nothing cached, the version check is skipped and both keys are read together below
+    if cached is not None:
+        version = r.get(_version_key(email))
+        cached_version, creds, cached_at = cached
+        fresh = time.monotonic() - cached_at < current_app.config["CREDENTIAL_CACHE_TTL"]
+        if fresh and version is not None and cached_version == version and not creds.expired:
+            _count("cache_hits")
+            return creds
+
+    _count("cache_misses")
+    credentials_json, version = r.mget(_credentials_key(email), _version_key(email))
     if not credentials_json:
+        _drop_cached(email)
         return None
 
     creds = Credentials.from_authorized_user_info(json.loads(credentials_json.decode("utf-8")))
 
     # Refresh credentials if expired
     if creds and creds.expired and creds.refresh_token:
+        return _refresh_credentials(email)
+
+    _cache_credentials(email, version, creds)
+    return creds
+
+def _refresh_credentials(email):
+    """Refresh expired credentials, allowing only one refresh per user at a time across all workers."""
+    r = current_app.extensions["redis_client"]
+    lock = r.lock(f"user:{email}:credentials_lock", timeout = 30, blocking_timeout = 15)
+
+    if not lock.acquire():
+        log.warning("Timed out waiting to refresh credentials", extra = {"fields": {"email": email}})
+        return None
+
+    try:
+        # Another worker may have refreshed while we waited for the lock
+        credentials_json, version = r.mget(_credentials_key(email), _version_key(email))
+        if not credentials_json:
+            _drop_cached(email)
+            return None
+
+        creds = Credentials.from_authorized_user_info(json.loads(credentials_json.decode("utf-8")))
+        if not creds.expired:
+            _count("refresh_waits")
+            _cache_credentials(email, version, creds)
+            return creds
+
         try:
-            creds.refresh(Request())  # Refresh the credentials
-            r.setex(f"user:{email}:credentials", int(timedelta(days = 7).total_seconds()), creds.to_json())
+            with timed("credential_refresh"):
+                creds.refresh(Request())  # Refresh the credentials
         except Exception as e:
-            print(f"Error refreshing credentials: {e}")
+            _count("refresh_failures")
+            log.warning("Error refreshing credentials", extra = {"fields": {"email": email, "error": str(e)}})
             return None
 
-    return creds
+        _count("refreshes")
+        store_credentials(email, creds)
+        return creds
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            pass # Lock expired while refreshing; nothing left to release
 
-def add_batch_callback(request_id, response, exception):
-    if exception:
-        print(f"Error in batch request: {exception}")
-    else:
-        print(f"Successfully added event: {response.get('summary')}")
-
-def delete_batch_callback(request_id, response, exception):
-    if exception:
-        print(f"Error in batch delete request: {exception}")
-    else:
-        # Ensure response is a dictionary before accessing keys
-        if isinstance(response, dict):
-            print(f"Successfully deleted event: {response.get('summary', 'Unknown')}")
-        else:
-            print(f"Unexpected response format: {response}")
\ No newline at end of file
+def credential_stats() -> dict:
+    with _cache_lock:
+        stats = dict(CREDENTIAL_STATS)
+        stats["cached_users"] = len(_credential_cache)
+    return stats
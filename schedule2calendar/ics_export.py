@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import hashlib
+
+""" Streams parsed events as an iCalendar (.ics) file, so users can import a schedule without Google API calls """
+
+PRODID = "-//Schedule2Calendar//Schedule Export//EN"
+
+TRANSITION_SCAN = timedelta(days = 1) # Zone offsets are compared day by day, then the change is narrowed to the second
+
+def _utc_offset(offset) -> str:
+    minutes = int(offset.total_seconds()) // 60
+    sign = "-" if minutes < 0 else "+"
+    return f"{sign}{abs(minutes) // 60:02d}{abs(minutes) % 60:02d}"
+
+def _transitions(zone, start, end):
+    """(UTC instant, offset before, offset after) for each change of zone's UTC offset between start and end."""
+    at, offset = start, start.astimezone(zone).utcoffset()
+    while at < end:
+        step = min(at + TRANSITION_SCAN, end)
+        next_offset = step.astimezone(zone).utcoffset()
+        if next_offset != offset:
+            low, high = int(at.timestamp()), int(step.timestamp())
+            while high - low > 1:
+                middle = (low + high) // 2
+                if datetime.fromtimestamp(middle, zone).utcoffset() == offset:
+                    low = middle
+                else:
+                    high = middle
+            yield datetime.fromtimestamp(high, timezone.utc), offset, next_offset
+            offset = next_offset
+        at = step
+
+def _observance(zone, onset, offset_from, offset_to):
+    local = onset.astimezone(zone)
+    kind = "DAYLIGHT" if local.dst() else "STANDARD"
+    yield f"BEGIN:{kind}"
+    yield f"TZOFFSETFROM:{_utc_offset(offset_from)}"
+    yield f"TZOFFSETTO:{_utc_offset(offset_to)}"
+    if local.tzname():
+        yield f"TZNAME:{local.tzname()}"
+    # Onsets are in local time before the change (RFC 5545 section 3.6.5)
+    yield f"DTSTART:{(onset + offset_from).replace(tzinfo = None).strftime('%Y%m%dT%H%M%S')}"
+    yield f"END:{kind}"
+
+@lru_cache(maxsize = 64)
+def vtimezone(tz_name, first_year, last_year) -> tuple:
+    """VTIMEZONE for an IANA zone built from zoneinfo, with every offset change from first_year through last_year."""
+    zone = ZoneInfo(tz_name)
+    start = datetime(first_year, 1, 1, tzinfo = timezone.utc)
+    end = datetime(last_year + 1, 1, 1, tzinfo = timezone.utc)
+
+    offset = start.astimezone(zone).utcoffset()
+    lines = ["BEGIN:VTIMEZONE", f"TZID:{tz_name}"]
+    # The offset in force at the start of the range, then each change after it
+    lines += _observance(zone, start, offset, offset)
+    for instant, offset_from, offset_to in _transitions(zone, start, end):
+        lines += _observance(zone, instant, offset_from, offset_to)
+    lines.append("END:VTIMEZONE")
+    return tuple(lines)
+
+def escape_text(value) -> str:
+    """Escape a TEXT value (RFC 5545 section 3.3.11)."""
+    return (str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def fold_line(line) -> str:
+    """Fold a content line at 75 octets and terminate it with CRLF."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    parts = []
+    start = 0
+    limit = 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Don't split a multi-byte character
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode("utf-8"))
+        start = end
+        limit = 74 # Continuation lines start with a space
+
+    return "\r\n ".join(parts) + "\r\n"
+
+def _format_datetime(dt, tz_name) -> tuple[str, str]:
+    """Return the property parameter suffix and value for an event's start/end, in local time like its EXDATEs."""
+    return f";TZID={tz_name}", dt.astimezone(ZoneInfo(tz_name)).strftime("%Y%m%dT%H%M%S")
+
+def event_uid(event) -> str:
+    # Same identity the Calendar API writes use, so imported files and API writes don't duplicate each other
+    if event.uid:
+        return event.uid
+    digest = hashlib.sha1(f"{event.summary}|{event.start.isoformat()}".encode("utf-8")).hexdigest()
+    return f"{digest}@schedule2calendar"
+
+def _event_lines(event, stamp):
+    yield "BEGIN:VEVENT"
+    yield f"UID:{event_uid(event)}"
+    yield f"DTSTAMP:{stamp}"
+
+    params, value = _format_datetime(event.start, event.tz_name)
+    yield f"DTSTART{params}:{value}"
+    params, value = _format_datetime(event.end, event.tz_name)
+    yield f"DTEND{params}:{value}"
+
+    yield f"SUMMARY:{escape_text(event.summary)}"
+    if event.location:
+        yield f"LOCATION:{escape_text(event.location)}"
+        yield f"DESCRIPTION:{escape_text(event.location)}"
+
+    # Recurrence entries are already iCalendar lines (RRULE:...)
+    for rule in event.recurrence():
+        yield rule
+
+    for minutes in event.reminders:
+        yield "BEGIN:VALARM"
+        yield "ACTION:DISPLAY"
+        yield f"DESCRIPTION:{escape_text(event.summary)}"
+        yield f"TRIGGER:-PT{int(minutes)}M"
+        yield "END:VALARM"
+
+    yield "END:VEVENT"
+
+def iter_ics(events):
+    """Yield the calendar one folded line at a time, so it can be streamed to the client."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    yield fold_line("BEGIN:VCALENDAR")
+    yield fold_line("VERSION:2.0")
+    yield fold_line(f"PRODID:{PRODID}")
+    yield fold_line("CALSCALE:GREGORIAN")
+    yield fold_line("METHOD:PUBLISH")
+
+    # Every TZID an event uses, covering the years its meetings span
+    years = {}
+    for event in events:
+        last = (event.until or event.end).year
+        first_year, last_year = years.get(event.tz_name, (event.start.year, last))
+        years[event.tz_name] = (min(first_year, event.start.year), max(last_year, last))
+    for tz_name, (first_year, last_year) in sorted(years.items()):
+        for line in vtimezone(tz_name, first_year, last_year):
+            yield fold_line(line)
+
+    for event in events:
+        for line in _event_lines(event, stamp):
+            yield fold_line(line)
+
+    yield fold_line("END:VCALENDAR")
@@ -0,0 +1,276 @@
+from schedule2calendar.calendar_ops import BatchWriter, add_events, delete_events, sync_events
+from schedule2calendar.async_calendar import AsyncWriter, new_client
+from schedule2calendar.google_service import load_credentials
+from schedule2calendar.models import Event
+from schedule2calendar.telemetry import JOBS
+
+from flask import current_app
+from datetime import datetime, timedelta, timezone
+import threading
+import asyncio
+import logging
+import time
+import uuid
+import json
+
+log = logging.getLogger(__name__)
+
+QUEUE_KEY = "jobs:queue"
+PROCESSING_KEY = "jobs:processing" # Jobs a worker has claimed and not finished, so a crashed worker's jobs can be requeued
+JOB_TTL = int(timedelta(days = 1).total_seconds())
+SWEEP_INTERVAL = 60 # Seconds between a worker's checks of the processing list for stale jobs
+PROGRESS_INTERVAL = 1 # Seconds between writes of a running job's progress and heartbeat
+
+# Job kinds the worker knows how to run
+JOB_HANDLERS = {
+    "add": add_events,
+    "delete": delete_events,
+    "sync": sync_events,
+}
+
+def _job_key(job_id):
+    return f"job:{job_id}"
+
+def enqueue_job(kind, email, events) -> str:
+    """Store a calendar write job and push it onto the worker queue, returning its id."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    r = current_app.extensions["redis_client"]
+    job_id = uuid.uuid4().hex
+
+    pipe = r.pipeline()
+    pipe.hset(_job_key(job_id), mapping = {
+        "kind": kind,
+        "email": email,
+        "status": "queued",
+        "payload": json.dumps([event.to_dict() for event in events]),
+        "total": len(events),
+        "completed": 0,
+        "created": datetime.now(timezone.utc).isoformat(),
+    })
+    pipe.expire(_job_key(job_id), JOB_TTL)
+    pipe.lpush(QUEUE_KEY, job_id)
+    pipe.execute()
+
+    return job_id
+
+def get_job(job_id) -> dict | None:
+    """Return a job's public status, or None if it doesn't exist or has expired."""
+    r = current_app.extensions["redis_client"]
+    job = r.hgetall(_job_key(job_id))
+    if not job:
+        return None
+
+    job = {k.decode("utf-8"): v.decode("utf-8") for k, v in job.items()}
+    return {
+        "id": job_id,
+        "kind": job["kind"],
+        "email": job["email"],
+        "status": job["status"],
+        "total": int(job.get("total", 0)),
+        "completed": int(job.get("completed", 0)),
+        "message": job.get("message"),
+        "results": json.loads(job["results"]) if "results" in job else None,
+    }
+
+def claim_job(r, timeout) -> str | None:
+    """Move the next job onto the processing list and stamp its heartbeat, or return None if none arrives within timeout seconds."""
+    job_id = r.blmove(QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT")
+    if job_id is None:
+        return None
+
+    job_id = job_id.decode("utf-8")
+    pipe = r.pipeline()
+    pipe.hset(_job_key(job_id), "heartbeat", time.time())
+    pipe.hincrby(_job_key(job_id), "attempts", 1)
+    pipe.execute()
+    return job_id
+
+def requeue_stale_jobs(r, visibility_timeout, max_attempts) -> int:
+    """Put claimed jobs whose worker has gone quiet back on the queue, or fail them after max_attempts; returns how many.
+
+    Jobs are safe to run again: imports are keyed by iCalUID, and deleting a deleted event counts as removed.
+    """
+    now = time.time()
+    requeued = 0
+    for member in r.lrange(PROCESSING_KEY, 0, -1):
+        job_id = member.decode("utf-8")
+        key = _job_key(job_id)
+        kind, status, heartbeat, created, attempts = r.hmget(key, "kind", "status", "heartbeat", "created", "attempts")
+
+        # Expired, or finished by a worker that stopped before taking it off the list
+        if kind is None or status in (b"done", b"failed"):
+            r.lrem(PROCESSING_KEY, 1, member)
+            continue
+
+        last_seen = float(heartbeat) if heartbeat else datetime.fromisoformat(created.decode("utf-8")).timestamp()
+        if now - last_seen < visibility_timeout:
+            continue
+
+        # Only the worker whose LREM removes the job puts it back, so two sweeps can't both requeue it
+        if not r.lrem(PROCESSING_KEY, 1, member):
+            continue
+        requeued += 1
+        fields = {"job_id": job_id, "kind": kind.decode("utf-8"), "attempts": int(attempts or 0)}
+        if int(attempts or 0) >= max_attempts:
+            JOBS.labels(fields["kind"], "failed").inc()
+            log.error("Job abandoned after repeated worker failures", extra = {"fields": fields})
+            r.hset(key, mapping = {"status": "failed", "message": "Your calendar update could not be completed. Please try again."})
+        else:
+            log.warning("Requeued job from a stalled worker", extra = {"fields": fields})
+            r.hset(key, "status", "queued")
+            r.rpush(QUEUE_KEY, member) # The right end is taken next
+
+    return requeued
+
+class JobProgress():
+    """Counts finished writes from any thread, and writes the count and the job's heartbeat to Redis off the event loop."""
+
+    def __init__(self, r, key):
+        self.r = r
+        self.key = key
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.stopped = asyncio.Event()
+
+    def __call__(self, chunk_results):
+        with self.lock:
+            self.pending += len(chunk_results)
+
+    def flush(self):
+        with self.lock:
+            count, self.pending = self.pending, 0
+        pipe = self.r.pipeline()
+        if count:
+            pipe.hincrby(self.key, "completed", count)
+        # Written while the job runs, even between results, so a live job is never requeued
+        pipe.hset(self.key, "heartbeat", time.time())
+        pipe.execute()
+
+    async def report(self):
+        """Flush every PROGRESS_INTERVAL until stop(), then once more."""
+        while not self.stopped.is_set():
+            try:
+                await asyncio.wait_for(self.stopped.wait(), PROGRESS_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.to_thread(self.flush)
+
+    def stop(self):
+        self.stopped.set()
+
+async def _run_job(job_id, make_writer):
+    """Run a claimed job, then take it off the processing list whatever the outcome."""
+    try:
+        await _execute_job(job_id, make_writer)
+    finally:
+        await asyncio.to_thread(current_app.extensions["redis_client"].lrem, PROCESSING_KEY, 1, job_id)
+
+async def _execute_job(job_id, make_writer):
+    """Run a queued job with the writer make_writer(creds) returns, recording progress and per-event results on the job hash."""
+    r = current_app.extensions["redis_client"]
+    key = _job_key(job_id)
+
+    # Redis calls run on a thread, so one job's round trips don't stall the others on the loop
+    job = await asyncio.to_thread(r.hgetall, key)
+    if b"kind" not in job:
+        # A heartbeat stamped on an expired job is all that's left of it
+        log.warning("Job expired before it could run", extra = {"fields": {"job_id": job_id}})
+        await asyncio.to_thread(r.delete, key)
+        return
+
+    kind = job[b"kind"].decode("utf-8")
+    email = job[b"email"].decode("utf-8")
+    events = [Event.from_dict(data) for data in json.loads(job[b"payload"])]
+    await asyncio.to_thread(r.hset, key, mapping = {"status": "running", "started": datetime.now(timezone.utc).isoformat(), "heartbeat": time.time()})
+
+    try:
+        # Loading may refresh the token over blocking HTTP, so keep it off the event loop
+        creds = await asyncio.to_thread(load_credentials, email)
+        if not creds:
+            JOBS.labels(kind, "failed").inc()
+            await asyncio.to_thread(r.hset, key, mapping = {"status": "failed", "message": "Your Google login has expired. Please log in again."})
+            return
+
+        progress = JobProgress(r, key)
+        reporter = asyncio.create_task(progress.report())
+        try:
+            outcome = await JOB_HANDLERS[kind](make_writer(creds), email, events, progress = progress)
+        finally:
+            # The last progress write lands before the final status below
+            progress.stop()
+            await reporter
+        await asyncio.to_thread(r.hset, key, mapping = {
+            "status": "done",
+            "total": len(outcome["results"]),
+            "completed": len(outcome["results"]),
+            "message": outcome["message"],
+            "results": json.dumps(outcome["results"]),
+        })
+        JOBS.labels(kind, "done").inc()
+    except Exception as e:
+        JOBS.labels(kind, "failed").inc()
+        log.exception("Job failed", extra = {"fields": {"job_id": job_id, "kind": kind}})
+        await asyncio.to_thread(r.hset, key, mapping = {"status": "failed", "message": f"An error occurred: {str(e)}"})
+
+def run_job(job_id):
+    """Run a queued job to completion using batch requests."""
+    asyncio.run(_run_job(job_id, BatchWriter))
+
+async def _run_async_worker(poll_timeout):
+    r = current_app.extensions["redis_client"]
+    cfg = current_app.config
+    slots = asyncio.Semaphore(cfg["ASYNC_WORKER_CONCURRENCY"])
+    running = set()
+
+    connections = asyncio.Semaphore(cfg["ASYNC_MAX_CONNECTIONS"])
+
+    async with new_client(cfg["ASYNC_MAX_CONNECTIONS"]) as client:
+        def make_writer(creds):
+            return AsyncWriter(client, creds, cfg["ASYNC_REQUEST_CONCURRENCY"], cfg["BATCH_MAX_RETRIES"], connections = connections)
+
+        def finished(task):
+            running.discard(task)
+            slots.release()
+
+        next_sweep = 0
+        while True:
+            if time.monotonic() >= next_sweep:
+                await asyncio.to_thread(requeue_stale_jobs, r, cfg["JOB_VISIBILITY_TIMEOUT"], cfg["JOB_MAX_ATTEMPTS"])
+                next_sweep = time.monotonic() + SWEEP_INTERVAL
+
+            # Only take a job off the queue when there is room to start it
+            await slots.acquire()
+            job_id = await asyncio.to_thread(claim_job, r, poll_timeout)
+            if job_id is None:
+                slots.release()
+                continue
+
+            task = asyncio.create_task(_run_job(job_id, make_writer))
+            running.add(task)
+            task.add_done_callback(finished)
+
+def run_worker(poll_timeout = 5, mode = "sync"):
+    """Block on the job queue and run jobs: one at a time ("sync"), or many at once on an event loop ("async").
+
+    Claimed jobs wait on a processing list until they finish; every worker periodically requeues the ones whose
+    worker stopped updating them. Must be called inside an app context.
+    """
+    r = current_app.extensions["redis_client"]
+    cfg = current_app.config
+    log.info("Calendar job worker started", extra = {"fields": {"mode": mode}})
+
+    if mode == "async":
+        asyncio.run(_run_async_worker(poll_timeout))
+        return
+
+    next_sweep = 0
+    while True:
+        if time.monotonic() >= next_sweep:
+            requeue_stale_jobs(r, cfg["JOB_VISIBILITY_TIMEOUT"], cfg["JOB_MAX_ATTEMPTS"])
+            next_sweep = time.monotonic() + SWEEP_INTERVAL
+
+        job_id = claim_job(r, poll_timeout)
+        if job_id is not None:
+            run_job(job_id)
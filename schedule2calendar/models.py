@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+from datetime import datetime, date
+import hashlib
+import json
+
+""" Typed event model carried through the pipeline; serialized to a Calendar API body only at the edge """
+
+BYDAY_CODES = ("MO", "TU", "WE", "TH", "FR", "SA", "SU") # Indexed by weekday number, 0 = Monday
+UID_PROPERTY = "schedule2calendarUid" # Private extended property carrying an event's uid
+
+def stable_uid(*parts) -> str:
+    """Deterministic iCalendar UID, so the same meeting gets the same identity every time it's parsed."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f"{digest}@schedule2calendar"
+
+def weekday_mask(weekdays) -> int:
+    """Bitmask of weekday numbers, bit 0 = Monday."""
+    mask = 0
+    for weekday in weekdays:
+        mask |= 1 << weekday
+    return mask
+
+def mask_weekdays(mask) -> list:
+    """Weekday numbers set in a bitmask, Monday first."""
+    return [weekday for weekday in range(7) if mask & (1 << weekday)]
+
+@dataclass(frozen = True, slots = True)
+class Event():
+    course: str
+    meeting_type: str # "Lecture", "Discussion/Lab" or "Final Exam"
+    location: str
+    start: datetime # Timezone aware
+    end: datetime
+    tz_name: str
+    weekdays: int = 0 # Weekday bitmask for recurring meetings; 0 for one-off events
+    until: datetime | None = None # UTC end of the last occurrence
+    reminders: tuple = (60,) # Popup reminders, in minutes before the start
+    exdates: tuple = () # Local dates of skipped meetings (holidays)
+    uid: str = "" # Stable identity from course, meeting and term; see stable_uid
+    term: str = "" # Term the event belongs to, e.g. "2026-03" (the month of its finals)
+
+    @property
+    def summary(self) -> str:
+        if self.meeting_type == "Final Exam":
+            return f"{self.course} Final Exam"
+        return f"{self.course} ({self.meeting_type})"
+
+    def recurrence(self) -> list:
+        if not self.weekdays:
+            return []
+
+        byday = ",".join(BYDAY_CODES[weekday] for weekday in mask_weekdays(self.weekdays))
+        rule = f"RRULE:FREQ=WEEKLY;BYDAY={byday}"
+        if self.until is not None:
+            rule += f";UNTIL={self.until.strftime('%Y%m%dT%H%M%SZ')}"
+        if not self.exdates:
+            return [rule]
+
+        # Excluded starts share the first meeting's wall-clock time
+        start_time = self.start.strftime("T%H%M%S")
+        excluded = ",".join(day.strftime("%Y%m%d") + start_time for day in sorted(self.exdates))
+        return [rule, f"EXDATE;TZID={self.tz_name}:{excluded}"]
+
+    def to_api_body(self) -> dict:
+        """Google Calendar events().insert/import_ body."""
+        body = {
+            "summary": self.summary,
+            "location": self.location,
+            "description": self.location,
+            "start": {"dateTime": self.start.isoformat(), "timeZone": self.tz_name},
+            "end": {"dateTime": self.end.isoformat(), "timeZone": self.tz_name},
+        }
+        if self.weekdays:
+            body["recurrence"] = self.recurrence()
+        if self.uid:
+            body["iCalUID"] = self.uid
+            body["extendedProperties"] = {"private": {UID_PROPERTY: self.uid}}
+        body["reminders"] = {"useDefault": False, "overrides": [{"method": "popup", "minutes": minutes} for minutes in self.reminders]}
+        return body
+
+    def times(self) -> str:
+        """Local start and end time of day, e.g. "10:30-11:50"."""
+        return f"{self.start.strftime('%H:%M')}-{self.end.strftime('%H:%M')}"
+
+    def fingerprint(self) -> str:
+        """Hash of everything written to the calendar, to tell whether a stored event needs patching."""
+        body = self.to_api_body()
+        if self.weekdays:
+            # Outside a known term a series starts at its next meeting, so its first date alone isn't a change
+            body["start"] = dict(body["start"], dateTime = self.start.strftime("%H:%M"))
+            body["end"] = dict(body["end"], dateTime = self.end.strftime("%H:%M"))
+        return hashlib.sha1(json.dumps(body, sort_keys = True).encode("utf-8")).hexdigest()
+
+    def to_dict(self) -> dict:
+        """Compact JSON-safe form, for caches and job payloads."""
+        return {
+            "course": self.course,
+            "meeting_type": self.meeting_type,
+            "location": self.location,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "tz_name": self.tz_name,
+            "weekdays": self.weekdays,
+            "until": self.until.isoformat() if self.until else None,
+            "reminders": list(self.reminders),
+            "exdates": [day.isoformat() for day in self.exdates],
+            "uid": self.uid,
+            "term": self.term,
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "Event":
+        return cls(
+            course = data["course"],
+            meeting_type = data["meeting_type"],
+            location = data["location"],
+            start = datetime.fromisoformat(data["start"]),
+            end = datetime.fromisoformat(data["end"]),
+            tz_name = data["tz_name"],
+            weekdays = data["weekdays"],
+            until = datetime.fromisoformat(data["until"]) if data["until"] else None,
+            reminders = tuple(data["reminders"]),
+            exdates = tuple(date.fromisoformat(day) for day in data.get("exdates", ())),
+            uid = data.get("uid", ""),
+            term = data.get("term", ""),
+        )
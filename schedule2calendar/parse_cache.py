@@ -0,0 +1,138 @@
+from schedule2calendar.models import Event
+from schedule2calendar.telemetry import timed, CACHE_LOOKUPS, EVENTS
+from schedule2calendar.config import Config
+from redis.exceptions import RedisError
+from collections import OrderedDict
+from flask import current_app
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import unicodedata
+import threading
+import hashlib
+import logging
+import json
+import time
+
+log = logging.getLogger(__name__)
+
+CACHE_PREFIX = "parse_cache:"
+INDEX_KEY = "parse_cache:index" # Sorted set of cached keys scored by insert time, used for eviction
+STATS_KEY = "parse_cache:stats" # Hash of lookup/miss counters shared by all workers; hits are the difference
+PARSE_VERSION = "6" # Bump when parse output changes, so stale entries are never served
+
+# Small in-process LRU in front of Redis; events are frozen, so lists of them can be shared
+_local_cache = OrderedDict()
+_local_lock = threading.Lock()
+_local_stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "errors": 0}
+
+def schedule_cache_key(schedule, reference_date = None) -> str:
+    """Content address for a schedule: hash of the NFKC-normalized text plus the reference date and parser version.
+
+    The reference date should be the parse's own (ParseContext.today, in SCHEDULE_TIMEZONE), not the server's.
+    """
+    if reference_date is None:
+        reference_date = datetime.now(ZoneInfo(Config.SCHEDULE_TIMEZONE)).date()
+
+    normalized = unicodedata.normalize("NFKC", schedule).replace("\r\n", "\n").strip()
+    digest = hashlib.sha256(f"{PARSE_VERSION}\n{reference_date.isoformat()}\n{normalized}".encode("utf-8")).hexdigest()
+    return digest
+
+def _count(stat):
+    CACHE_LOOKUPS.labels("parse", stat).inc()
+    with _local_lock:
+        _local_stats[stat] += 1
+
+def _local_get(key):
+    with _local_lock:
+        events = _local_cache.get(key)
+        if events is not None:
+            _local_cache.move_to_end(key)
+        return events
+
+def _local_set(key, events):
+    max_size = current_app.config["PARSE_CACHE_LOCAL_SIZE"]
+    with _local_lock:
+        _local_cache[key] = events
+        _local_cache.move_to_end(key)
+        while len(_local_cache) > max_size:
+            _local_cache.popitem(last = False)
+
+def _redis_set(r, key, payload):
+    cfg = current_app.config
+    pipe = r.pipeline()
+    pipe.setex(CACHE_PREFIX + key, cfg["PARSE_CACHE_TTL"], payload)
+    pipe.zadd(INDEX_KEY, {key: time.time()})
+    pipe.hincrby(STATS_KEY, "misses", 1)
+    pipe.zcard(INDEX_KEY)
+    size = pipe.execute()[-1]
+
+    # Evict the oldest entries once the cache grows past its bound
+    overflow = size - cfg["PARSE_CACHE_MAX_ENTRIES"]
+    if overflow > 0:
+        evicted = [member for member, _ in r.zpopmin(INDEX_KEY, overflow)]
+        if evicted:
+            r.delete(*[CACHE_PREFIX + member.decode("utf-8") for member in evicted])
+
+def _load_events(payload):
+    return [Event.from_dict(data) for data in json.loads(payload)]
+
+def get_cached_events(schedule, parse, reference_date = None) -> list:
+    """Return parsed events for a schedule, consulting the local LRU, then Redis, then parse()."""
+    key = schedule_cache_key(schedule, reference_date)
+
+    cached = _local_get(key)
+    if cached is not None:
+        _count("local_hits")
+        return list(cached)
+
+    r = current_app.extensions["redis_client"]
+    try:
+        # Count every lookup alongside the read; misses are counted when the parse is stored
+        pipe = r.pipeline(transaction = False)
+        pipe.get(CACHE_PREFIX + key)
+        pipe.hincrby(STATS_KEY, "lookups", 1)
+        payload = pipe.execute()[0]
+    except RedisError as e:
+        log.warning("Parse cache unavailable", extra = {"fields": {"error": str(e)}})
+        _count("errors")
+        r = None
+        payload = None
+
+    if payload is not None:
+        _count("redis_hits")
+        events = _load_events(payload)
+        _local_set(key, tuple(events))
+        return events
+
+    _count("misses")
+    with timed("parse"):
+        events = parse(schedule)
+    EVENTS.labels("parsed").inc(len(events))
+    payload = json.dumps([event.to_dict() for event in events])
+    _local_set(key, tuple(events))
+
+    if r is not None:
+        try:
+            _redis_set(r, key, payload)
+        except RedisError as e:
+            log.warning("Failed to store parsed schedule in cache", extra = {"fields": {"error": str(e)}})
+            _count("errors")
+
+    return events
+
+def parse_cache_stats() -> dict:
+    """Counters for this process plus the shared Redis hit/miss totals."""
+    with _local_lock:
+        stats = dict(_local_stats)
+        stats["local_size"] = len(_local_cache)
+
+    try:
+        r = current_app.extensions["redis_client"]
+        shared = r.hgetall(STATS_KEY)
+        stats.update({f"shared_{k.decode('utf-8')}": int(v) for k, v in shared.items()})
+        stats["shared_hits"] = stats.get("shared_lookups", 0) - stats.get("shared_misses", 0)
+        stats["size"] = r.zcard(INDEX_KEY)
+    except RedisError:
+        pass
+
+    return stats
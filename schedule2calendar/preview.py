@@ -0,0 +1,113 @@
+from schedule2calendar.format_schedule import format_recurrence, format_datetime
+from schedule2calendar.conflicts import find_conflicts, find_calendar_conflicts
+from schedule2calendar.validate import validate_ongoing_event
+from schedule2calendar.service_factory import calendar_service
+from schedule2calendar.recurrence import expand
+from schedule2calendar.telemetry import timed, CACHE_LOOKUPS
+
+from googleapiclient.errors import HttpError
+from redis.exceptions import RedisError
+from flask import current_app, render_template
+import hashlib
+import logging
+import json
+
+log = logging.getLogger(__name__)
+
+""" Builds the schedule preview once as plain data, rendered to HTML through a cached template fragment """
+
+FRAGMENT_PREFIX = "preview_html:"
+CONFLICT_PREFIX = "calendar_conflicts:"
+
+def events_digest(events) -> str:
+    """Hash of the parsed events, which are themselves cached by schedule hash."""
+    return hashlib.sha256(json.dumps([event.to_dict() for event in events], sort_keys = True).encode("utf-8")).hexdigest()
+
+def _preview_event(event) -> dict:
+    entry = {
+        "summary": event.summary,
+        "location": event.location,
+        "start": format_datetime(event.start),
+        "end": format_datetime(event.end),
+        "tz_name": event.tz_name,
+        "recurrence": None,
+        "meetings": None,
+        "next_meeting": None,
+        "ended": not validate_ongoing_event(event),
+    }
+
+    if event.weekdays:
+        meetings = expand(event)
+        upcoming = meetings.next_after()
+        entry["recurrence"] = format_recurrence(event.recurrence(), event.tz_name)
+        entry["meetings"] = meetings.count()
+        entry["next_meeting"] = format_datetime(upcoming) if upcoming is not None else None
+
+    return entry
+
+def _calendar_conflicts(email, creds, events, digest) -> list:
+    """Clashes with the user's calendar, cached briefly per user and schedule since they cost a Calendar API call."""
+    r = current_app.extensions["redis_client"]
+    key = f"{CONFLICT_PREFIX}{email}:{digest}"
+    try:
+        cached = r.get(key)
+        if cached is not None:
+            CACHE_LOOKUPS.labels("calendar_conflicts", "hits").inc()
+            return json.loads(cached)
+    except RedisError as e:
+        log.warning("Calendar conflict cache unavailable", extra = {"fields": {"error": str(e)}})
+        r = None
+
+    CACHE_LOOKUPS.labels("calendar_conflicts", "misses").inc()
+    try:
+        conflicts = find_calendar_conflicts(calendar_service(creds), events)
+    except HttpError as e:
+        log.warning("Could not check calendar conflicts", extra = {"fields": {"error": str(e)}})
+        return []
+
+    if r is not None:
+        try:
+            r.setex(key, current_app.config["CALENDAR_CONFLICT_TTL"], json.dumps(conflicts))
+        except RedisError as e:
+            log.warning("Failed to cache calendar conflicts", extra = {"fields": {"error": str(e)}})
+
+    return conflicts
+
+def build_preview(events, email = None, creds = None) -> dict:
+    """JSON-safe preview of parsed events, conflicts within the schedule, and clashes with the user's calendar when logged in."""
+    with timed("preview"):
+        digest = events_digest(events)
+        preview = {
+            "events": [_preview_event(event) for event in events],
+            "conflicts": find_conflicts(events),
+        }
+    preview["calendar_conflicts"] = _calendar_conflicts(email, creds, events, digest) if creds else [] # Timed as google_list
+
+    # Strong validator over everything shown, so "next meeting" and calendar changes produce a new tag
+    content = json.dumps(preview, sort_keys = True).encode("utf-8")
+    preview["etag"] = hashlib.sha256(digest.encode("utf-8") + content).hexdigest()
+    return preview
+
+def render_preview(preview) -> str:
+    """Render the preview fragment, reusing a copy cached in Redis under the preview's ETag."""
+    r = current_app.extensions["redis_client"]
+    key = FRAGMENT_PREFIX + preview["etag"]
+    try:
+        cached = r.get(key)
+        if cached is not None:
+            CACHE_LOOKUPS.labels("preview_html", "hits").inc()
+            return cached.decode("utf-8")
+    except RedisError as e:
+        log.warning("Preview cache unavailable", extra = {"fields": {"error": str(e)}})
+        r = None
+
+    CACHE_LOOKUPS.labels("preview_html", "misses").inc()
+    with timed("render"):
+        fragment = render_template("_preview.html", **preview)
+    if r is not None:
+        try:
+            r.setex(key, current_app.config["PREVIEW_CACHE_TTL"], fragment)
+        except RedisError as e:
+            log.warning("Failed to cache preview", extra = {"fields": {"error": str(e)}})
+
+    return fragment
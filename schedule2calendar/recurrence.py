@@ -0,0 +1,123 @@
+from schedule2calendar.models import mask_weekdays
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from bisect import bisect_left
+
+""" Expands the weekly BYDAY/UNTIL rules events carry, arithmetically rather than by stepping day by day """
+
+class WeeklyRecurrence():
+    """Occurrences of a weekly event: every selected weekday from the first meeting through UNTIL, minus EXDATEs.
+
+    Occurrences are numbered from 0. Lookups by index or date are O(1) apart from EXDATE adjustment,
+    which is O(log e) in the number of excluded dates.
+    """
+
+    __slots__ = ("tz", "start", "duration", "weekdays", "first_offset", "week_start", "last_date", "exdates")
+
+    def __init__(self, event, exdates = ()):
+        self.tz = ZoneInfo(event.tz_name)
+        self.start = event.start.astimezone(self.tz)
+        self.duration = event.end - event.start
+        self.weekdays = mask_weekdays(event.weekdays) or [self.start.weekday()]
+
+        start_date = self.start.date()
+        self.week_start = start_date - timedelta(days = start_date.weekday()) # Monday of the first week
+        self.first_offset = bisect_left(self.weekdays, start_date.weekday()) # Selected days before the first meeting
+
+        # Last date with an occurrence starting at or before UNTIL
+        if event.until is not None:
+            until_local = event.until.astimezone(self.tz)
+            last_date = until_local.date()
+            if self.start.timetz().replace(tzinfo = None) > until_local.time():
+                last_date -= timedelta(days = 1)
+            self.last_date = last_date
+        elif event.weekdays:
+            self.last_date = None # Unbounded
+        else:
+            self.last_date = start_date # One-off event
+
+        # Only exclusions that land on an occurrence matter
+        self.exdates = sorted(d for d in set(exdates) if self._is_raw_occurrence(d))
+
+    def _raw_index(self, day) -> int:
+        """Number of unexcluded-rule occurrences strictly before `day`."""
+        days = (day - self.week_start).days
+        weeks, remainder = divmod(days, 7)
+        return weeks * len(self.weekdays) + bisect_left(self.weekdays, remainder) - self.first_offset
+
+    def _raw_date(self, index):
+        weeks, position = divmod(index + self.first_offset, len(self.weekdays))
+        return self.week_start + timedelta(days = weeks * 7 + self.weekdays[position])
+
+    def _is_raw_occurrence(self, day) -> bool:
+        if day < self.start.date() or (self.last_date is not None and day > self.last_date):
+            return False
+        return day.weekday() in self.weekdays
+
+    def _at(self, day) -> datetime:
+        return datetime.combine(day, self.start.timetz().replace(tzinfo = None), tzinfo = self.tz)
+
+    def occurs_on(self, day) -> bool:
+        """Whether a meeting falls on the local date `day`."""
+        if not self._is_raw_occurrence(day):
+            return False
+        index = bisect_left(self.exdates, day)
+        return index == len(self.exdates) or self.exdates[index] != day
+
+    def count(self) -> int | None:
+        """Total number of meetings, or None for an unbounded rule."""
+        if self.last_date is None:
+            return None
+        return max(self._raw_index(self.last_date + timedelta(days = 1)), 0) - len(self.exdates)
+
+    def nth(self, n) -> datetime | None:
+        """Start of the nth (0-based) meeting, or None past the end."""
+        if n < 0:
+            return None
+
+        # Skip past excluded dates: each pass can only move the raw index forward
+        raw = n
+        while True:
+            day = self._raw_date(raw)
+            skipped = bisect_left(self.exdates, day + timedelta(days = 1))
+            if raw - skipped == n and (skipped == 0 or self.exdates[skipped - 1] != day):
+                break
+            raw = n + skipped
+
+        if self.last_date is not None and day > self.last_date:
+            return None
+        return self._at(day)
+
+    def index_of(self, when) -> int:
+        """Number of meetings that start before `when`."""
+        when = when.astimezone(self.tz)
+        day = when.date()
+        started_today = self._is_raw_occurrence(day) and self._at(day) < when
+
+        raw = max(self._raw_index(day), 0) + (1 if started_today else 0)
+        if self.last_date is not None:
+            raw = min(raw, max(self._raw_index(self.last_date + timedelta(days = 1)), 0))
+
+        excluded = bisect_left(self.exdates, day)
+        if started_today and excluded < len(self.exdates) and self.exdates[excluded] == day:
+            excluded += 1
+        return raw - excluded
+
+    def next_after(self, when = None) -> datetime | None:
+        """Start of the first meeting at or after `when` (default now), or None if the rule has ended."""
+        if when is None:
+            when = datetime.now(timezone.utc)
+        return self.nth(self.index_of(when))
+
+    def __iter__(self):
+        """Lazily yield each meeting's (start, end)."""
+        index = 0
+        while True:
+            start = self.nth(index)
+            if start is None:
+                return
+            yield start, start + self.duration
+            index += 1
+
+def expand(event, exdates = ()) -> WeeklyRecurrence:
+    return WeeklyRecurrence(event, exdates or getattr(event, "exdates", ()))
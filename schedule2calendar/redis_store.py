@@ -0,0 +1,54 @@
+from flask_session.redis import RedisSessionInterface
+from redis import BlockingConnectionPool
+from flask import g
+
+""" The Redis connection pool shared by the app, sessions and the rate limiter, and the session store that uses it. """
+
+def redis_pool(cfg) -> BlockingConnectionPool:
+    """A bounded pool; when every connection is busy, callers wait up to REDIS_POOL_TIMEOUT instead of opening more."""
+    return BlockingConnectionPool.from_url(
+        cfg["RATELIMIT_STORAGE_URI"],
+        max_connections = cfg["REDIS_MAX_CONNECTIONS"],
+        timeout = cfg["REDIS_POOL_TIMEOUT"],
+        socket_timeout = cfg["REDIS_SOCKET_TIMEOUT"],
+        socket_connect_timeout = cfg["REDIS_CONNECT_TIMEOUT"],
+        socket_keepalive = True,
+        health_check_interval = cfg["REDIS_HEALTH_CHECK_INTERVAL"], # PING connections idle longer than this before reuse
+    )
+
+class RedisSessions(RedisSessionInterface):
+    """Flask-Session's Redis store, reading a session and its remaining lifetime in one round trip.
+
+    With SESSION_REFRESH_EACH_REQUEST, an unchanged session is only rewritten to push its expiry back once
+    SESSION_REFRESH_INTERVAL has passed since the last write, rather than on every request.
+    """
+
+    def _retrieve_session_data(self, store_id):
+        pipe = self.client.pipeline(transaction = False)
+        pipe.get(store_id)
+        pipe.ttl(store_id)
+        serialized_session_data, ttl = pipe.execute()
+
+        g.session_ttl = ttl
+        if serialized_session_data:
+            return self.serializer.decode(serialized_session_data)
+        return None
+
+    def should_set_storage(self, app, session):
+        ttl = g.pop("session_ttl", None)
+        if session.modified or not app.config["SESSION_REFRESH_EACH_REQUEST"]:
+            return session.modified
+
+        written_ago = app.permanent_session_lifetime.total_seconds() - ttl if ttl is not None and ttl > 0 else None
+        return written_ago is None or written_ago >= app.config["SESSION_REFRESH_INTERVAL"]
+
+def init_sessions(app, client):
+    """Serve sessions from Redis through RedisSessions, configured by the usual SESSION_* settings."""
+    cfg = app.config
+    app.session_interface = RedisSessions(
+        app,
+        client = client,
+        key_prefix = cfg["SESSION_KEY_PREFIX"],
+        use_signer = cfg["SESSION_USE_SIGNER"],
+        permanent = cfg["SESSION_PERMANENT"],
+    )
@@ -1,25 +1,39 @@
-from schedule2calendar.google_service import get_user_credentials, add_batch_callback, delete_batch_callback
-from schedule2calendar.format_schedule import format_recurrence, format_datetime
-from schedule2calendar.schedule_handler import get_schedule, parse_schedule
-from schedule2calendar.validate import validate_event, validate_ongoing_event
+from schedule2calendar.google_service import get_user_credentials, store_credentials
+from schedule2calendar.jobs import enqueue_job, get_job
+from schedule2calendar.calendar_ops import plan_sync, describe_plan
+from schedule2calendar.service_factory import oauth2_service
+from schedule2calendar.schedule_handler import ingest_schedule
+from schedule2calendar.validate import validate_event
+from schedule2calendar.preview import build_preview, render_preview, events_digest
 from schedule2calendar.forms import ScheduleForm
-from schedule2calendar.extensions import limiter
+from schedule2calendar.bulk import iter_ndjson_items, iter_upload_items, stream_parse, iter_ndjson, get_pool
+from schedule2calendar.ics_export import iter_ics
+from schedule2calendar.extensions import limiter, csrf
+from schedule2calendar.telemetry import timed, metrics_payload
 
-from flask import Blueprint, request, render_template, jsonify, redirect, session, url_for, current_app
+from flask import Blueprint, Response, request, render_template, jsonify, redirect, session, url_for, current_app, stream_with_context
 
 from google.auth.transport.requests import Request
-from googleapiclient.http import BatchHttpRequest
 from google.oauth2.credentials import Credentials
 from googleapiclient.errors import HttpError
-from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import Flow
 
-from datetime import datetime, timedelta, timezone
-from markupsafe import escape
+import logging
+import hmac
 import os
 
+log = logging.getLogger(__name__)
+
 main_bp = Blueprint("main", __name__)
 
+# 202 response pointing the client at the job status endpoint
+def queued_response(job_id):
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for("main.job_status", job_id = job_id),
+        "message": "Your calendar update has been queued.",
+    }), 202
+
 # Route to get render template
 @main_bp.route('/', methods = ['GET', 'POST'])
 def home():
@@ -61,76 +75,118 @@ def callback():
     creds = flow.credentials
 
     # Get user's email
-    service = build("oauth2", "v2", credentials = creds)
+    service = oauth2_service(creds)
     user_info = service.userinfo().get().execute()
     email = user_info["email"]
 
     # Store credentials in Redis
-    r = current_app.extensions["redis_client"]
-    r.setex(f"user:{email}:credentials", int(timedelta(days = 7).total_seconds()), creds.to_json())
-
-    stored_creds = r.get(f"user:{email}:credentials")
+    store_credentials(email, creds)
 
     session["email"] = email  # Store user info in session
     session.modified = True  # Force session save
 
     return redirect(url_for("main.home"))
 
+# Builds the preview for the request's schedule, returning (preview, error_response)
+def request_preview() -> tuple:
+    events, error = ingest_schedule()
+    if error is not None:
+        return None, error
+
+    # Check if events list is empty
+    if not events:
+        # Return a message if no events were found
+        return None, "<h2>No events were found in the provided schedule. Please check your input and try again.</h2>"
+
+    email = session.get("email")
+    creds = get_user_credentials() if email else None
+    return build_preview(events, email, creds), None
+
+# Answers 304 when the client already holds this version of the preview, otherwise builds the response
+def conditional_response(etag, build):
+    if request.if_none_match.contains(etag):
+        response = Response(status = 304)
+    else:
+        response = build()
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache" # Always revalidate; unchanged previews cost a 304
+    return response
+
 # Route to handle schedule processing
 @main_bp.route('/process-schedule', methods = ['GET', 'POST'])
 @limiter.limit("20 per minute", override_defaults = False)  # Limit requests to prevent abuse
 def process_schedule():
     try:
-        if isinstance(get_schedule(), str):
-            schedule = get_schedule()
-        else:
-            return get_schedule()
+        preview, error = request_preview()
+        if error is not None:
+            return error
 
-        events = parse_schedule(schedule)
+        return conditional_response(preview["etag"], lambda: Response(render_preview(preview), mimetype = "text/html"))
 
-        # Check if events list is empty
-        if not events:
-            # Return a message if no events were found
-            return "<h2>No events were found in the provided schedule. Please check your input and try again.</h2>"
-
-        events_html = "<h2>Events Preview</h1><ul>"
-        for event in events:
-            events_html += f"<strong>{event.get('summary')}</strong><br>"
-            events_html += f"Location: {event.get('location')}<br>"
-            events_html += f"Description: {event.get('description')}<br>"
-            events_html += f"Start: {escape(format_datetime(event['start']['dateTime']))} ({event['start']['timeZone']})<br>"
-            events_html += f"End: {escape(format_datetime(event['end']['dateTime']))} ({event['end']['timeZone']})<br>"
-            if 'recurrence' in event:
-                formatted_recur = format_recurrence(event['recurrence'])
-                events_html += f"Recurrence: {escape(formatted_recur)}<br>"
-            ongoing = validate_ongoing_event(event)
-            if not ongoing:
-                events_html += f"<span style='color:red;'>This event has already ended and will not be added to the schedule.</span><br>"
-            events_html += "</li><br>"
-        events_html += "</ul>"
-
-        return events_html
-    
     except Exception as e:
+        log.exception("Failed to build preview")
         return jsonify({"message": f"An error occurred: {str(e)}"}), 500
     
-@main_bp.route('/add-to-calendar', methods = ['GET', 'POST'])
+# JSON form of the preview, for clients that render it themselves
+@main_bp.route('/api/preview', methods = ['POST'])
 @limiter.limit("20 per minute", override_defaults = False)  # Limit requests to prevent abuse
-def add_to_calendar():
+def api_preview():
+    try:
+        preview, error = request_preview()
+        if error is not None:
+            return error
+
+        # Separate tag from the HTML fragment, since strong ETags name one exact representation
+        return conditional_response(f"{preview['etag']}-json", lambda: jsonify(preview))
+
+    except Exception as e:
+        log.exception("Failed to build preview")
+        return jsonify({"message": f"An error occurred: {str(e)}"}), 500
+
+# Route to download the schedule as an .ics file; needs no Google login or API quota
+@main_bp.route('/download-ics', methods = ['POST'])
+@limiter.limit("20 per minute", override_defaults = False)  # Limit requests to prevent abuse
+def download_ics():
     try:
-        if isinstance(get_schedule(), str):
-            schedule = get_schedule()
+        events, error = ingest_schedule()
+        if error is not None:
+            return error
+
+        if not events:
+            return "<h2>No events were found in the provided schedule. Please check your input and try again.</h2>", 404
+
+        # The parsed events are cached by schedule hash, so the ETag only changes when the output would
+        etag = events_digest(events)
+        if request.if_none_match.contains(etag):
+            response = Response(status = 304)
         else:
-            return get_schedule()
+            response = Response(stream_with_context(iter_ics(events)), mimetype = "text/calendar")
+            response.headers["Content-Disposition"] = "attachment; filename=schedule.ics"
 
-        events = parse_schedule(schedule)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, max-age=3600"
+        return response
+
+    except Exception as e:
+        log.exception("Failed to export schedule")
+        return jsonify({"message": f"An error occurred: {str(e)}"}), 500
+
+@main_bp.route('/add-to-calendar', methods = ['GET', 'POST'])
+@limiter.limit("20 per minute", override_defaults = False)  # Limit requests to prevent abuse
+def add_to_calendar():
+    try:
+        events, error = ingest_schedule()
+        if error is not None:
+            return error
 
         if not events:
             return "<h1>No events found in the provided schedule. Please check your input and try again.</h1>"
         
         # Validate events before adding
-        for event in events:
-            validate_event(event)
+        with timed("validate"):
+            for event in events:
+                validate_event(event)
 
         """Adds an event using stored user credentials."""
         creds = get_user_credentials()
@@ -139,69 +195,30 @@ def add_to_calendar():
                 return jsonify({"redirect": url_for("main.login")}), 200  # Force JSON response
             return jsonify({"redirect": url_for("main.login")}), 200  # Ensure always JSON
 
-        service = build("calendar", "v3", credentials = creds)
-        
-        batch = service.new_batch_http_request(callback = add_batch_callback)
-        added_count = 0
-        
-        # Check each event summary separately to avoid missing matches
-        event_summaries = {event['summary'] for event in events}
-
-        # Calculate the date 6 months ago in RFC3339 format
-        six_months_ago = (datetime.now(timezone.utc) - timedelta(days = 180)).isoformat()
-            
-        # Fetch all events from the calendar
-        events_result = service.events().list(
-            calendarId = 'primary',
-            maxResults = 2500,  # Ensuring all events are retrieved
-            singleEvents = False,  # Include recurring events
-            timeMin = six_months_ago
-        ).execute()
-
-        all_events = events_result.get('items', [])
-        event_summaries = {event.get('summary') for event in all_events}
-
-        for event in events:
-            ongoing = validate_ongoing_event(event)
-            if not ongoing:
-                print(f"Skipping event as it has already passed: {event['summary']}")
-            elif 'summary' in event and event['summary'] in event_summaries:
-                print(f"Skipping duplicate event: {event['summary']}")
-            else:
-                batch.add(service.events().insert(calendarId = 'primary', body = event))
-                print(f"Adding event to batch: {event['summary']}")
-                added_count += 1
-
-        if added_count > 0:
-            batch.execute()
-            print(f"Batch insertion complete: {added_count} events added.")
-            return {"message": f"{added_count} new events added successfully!"}
-        else:
-            return {"message": "No new events were added; all events have already passed or were already scheduled."}
+        job_id = enqueue_job("add", session["email"], events)
+        return queued_response(job_id)
 
     except Exception as e:
         import traceback
         error_msg = f"An error occurred: {str(e)}\n{traceback.format_exc()}"
-        print(error_msg)
+        log.exception("Failed to queue calendar add")
         return jsonify({"message": error_msg}), 501
     
 @main_bp.route('/delete-from-calendar', methods = ['GET', 'POST'])
 @limiter.limit("20 per minute", override_defaults=False)  # Limit requests to prevent abuse
 def delete_from_calendar():
     try:
-        if isinstance(get_schedule(),str):
-            schedule = get_schedule()
-        else:
-            return get_schedule()
-
-        events = parse_schedule(schedule)
+        events, error = ingest_schedule()
+        if error is not None:
+            return error
 
         if not events:
             return "<h1>No events found in the provided schedule. Please check your input and try again.</h1>"
         
         # Validate events before adding
-        for event in events:
-            validate_event(event)
+        with timed("validate"):
+            for event in events:
+                validate_event(event)
 
         """Adds an event using stored user credentials."""
         creds = get_user_credentials()
@@ -210,44 +227,87 @@ def delete_from_calendar():
                 return jsonify({"redirect": url_for("main.login")}), 200  # Force JSON response
             return jsonify({"redirect": url_for("main.login")}), 200  # Ensure always JSON
         
-        service = build("calendar", "v3", credentials=creds)
-
-        # Get the list of event summaries to delete
-        batch = service.new_batch_http_request(callback = delete_batch_callback)
-        event_summaries = {event['summary'] for event in events}
-
-        # Calculate the date 6 months ago in RFC3339 format
-        six_months_ago = (datetime.now(timezone.utc) - timedelta(days = 180)).isoformat()
-
-        # Fetch all events from the calendar
-        events_result = service.events().list(
-            calendarId = 'primary',
-            maxResults = 2500,  # Ensuring all events are retrieved
-            singleEvents = False,  # Include recurring events
-            timeMin = six_months_ago
-        ).execute()
-        
-        all_events = events_result.get('items', [])
-
-        deleted_count = 0
-        for event in all_events:
-            if 'summary' in event and event['summary'] in event_summaries:
-                if 'recurringEventId' in event:
-                    # If the event is a recurrence, delete the entire recurring series
-                    print(f"Deleting recurring event series: {event['summary']}")
-                    batch.add(service.events().delete(calendarId = 'primary', eventId = event['recurringEventId']))
-                else:
-                    # Delete a normal non-recurring event
-                    print(f"Deleting event: {event['summary']}")
-                    batch.add(service.events().delete(calendarId='primary', eventId = event['id']))
-                deleted_count += 1
-                
-        batch.execute()
-        print(f"Batch deletion complete: {deleted_count} events added.")
-        return jsonify({"message": f"Deleted {deleted_count} events from Google Calendar!"})
+        job_id = enqueue_job("delete", session["email"], events)
+        return queued_response(job_id)
 
     except Exception as e:
         import traceback
         error_msg = f"An error occurred: {str(e)}\n{traceback.format_exc()}"
-        print(error_msg)
-        return jsonify({"message": error_msg}), 502
\ No newline at end of file
+        log.exception("Failed to queue calendar delete")
+        return jsonify({"message": error_msg}), 502
+
+# Route to apply only what changed since the schedule was last written; "dry_run" returns the plan instead
+@main_bp.route('/sync-calendar', methods = ['POST'])
+@limiter.limit("20 per minute", override_defaults = False)  # Limit requests to prevent abuse
+def sync_calendar():
+    try:
+        events, error = ingest_schedule()
+        if error is not None:
+            return error
+
+        if not events:
+            return "<h1>No events found in the provided schedule. Please check your input and try again.</h1>"
+
+        with timed("validate"):
+            for event in events:
+                validate_event(event)
+
+        creds = get_user_credentials()
+        if not creds:
+            return jsonify({"redirect": url_for("main.login")}), 200  # Ensure always JSON
+
+        if request.json.get("dry_run"):
+            return jsonify({"plan": describe_plan(plan_sync(session["email"], events))})
+
+        job_id = enqueue_job("sync", session["email"], events)
+        return queued_response(job_id)
+
+    except Exception as e:
+        import traceback
+        error_msg = f"An error occurred: {str(e)}\n{traceback.format_exc()}"
+        log.exception("Failed to sync calendar")
+        return jsonify({"message": error_msg}), 500
+
+# Route to poll a queued calendar write for progress and per-event results
+@main_bp.route('/jobs/<job_id>', methods = ['GET'])
+@limiter.limit("120 per minute")  # Polled by the client, so kept out of the daily default
+def job_status(job_id):
+    job = get_job(job_id)
+    if job is None or job.pop("email") != session.get("email"):
+        return jsonify({"message": "Job not found"}), 404
+
+    return jsonify(job)
+
+# Prometheus scrape endpoint; see telemetry for what is collected
+@main_bp.route('/metrics', methods = ['GET'])
+@limiter.exempt
+def metrics():
+    token = current_app.config["METRICS_TOKEN"]
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return jsonify({"message": "Unauthorized"}), 401
+
+    body, content_type = metrics_payload()
+    return Response(body, content_type = content_type)
+
+# Route to parse many schedules at once; takes NDJSON or a multipart upload and streams NDJSON back
+@main_bp.route('/bulk-process', methods = ['POST'])
+@csrf.exempt  # Scripts authenticate with BULK_API_TOKEN instead; signed-in browsers are CSRF-checked below
+@limiter.limit("10 per minute")
+def bulk_process():
+    cfg = current_app.config
+    max_length = cfg["BULK_MAX_SCHEDULE_LENGTH"]
+
+    # Scripts send the API token; anyone else has to be signed in, and send the page's CSRF token
+    token = cfg["BULK_API_TOKEN"]
+    if not (token and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")):
+        if get_user_credentials() is None:
+            return jsonify({"message": "Unauthorized"}), 401
+        csrf.protect()
+
+    if request.mimetype == "multipart/form-data":
+        items = iter_upload_items(request.files.getlist("schedules"), max_length)
+    else:
+        items = iter_ndjson_items(request.stream)
+
+    results = stream_parse(items, get_pool(cfg["BULK_PROCESS_WORKERS"]), max_length)
+    return Response(stream_with_context(iter_ndjson(results)), mimetype = "application/x-ndjson")
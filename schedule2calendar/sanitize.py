@@ -0,0 +1,178 @@
+from html.entities import html5 as HTML5_ENTITIES
+import unicodedata
+import html
+import re
+
+""" Single-pass cleanup of pasted schedule text: strips tags, decodes entities, normalizes and checks characters.
+
+Accepts and rejects what bleach.clean(tags = [], strip = True) followed by html.unescape did, in one linear
+scan, and returns text the parser can use without normalizing it again. The one difference: input over four
+times the length limit is rejected without being read (see benchmarks/sanitize_bench.py).
+"""
+
+EMPTY_ERROR = "No input detected"
+LENGTH_ERROR = "Input too long"
+CHARS_ERROR = "Invalid input: only characters that may appear in a schedule are allowed"
+
+# Characters that may appear in a schedule (alphanumeric, spaces, and certain punctuation); Banner pastes
+# add "Status: **Web Registered** on ..." and apostrophes in instructor names
+DISALLOWED_RE = re.compile(r'[^a-zA-Z0-9\s,.\-:/#&()*\']')
+
+# Typed control characters that \s would allow; bleach replaced them with "?", so they were always rejected
+CONTROL_RE = re.compile(r'[\x0b\x0c\x1c-\x1f]')
+
+# Anything that isn't copied through as text
+MARKUP_RE = re.compile(r'[<\x00]')
+
+# Markup recognized after "<" and "&"
+COMMENT_END_RE = re.compile(r'-?>|.*?--!?>', re.S) # Matched after "<!--"; "<!-->" and "<!--->" are empty comments
+BOGUS_COMMENT_RE = re.compile(r'[^>]*>?') # "<!...>", "<?...>": up to the next ">", or the end
+DOCTYPE_RE = re.compile(r'<!doctype', re.I)
+TAG_NAME_RE = re.compile(r'/?([A-Za-z][^\t\n\f\r />]*)')
+
+# As bleach read them: a number may have one stray character before its ";", which takes the ";"'s place,
+# and a name only has to begin some entity's name; html.unescape then decodes what it can
+ENTITY_RE = re.compile(r'&(?:(#[xX][0-9a-fA-F]*|#[0-9]*)(?:[^<&=; \t\n\r\x0b\x0c](?=;)|;)|([^<&=; \t\n\r\x0b\x0c#][^<&=; \t\n\r\x0b\x0c]*);)')
+ENTITY_PREFIXES = frozenset(name[:end] for name in HTML5_ENTITIES for end in range(1, len(name) + 1))
+
+# Inside a tag, following the HTML tokenizer's attribute states
+SPACE_RE = re.compile(r'[\t\n\f\r ]*')
+ATTR_GAP_RE = re.compile(r'[\t\n\f\r /]*') # Before an attribute name; a "/" not before ">" is skipped
+ATTR_NAME_RE = re.compile(r'[^\t\n\f\r />][^\t\n\f\r /=>]*')
+UNQUOTED_VALUE_RE = re.compile(r'[^\t\n\f\r >]*')
+
+# HTML whitespace, which bleach left alone at either end of a run of text
+HTML_SPACE = "\t\n\f\r "
+
+# Stripping one of these after an earlier tag leaves a line break, as a browser would show it
+BLOCK_TAGS = frozenset((
+    "address", "article", "aside", "blockquote", "details", "dialog", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "hr",
+    "li", "main", "nav", "ol", "p", "pre", "section", "table", "ul",
+))
+
+def _tag_end(text, i) -> tuple:
+    """Return (index after the tag whose name ends at i, whether it closed), or None if it's left as text.
+
+    A tag cut off by the end of the text is dropped, unless it is cut off inside a name or an
+    unquoted value, where bleach kept it as text.
+    """
+    end = len(text)
+    if i == end:
+        return None
+    while True:
+        i = ATTR_GAP_RE.match(text, i).end()
+        if i == end:
+            return end, False
+        if text[i] == ">":
+            return i + 1, True
+
+        i = ATTR_NAME_RE.match(text, i).end()
+        after_name = SPACE_RE.match(text, i).end()
+        if after_name == end:
+            return None
+        if text[after_name] != "=":
+            continue
+
+        i = SPACE_RE.match(text, after_name + 1).end()
+        if i == end:
+            return end, False
+        if text[i] in "\"'":
+            i = text.find(text[i], i + 1) + 1 # A quoted value may hold ">"
+            if i == 0:
+                return end, False
+        else:
+            i = UNQUOTED_VALUE_RE.match(text, i).end()
+            if i == end:
+                return None
+
+def _decode_entity(match) -> str:
+    number, name = match.groups()
+    if number is None and name not in ENTITY_PREFIXES:
+        return match.group()
+    return html.unescape(f"&{number or name};")
+
+def _close_run(parts, run) -> bool:
+    """Decode a run of text between comments into parts; return whether it hides a control character.
+
+    bleach replaced control characters with "?" except in the HTML whitespace at either end of a run.
+    """
+    text = "".join(run)
+    if "&" in text:
+        parts.append(ENTITY_RE.sub(_decode_entity, text))
+    else:
+        parts.append(text)
+    return CONTROL_RE.search(text.strip(HTML_SPACE)) is not None
+
+def clean_schedule(dirty_schedule, max_length = 1000) -> tuple:
+    """Return (schedule, None) with markup stripped, entities decoded and text NFKC-normalized, or (None, error)."""
+    if not isinstance(dirty_schedule, str):
+        return None, "Invalid input: 'schedule' must be a string"
+
+    # Markup can only shrink text, so nothing this long could pass; skip scanning it
+    if len(dirty_schedule) > max_length * 4:
+        return None, LENGTH_ERROR
+
+    if "\r" in dirty_schedule:
+        dirty_schedule = dirty_schedule.replace("\r\n", "\n").replace("\r", "\n")
+
+    # Tags are dropped from the text around them, so entities are decoded once a comment or the end closes the run
+    parts = []
+    run = []
+    control = False
+    seen_tag = False
+    start = 0
+    for match in MARKUP_RE.finditer(dirty_schedule):
+        i = match.start()
+        if i < start:
+            continue # Inside markup already consumed
+        run.append(dirty_schedule[start:i])
+
+        if match.group() == "\x00":
+            start = i + 1
+        elif dirty_schedule.startswith(("<!", "<?"), i):
+            if dirty_schedule.startswith("<!--", i):
+                end = COMMENT_END_RE.match(dirty_schedule, i + 4)
+                start = end.end() if end else len(dirty_schedule)
+            else:
+                start = BOGUS_COMMENT_RE.match(dirty_schedule, i + 2).end()
+            if DOCTYPE_RE.match(dirty_schedule, i) is None:
+                control = _close_run(parts, run) or control
+                run = []
+        elif dirty_schedule.startswith("</>", i):
+            start = i + 3
+        else:
+            # Text that isn't a tag stays, "<" and all, and fails the character check below
+            name = TAG_NAME_RE.match(dirty_schedule, i + 1)
+            if name is None:
+                start = BOGUS_COMMENT_RE.match(dirty_schedule, i + 2).end() if dirty_schedule.startswith("</", i) else i + 1
+                run.append(dirty_schedule[i:start])
+                continue
+            tag = _tag_end(dirty_schedule, name.end())
+            if tag is None:
+                start = len(dirty_schedule) # Cut off by the end of the text
+                run.append(dirty_schedule[i:])
+                break
+            start, closed = tag
+            if closed and seen_tag and dirty_schedule[i + 1] != "/" and name.group(1).lower() in BLOCK_TAGS:
+                run.append("\n")
+            seen_tag = True
+
+    run.append(dirty_schedule[start:])
+    control = _close_run(parts, run) or control
+    schedule = "".join(parts)
+
+    if len(schedule) == 0:
+        return None, EMPTY_ERROR
+    if len(schedule) > max_length:
+        return None, LENGTH_ERROR
+    if control or DISALLOWED_RE.search(schedule):
+        return None, CHARS_ERROR
+
+    if "\r" in schedule:
+        schedule = schedule.replace("\r\n", "\n") # From "&#13;"; the parser reads lines split on "\n"
+
+    # Only whitespace outside ASCII can get this far, and NFKC folds it to spaces
+    if not schedule.isascii():
+        schedule = unicodedata.normalize("NFKC", schedule)
+    return schedule, None
@@ -1,92 +1,155 @@
-from schedule2calendar.date_math import calc_recur, convert_datetime, check_start_end
+from schedule2calendar.date_math import DAY_MAP, ParseContext, ScheduleDateError, resolve_final_date, course_term, meeting_dates, convert_datetime, check_start_end
+from schedule2calendar.models import Event, weekday_mask, stable_uid
+from schedule2calendar.parse_cache import get_cached_events
+from schedule2calendar.telemetry import timed, Stopwatch
+from schedule2calendar.sanitize import clean_schedule, EMPTY_ERROR, LENGTH_ERROR, CHARS_ERROR
+from schedule2calendar.formats import register_format, parse_any
 from datetime import datetime, timedelta
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 import unicodedata
-import bleach
 import html
 import re
 
 # Fetches a schedule and sanitizes it
 def get_schedule() -> str | tuple:
     data = request.json
-    dirty_schedule = data.get("schedule", "")
-    schedule = bleach.clean(dirty_schedule, tags = [], strip = True)
-    schedule = html.unescape(schedule)
+    schedule, error = clean_schedule(data.get("schedule", ""), current_app.config["SCHEDULE_MAX_LENGTH"])
 
-    if len(schedule) == 0:
+    if error == EMPTY_ERROR:
         return "<h2>No input detected. Please enter your schedule to generate an event preview.</h2>", 400
 
-    if len(schedule) > 1000:  # Limit to 1000 characters
+    if error == LENGTH_ERROR:
         return jsonify({"message": "Input too long"}), 401
 
+    if error == CHARS_ERROR:
+        return "<h2>Invalid input. Please only enter characters that may appear in your schedule.</h2>", 403
+
     # Validate that "schedule" exists and is a string
-    if 'schedule' not in data or not isinstance(data['schedule'], str):
-        return jsonify({"message": "Invalid input: 'schedule' must be a string"}), 402
+    if error is not None:
+        return jsonify({"message": error}), 402
 
-    # Validate content (e.g., allow only alphanumeric, spaces, and certain punctuation)
-    if not re.match(r'^[a-zA-Z0-9\s,.\-:/#&()]+$', schedule):
-        return "<h2>Invalid input. Please only enter characters that may appear in your schedule.</h2>", 403
-    
     return schedule
 
-# Regex to parse schedule
-def parse_schedule(raw_text):
-    # Normalize
-    text = html.unescape(raw_text)
-    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n")
-
-    # Patterns
-    header_re = re.compile(
-        r'(?P<dept>[A-Z]{2,4})\s+(?P<num>\d{2,3}[A-Z]?)\s*[-–]\s*'
-        r'(?P<title>[A-Za-z0-9&/()\'’:,.\- ]+?)'
-        r'(?=\s+(?:[MTWRFSU]{1,5}(?:/[MTWRFSU]{1,5})*\b)'   # days token starts
-        r'|\s*Final\s*Exam:'                                  # or "Final Exam:"
-        r'|[ \t]*\r?\n'                                       # or newline
-        r'|[A-Z]{2,4}\s+\d{2,3}[A-Z]?\s*[-–]'                 # or next header
-        r'|$)'
-    )
-
-    meeting_re = re.compile(r'''
-        (?P<days>\b[MTWRFSU]{1,5}(?:/[MTWRFSU]{1,5})*\b) \s+          # M, TR, M/WF, etc.
-        (?P<start>\d{1,2}:\d{2}) \s*-\s* (?P<end>\d{1,2}:\d{2}) \s*   # 10:30 - 11:50
-        (?P<ampm>[AaPp][Mm])? \s+                                     # optional AM/PM (applies to both)
-        (?P<building>[A-Z][A-Z0-9&\-]*) \s+ (?P<room>[A-Za-z0-9\-]+)  # KEMPER 2110, 90A, etc.
-    ''', re.VERBOSE | re.IGNORECASE | re.DOTALL)
-
-    final_re = re.compile(
-        r'Final\s*Exam:\s*(?P<wday>[A-Za-z]{3,})\.?\s+'
-        r'(?P<month>[A-Za-z]{3,})\.?\s*(?P<date>\d{1,2})\s+at\s+'
-        r'(?P<time>\d{1,2}:\d{2}\s*[AaPp][Mm])',
-        re.IGNORECASE | re.DOTALL
-    )
-
-    # Scan headers first
-    headers = list(header_re.finditer(text))
-    events = []
-
-    def slice_block(i):
-        start = headers[i].start()
-        end = headers[i+1].start() if i+1 < len(headers) else len(text)
-        return text[start:end]
+# Sanitizes the request's schedule once and parses it, returning (events, error_response)
+def ingest_schedule() -> tuple:
+    with timed("sanitize"):
+        schedule = get_schedule()
+    if not isinstance(schedule, str):
+        return None, schedule
+
+    # One context for the cache key and the parse, so both agree on the schedule's "today"
+    ctx = ParseContext()
+    try:
+        events = get_cached_events(schedule, lambda text: parse_any(text, ctx = ctx, normalized = True), ctx.today)
+    except ScheduleDateError as e:
+        return None, (f"<h2>Could not schedule {html.escape(str(e))}.</h2>", 422)
+    return events, None
+
+# Schedule grammar, compiled once at import. Each alternative is one token kind:
+# a course header, a meeting line, or a final exam line.
+HEADER_START = r'[A-Z]{2,4}\s+\d{2,3}[A-Z]?\s*[-–]'
+
+HEADER_PATTERN = (
+    r'(?P<dept>[A-Z]{2,4})\s+(?P<num>\d{2,3}[A-Z]?)\s*[-–]\s*'
+    r'(?P<title>[A-Za-z0-9&/()\'’:,.\- ]+?)'
+    r'(?=\s+(?:[MTWRFSU]{1,5}(?:/[MTWRFSU]{1,5})*\b)'   # days token starts
+    r'|\s*Final\s*Exam:'                                  # or "Final Exam:"
+    r'|[ \t]*\r?\n'                                       # or newline
+    rf'|{HEADER_START}'                                    # or next header
+    r'|$)'
+)
+
+# A meeting never runs into the next course, so a line with no room doesn't take the next header as its location
+NOT_HEADER = rf'(?!(?-i:{HEADER_START}))'
+
+MEETING_PATTERN = rf'''
+    (?P<days>\b[MTWRFSU]{{1,5}}(?:/[MTWRFSU]{{1,5}})*\b) \s+          # M, TR, M/WF, etc.
+    (?P<start>\d{{1,2}}:\d{{2}}) \s*-\s* (?P<end>\d{{1,2}}:\d{{2}}) \s*   # 10:30 - 11:50
+    (?P<ampm>[AaPp][Mm])? \s+                                         # optional AM/PM (applies to both)
+    {NOT_HEADER} (?P<building>[A-Z][A-Z0-9&\-]*) \s+                  # KEMPER 2110, 90A, etc.
+    {NOT_HEADER} (?P<room>[A-Za-z0-9\-]+)
+'''
+
+FINAL_PATTERN = (
+    r'Final\s*Exam:\s*(?P<wday>[A-Za-z]{3,})\.?\s+'
+    r'(?P<month>[A-Za-z]{3,})\.?\s*(?P<date>\d{1,2})\s+at\s+'
+    r'(?P<time>\d{1,2}:\d{2}\s*[AaPp][Mm])'
+)
+
+# Headers are case sensitive; meetings and finals are not
+TOKEN_RE = re.compile(
+    rf'(?P<header>{HEADER_PATTERN})'
+    rf'|(?P<meeting>(?xi:{MEETING_PATTERN}))'
+    rf'|(?P<final>(?i:{FINAL_PATTERN}))'
+)
+
+# A meeting with no room takes "Final" as its room, as it always has; its course's final exam still counts
+FINAL_RE = re.compile(FINAL_PATTERN, re.I)
+
+# Single scan over the text, grouping meeting and final tokens under the header before them
+def tokenize_schedule(text):
+    courses = []
+    for m in TOKEN_RE.finditer(text):
+        if m.group("header") is not None:
+            courses.append({"header": m, "meetings": [], "final": None})
+        elif not courses:
+            continue  # tokens before the first header don't belong to a course
+        elif m.group("meeting") is not None:
+            courses[-1]["meetings"].append(m)
+            if courses[-1]["final"] is None:
+                courses[-1]["final"] = FINAL_RE.match(text, m.start("building")) or FINAL_RE.match(text, m.start("room"))
+        elif courses[-1]["final"] is None:
+            courses[-1]["final"] = m
+
+    return courses
+
+# UC Davis Schedule Builder pastes start with a course header like "ECS 140A - Programming Languages"
+UCDAVIS_PROBE = re.compile(r'^[ \t]*[A-Z]{2,4}[ \t]+\d{2,3}[A-Z]?[ \t]*[-–]', re.M)
+
+# Regex to parse schedule; normalized text from clean_schedule skips the decoding it already did
+@register_format("ucdavis", UCDAVIS_PROBE)
+def parse_schedule(raw_text, ctx = None, normalized = False):
+    # Reference date and timezone shared by every meeting in this parse
+    if ctx is None:
+        ctx = ParseContext()
 
-    for i, h in enumerate(headers):
-        course_name = f"{h.group('dept')} {h.group('num')} - {h.group('title').strip()}"
-        block = slice_block(i)
+    # Normalize
+    text = raw_text
+    if not normalized:
+        text = html.unescape(text)
+        text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n")
 
-        # Final exam (optional)
-        f = final_re.search(block)
-        final_month = f.group('month') if f else None
-        final_date = f.group('date') if f else None
+    events = []
+    date_math = Stopwatch("date_math")
+
+    for course in tokenize_schedule(text):
+        h = course["header"]
+        course_code = f"{h.group('dept')} {h.group('num')}"
+        course_name = f"{course_code} - {h.group('title').strip()}"
+
+        # Final exam (optional); its date settles the year and the term
+        f = course["final"]
+        with date_math:
+            final_day = resolve_final_date(f.group('wday'), f.group('month'), f.group('date'), ctx) if f else None
+            course_in = course_term(final_day, ctx)
         final_time_start = (f.group('time').replace(" ", "").upper() if f else None)
 
+        # The term is identified by the year and month of its finals
+        if final_day is not None:
+            term = final_day.strftime("%Y-%m")
+        elif course_in is not None:
+            term = course_in.key
+        else:
+            term = str(ctx.year)
+
         # collect meetings first
         meetings = []
         first_location = None
         lecture_location = None  # we'll prefer this for the final
 
-        for m in meeting_re.finditer(block):
-            days = m.group('days')
-            day_count = len(re.findall(r'[MTWRFSU]', days.upper()))
+        for m in course["meetings"]:
+            days = m.group('days').upper()
+            day_count = len(days) - days.count("/")
             meeting_type = "Lecture" if day_count > 1 else "Discussion/Lab"
 
             start = m.group('start')
@@ -108,38 +171,54 @@ def parse_schedule(raw_text):
                 "meeting_type": meeting_type,
             })
 
+        type_counts = {}
         for mm in meetings:
-            start_dt = convert_datetime(time=mm["start"], apm=mm["ampm"], schedule_days=mm["days"])
-            end_dt   = convert_datetime(time=mm["end"],   apm=mm["ampm"], schedule_days=mm["days"])
-            start_dt, end_dt = check_start_end(start_dt, end_dt)
-
-            events.append({
-                "summary": f"{course_name} ({mm['meeting_type']})",
-                "location": mm["location"],
-                "description": mm["location"],
-                "start": {"dateTime": start_dt, "timeZone": "America/Los_Angeles"},
-                "end":   {"dateTime": end_dt,   "timeZone": "America/Los_Angeles"},
-                "recurrence": [calc_recur(mm["days"], final_month, final_date)],
-                "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 60}]},
-            })
+            # Numbered per type, so a second discussion section gets its own identity
+            ordinal = type_counts[mm["meeting_type"]] = type_counts.get(mm["meeting_type"], 0) + 1
+
+            with date_math:
+                try:
+                    first_day, until, exdates = meeting_dates(mm["days"], course_in, final_day, ctx)
+                except ScheduleDateError as e:
+                    raise ScheduleDateError(f"{course_code} {mm['meeting_type']}: {e}") from None
+                start_dt = convert_datetime(time=mm["start"], apm=mm["ampm"], day=first_day, ctx=ctx)
+                end_dt   = convert_datetime(time=mm["end"],   apm=mm["ampm"], day=first_day, ctx=ctx)
+                start_dt, end_dt = check_start_end(start_dt, end_dt)
+
+            events.append(Event(
+                course = course_name,
+                meeting_type = mm["meeting_type"],
+                location = mm["location"],
+                start = start_dt,
+                end = end_dt,
+                tz_name = ctx.tz_name,
+                weekdays = weekday_mask(DAY_MAP[day] for day in mm["days"] if day in DAY_MAP),
+                until = until,
+                exdates = exdates,
+                reminders = (60,),
+                uid = stable_uid(course_code, mm["meeting_type"], ordinal, term),
+                term = term,
+            ))
 
         # final exam event (if present) uses LECTURE location, with sensible fallback
         final_location = lecture_location or first_location or ""
-        if final_month and final_date and final_time_start:
-            final_end = (datetime.strptime(final_time_start, "%I:%M%p") + timedelta(hours=2)).strftime("%I:%M%p")
-            fs = convert_datetime(time=final_time_start, month=final_month, date=final_date)
-            fe = convert_datetime(time=final_end,   month=final_month, date=final_date)
-            fs, fe = check_start_end(fs, fe)
-            events.append({
-                "summary": f"{course_name} Final Exam",
-                "location": final_location,
-                "description": final_location,
-                "start": {"dateTime": fs, "timeZone": "America/Los_Angeles"},
-                "end":   {"dateTime": fe, "timeZone": "America/Los_Angeles"},
-                "reminders": {"useDefault": False, "overrides": [
-                    {"method": "popup", "minutes": 60},
-                    {"method": "popup", "minutes": 24 * 60},
-                ]},
-            })
-
+        if final_day and final_time_start:
+            with date_math:
+                final_end = (datetime.strptime(final_time_start, "%I:%M%p") + timedelta(hours=2)).strftime("%I:%M%p")
+                fs = convert_datetime(time=final_time_start, day=final_day, ctx=ctx)
+                fe = convert_datetime(time=final_end,   day=final_day, ctx=ctx)
+                fs, fe = check_start_end(fs, fe)
+            events.append(Event(
+                course = course_name,
+                meeting_type = "Final Exam",
+                location = final_location,
+                start = fs,
+                end = fe,
+                tz_name = ctx.tz_name,
+                reminders = (60, 24 * 60),
+                uid = stable_uid(course_code, "Final Exam", 1, term),
+                term = term,
+            ))
+
+    date_math.record()
     return events
\ No newline at end of file
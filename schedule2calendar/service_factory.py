@@ -0,0 +1,95 @@
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from google_auth_httplib2 import AuthorizedHttp
+from functools import lru_cache
+import threading
+import httplib2
+import logging
+import time
+import json
+
+""" Builds Google API clients from discovery documents parsed once per process, over reused HTTP connections """
+
+log = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = 30 # Seconds
+
+# Per-process timing counters, in seconds
+SERVICE_TIMINGS = {
+    "discovery_load_seconds": 0.0,
+    "service_builds": 0,
+    "service_build_seconds": 0.0,
+}
+_timings_lock = threading.Lock()
+
+# httplib2.Http is not thread safe, so each thread keeps its own keep-alive connection pool
+_thread_local = threading.local()
+
+# Root URL of the Google APIs; overridden to point the clients at a local fake server
+_api_root = GOOGLE_API_ROOT = "https://www.googleapis.com/"
+
+def api_root() -> str:
+    return _api_root
+
+@lru_cache(maxsize = None)
+def _discovery_document(name, version) -> dict:
+    start = time.perf_counter()
+    document = get_static_doc(name, version)
+    if document is None:
+        raise ValueError(f"No bundled discovery document for {name} {version}")
+
+    parsed = json.loads(document)
+    if _api_root != GOOGLE_API_ROOT:
+        # Both the request and batch URLs are built from rootUrl
+        parsed["rootUrl"] = _api_root
+        parsed["baseUrl"] = _api_root + parsed["servicePath"]
+    with _timings_lock:
+        SERVICE_TIMINGS["discovery_load_seconds"] += time.perf_counter() - start
+    return parsed
+
+def _thread_http():
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = httplib2.Http(timeout = HTTP_TIMEOUT)
+        _thread_local.http = http
+    return http
+
+def authorized_http(creds):
+    """Bind credentials to this thread's pooled HTTP connection."""
+    return AuthorizedHttp(creds, http = _thread_http())
+
+def build_service(name, version, creds):
+    start = time.perf_counter()
+    service = build_from_document(_discovery_document(name, version), http = authorized_http(creds))
+
+    with _timings_lock:
+        SERVICE_TIMINGS["service_builds"] += 1
+        SERVICE_TIMINGS["service_build_seconds"] += time.perf_counter() - start
+    return service
+
+def calendar_service(creds):
+    return build_service("calendar", "v3", creds)
+
+def oauth2_service(creds):
+    return build_service("oauth2", "v2", creds)
+
+def warm_service_cache(root = None):
+    """Parse the discovery documents and build each client once at startup.
+
+    Building also fills in derived method parameters on the cached documents, so doing it
+    here keeps later request threads from resizing those dicts concurrently.
+    root, if given, replaces the Google API root URL for every client this process builds.
+    """
+    global _api_root
+    if root and root != _api_root:
+        _api_root = root if root.endswith("/") else root + "/"
+        _discovery_document.cache_clear()
+
+    start = time.perf_counter()
+    for name, version in (("calendar", "v3"), ("oauth2", "v2")):
+        build_from_document(_discovery_document(name, version), http = _thread_http())
+    log.info("Google API clients ready", extra = {"fields": {"ms": round((time.perf_counter() - start) * 1000, 1)}})
+
+def service_timings() -> dict:
+    with _timings_lock:
+        return dict(SERVICE_TIMINGS)
@@ -0,0 +1,198 @@
+from prometheus_client import CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client import multiprocess
+from flask import g, request, current_app, has_app_context, has_request_context
+from contextlib import contextmanager
+import logging
+import time
+import uuid
+import json
+import os
+
+""" Prometheus metrics, per-stage timings, optional request traces and structured logs.
+
+Stages: sanitize, parse, date_math, validate, preview, render, google_list, batch_execute, async_execute, credential_refresh.
+"""
+
+log = logging.getLogger(__name__)
+
+# From sub-millisecond parsing up to batches that back off for several seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+STAGE_SECONDS = Histogram("schedule2calendar_stage_seconds", "Time spent in each pipeline stage", ["stage"], buckets = BUCKETS)
+REQUEST_SECONDS = Histogram("schedule2calendar_request_seconds", "HTTP request latency", ["endpoint", "method", "status"], buckets = BUCKETS)
+EVENTS = Counter("schedule2calendar_events", "Calendar events by outcome", ["outcome"])
+CACHE_LOOKUPS = Counter("schedule2calendar_cache_lookups", "Cache lookups by cache and result", ["cache", "result"])
+CREDENTIALS = Counter("schedule2calendar_credentials", "Credential cache and refresh outcomes", ["outcome"])
+RATE_LIMITED = Counter("schedule2calendar_rate_limited", "Requests rejected by the rate limiter", ["endpoint"])
+JOBS = Counter("schedule2calendar_jobs", "Calendar jobs run by the worker", ["kind", "status"])
+SCHEDULE_FORMATS = Counter("schedule2calendar_schedule_formats", "Parsed pastes by format and how it was found", ["format", "detection"])
+
+def observe(stage, seconds):
+    """Record one stage timing, and add it to the current request's trace when tracing."""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    if has_request_context() and "spans" in g:
+        g.spans.append((stage, seconds))
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+class Stopwatch():
+    """Accumulates time over many short blocks and records the total as one stage timing.
+
+    For work like date math that is spread through a loop, where timing each block separately
+    would cost as much as the work.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._start
+
+    def record(self):
+        observe(self.stage, self.seconds)
+
+def count_rate_limited(request_limit):
+    """Flask-Limiter on_breach callback; returning None keeps the default 429 response."""
+    RATE_LIMITED.labels(request.endpoint or "unknown").inc()
+
+class StatsCollector():
+    """Exposes the counters and sizes modules already keep for themselves, read at scrape time."""
+
+    def describe(self):
+        # Registering would otherwise call collect(), importing modules that import this one
+        return []
+
+    def collect(self):
+        from schedule2calendar.service_factory import service_timings
+        from schedule2calendar.google_service import credential_stats
+        from schedule2calendar.parse_cache import parse_cache_stats
+
+        timings = service_timings()
+        yield CounterMetricFamily("schedule2calendar_google_client_builds", "Google API clients built", value = timings["service_builds"])
+        yield CounterMetricFamily("schedule2calendar_google_client_build_seconds", "Time spent building Google API clients",
+                                  value = timings["service_build_seconds"])
+        yield CounterMetricFamily("schedule2calendar_discovery_load_seconds", "Time spent parsing discovery documents",
+                                  value = timings["discovery_load_seconds"])
+        yield GaugeMetricFamily("schedule2calendar_credential_cached_users", "Users with credentials cached in this process",
+                                value = credential_stats()["cached_users"])
+
+        # The shared cache size lives in Redis, which needs the app
+        if has_app_context():
+            stats = parse_cache_stats()
+            sizes = GaugeMetricFamily("schedule2calendar_parse_cache_entries", "Parsed schedules cached", labels = ["cache"])
+            sizes.add_metric(["local"], stats["local_size"])
+            if "size" in stats:
+                sizes.add_metric(["redis"], stats["size"])
+            yield sizes
+
+_stats_collector = StatsCollector()
+REGISTRY.register(_stats_collector)
+
+def metrics_registry():
+    """The registry to expose: every process's metrics when PROMETHEUS_MULTIPROC_DIR is set (gunicorn), otherwise this one's."""
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_stats_collector) # Reports the process serving the scrape
+    return registry
+
+def metrics_payload() -> tuple:
+    """Return (body, content type) for a /metrics response."""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+def serve_metrics(port):
+    """Expose metrics on their own port, for processes without a web server such as the job worker."""
+    start_http_server(port, registry = metrics_registry())
+    log.info("Serving metrics", extra = {"fields": {"port": port}})
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with a log call's extra={"fields": {...}} merged in."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if has_request_context() and "request_id" in g:
+            entry["request_id"] = g.request_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default = str)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+def configure_logging(level = "INFO", format = "text"):
+    """Send the package's logs to stderr, as JSON lines or text. Safe to call more than once."""
+    logger = logging.getLogger("schedule2calendar")
+    handler = next((h for h in logger.handlers if getattr(h, "_schedule2calendar", False)), None)
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler._schedule2calendar = True
+        logger.addHandler(handler)
+
+    handler.setFormatter(JsonFormatter() if format == "json" else TextFormatter())
+    logger.setLevel(level)
+    logger.propagate = False # The server's own root handlers would print every line twice
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    if current_app.config["TRACE_REQUESTS"]:
+        g.spans = []
+
+def _finish_request(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_SECONDS.labels(endpoint, request.method, str(response.status_code)).observe(elapsed)
+
+    spans = g.pop("spans", None)
+    if spans is not None:
+        # Shows up in the browser's network timing panel
+        response.headers["Server-Timing"] = ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in spans)
+        log.info("Request trace", extra = {"fields": {
+            "endpoint": endpoint,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+            "spans": [{"stage": stage, "ms": round(seconds * 1000, 3)} for stage, seconds in spans],
+        }})
+
+    response.headers["X-Request-ID"] = g.request_id
+    return response
+
+def init_telemetry(app):
+    """Configure logging and time every request; per-stage traces are added when TRACE_REQUESTS is on."""
+    configure_logging(app.config["LOG_LEVEL"], app.config["LOG_FORMAT"])
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
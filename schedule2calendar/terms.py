@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+from functools import lru_cache
+from bisect import bisect_right
+from pathlib import Path
+import json
+
+""" Academic term calendar: instruction days, holidays and finals for each term, loaded once and indexed by date """
+
+DEFAULT_TERMS_PATH = Path(__file__).resolve().parent / "data" / "terms.json"
+
+class Term():
+    """One term: instruction runs from start through end, finals through finals_end, with no class on holidays.
+
+    For every day of the term, the next and previous instruction day falling on each weekday are precomputed,
+    so a meeting's first and last dates take one lookup per weekday it meets on.
+    """
+
+    __slots__ = ("name", "start", "end", "finals_end", "holidays", "_next", "_prev")
+
+    def __init__(self, name, start, end, finals_end, holidays = ()):
+        if not start <= end <= finals_end:
+            raise ValueError(f"Term {name}: expected start <= end <= finals_end")
+
+        self.name = name
+        self.start = start
+        self.end = end
+        self.finals_end = finals_end
+        self.holidays = tuple(sorted(day for day in set(holidays) if start <= day <= end))
+
+        # _next[i][w]: offset from start of the first instruction day on weekday w at or after offset i (None past the last)
+        span = (end - start).days + 1
+        holiday_offsets = {(day - start).days for day in self.holidays}
+        row = [None] * 7
+        self._next = [None] * span
+        for offset in range(span - 1, -1, -1):
+            if offset not in holiday_offsets:
+                row = list(row)
+                row[(start.weekday() + offset) % 7] = offset
+            self._next[offset] = row
+
+        # _prev[i][w]: the last instruction day on weekday w at or before offset i
+        row = [None] * 7
+        self._prev = [None] * span
+        for offset in range(span):
+            if offset not in holiday_offsets:
+                row = list(row)
+                row[(start.weekday() + offset) % 7] = offset
+            self._prev[offset] = row
+
+    @property
+    def key(self) -> str:
+        """Year and month of finals, e.g. "2026-12"; part of each event's stable uid."""
+        return self.finals_end.strftime("%Y-%m")
+
+    def first_meeting(self, weekdays, on_or_after = None):
+        """First instruction day on one of weekdays, no earlier than on_or_after; None if there is none left."""
+        offset = 0 if on_or_after is None else max((on_or_after - self.start).days, 0)
+        if offset >= len(self._next):
+            return None
+        found = [self._next[offset][weekday] for weekday in weekdays]
+        found = [day for day in found if day is not None]
+        return self.start + timedelta(days = min(found)) if found else None
+
+    def last_meeting(self, weekdays):
+        """Last instruction day on one of weekdays; None if the term has none."""
+        found = [self._prev[-1][weekday] for weekday in weekdays]
+        found = [day for day in found if day is not None]
+        return self.start + timedelta(days = max(found)) if found else None
+
+    def holidays_between(self, weekdays, first, last) -> tuple:
+        """Holidays on one of weekdays from first through last, the dates a weekly series has to skip."""
+        return tuple(day for day in self.holidays if first <= day <= last and day.weekday() in weekdays)
+
+class TermCalendar():
+    """Terms indexed by every date they cover, instruction through finals."""
+
+    def __init__(self, terms = ()):
+        self.terms = sorted(terms, key = lambda term: term.start)
+        self._starts = [term.start for term in self.terms]
+        self._by_date = {}
+        for term in self.terms:
+            for offset in range((term.finals_end - term.start).days + 1):
+                self._by_date[term.start + timedelta(days = offset)] = term
+
+    def __len__(self):
+        return len(self.terms)
+
+    def term_on(self, day):
+        """The term covering day, or None."""
+        return self._by_date.get(day)
+
+    def current_or_next(self, day):
+        """The term covering day, else the next one to start, else None."""
+        term = self._by_date.get(day)
+        if term is not None:
+            return term
+        index = bisect_right(self._starts, day)
+        return self.terms[index] if index < len(self.terms) else None
+
+def _parse_term(data) -> Term:
+    return Term(
+        name = data["name"],
+        start = date.fromisoformat(data["start"]),
+        end = date.fromisoformat(data["end"]),
+        finals_end = date.fromisoformat(data["finals_end"]),
+        holidays = [date.fromisoformat(day) for day in data.get("holidays", ())],
+    )
+
+@lru_cache(maxsize = 4)
+def load_term_calendar(path = DEFAULT_TERMS_PATH) -> TermCalendar:
+    """Read a term table (JSON: {"terms": [{"name", "start", "end", "finals_end", "holidays"}]}) once per process.
+
+    An empty path gives an empty calendar, leaving every schedule to the weekday fallback in date_math.
+    """
+    if not path:
+        return TermCalendar()
+
+    with open(path, encoding = "utf-8") as f:
+        data = json.load(f)
+    return TermCalendar(_parse_term(term) for term in data["terms"])
@@ -0,0 +1,12 @@
+from schedule2calendar.jobs import run_worker
+from schedule2calendar.telemetry import serve_metrics
+from schedule2calendar import create_app
+
+app = create_app()
+
+if __name__ == '__main__':
+    if app.config["WORKER_METRICS_PORT"]:
+        serve_metrics(app.config["WORKER_METRICS_PORT"])
+
+    with app.app_context():
+        run_worker(mode = app.config["WORKER_MODE"])
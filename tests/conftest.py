@@ -0,0 +1,102 @@
+from benchmarks.fake_google import serve
+
+from fakeredis import TcpFakeServer
+import threading
+import socket
+import pytest
+import os
+
+""" Shared fixtures: the app against a fakeredis server and the Calendar API fake in benchmarks/fake_google.py.
+
+Both fakes listen on local ports, so the app talks to them through its real Redis and Google clients.
+Config is read from the environment on import, so they start before any test imports the app.
+"""
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+REDIS_PORT = _free_port()
+_redis_server = TcpFakeServer(("127.0.0.1", REDIS_PORT), server_type = "redis")
+_redis_server.daemon_threads = True # A connection still open at exit, e.g. held by a failed test's traceback, mustn't block it
+threading.Thread(target = _redis_server.serve_forever, daemon = True).start()
+
+GOOGLE, GOOGLE_ROOT = serve(latency = 0, call_latency = 0)
+
+os.environ.update(
+    SECRET_KEY = "test", WTF_CSRF_SECRET_KEY = "test",
+    REDIS_HOST = "127.0.0.1", REDIS_PORT = str(REDIS_PORT),
+    REDIS_HEALTH_CHECK_INTERVAL = "0", # fakeredis never marks a connection checked, so it would PING every command
+    RATELIMIT_STORAGE_URI = f"redis://127.0.0.1:{REDIS_PORT}/0", RATELIMIT_ENABLED = "false",
+    GOOGLE_API_ROOT = GOOGLE_ROOT, LOG_LEVEL = "WARNING",
+)
+
+@pytest.fixture(scope = "session")
+def app():
+    from schedule2calendar import create_app
+    app = create_app()
+    app.config.update(TESTING = True, WTF_CSRF_ENABLED = False)
+    return app
+
+@pytest.fixture
+def redis_client(app):
+    with app.app_context():
+        r = app.extensions["redis_client"]
+        r.flushdb()
+        yield r
+
+@pytest.fixture
+def calendar():
+    """The fake Calendar API, emptied for each test."""
+    GOOGLE.calendars.clear()
+    GOOGLE.calls.clear()
+    GOOGLE.rejected.clear()
+    GOOGLE.rate_limit = 0.0
+    yield GOOGLE
+    GOOGLE.rate_limit = 0.0
+
+@pytest.fixture
+def user(redis_client, calendar):
+    """An email with stored credentials; its events are in calendar.calendars[user.token]."""
+    from schedule2calendar.google_service import store_credentials
+    from google.oauth2.credentials import Credentials
+
+    class User():
+        email = "student@example.com"
+        token = "access-student@example.com"
+
+    store_credentials(User.email, Credentials(token = User.token))
+    return User
+
+SCHEDULE = """ECS 140A - Programming Languages
+MWF 12:10 - 1:00 PM WELLMN 2 M 2:10 - 3:00 PM MDSC C 180 Final Exam: {first_final} at 8:00am show details...
+ECS 152A - Computer Networks
+M 1:10 - 2:00 PM OLSON 147 TR 12:10 - 1:30 PM EVERSN 176 Final Exam: {second_final} at 10:30am show details...
+"""
+
+def _final(day) -> str:
+    return day.strftime("%a. %b.%d")
+
+@pytest.fixture
+def term_context():
+    """(ParseContext whose only term runs from last week through the next ten, weekday dates in its finals week)."""
+    from schedule2calendar.date_math import ParseContext
+    from schedule2calendar.terms import Term, TermCalendar
+    from datetime import date, timedelta
+
+    today = date.today()
+    term = Term("Current", today - timedelta(days = 7), today + timedelta(days = 70), today + timedelta(days = 77))
+    finals = [term.end + timedelta(days = offset) for offset in range(1, 8)]
+    return ParseContext(terms = TermCalendar([term])), [day for day in finals if day.weekday() < 5]
+
+@pytest.fixture
+def events(term_context):
+    """Parsed events for a two-course schedule in the current term."""
+    from schedule2calendar.schedule_handler import parse_schedule
+
+    ctx, finals = term_context
+    text = SCHEDULE.format(first_final = _final(finals[0]), second_final = _final(finals[1]))
+    events = parse_schedule(text, ctx)
+    assert len(events) == 6
+    return events
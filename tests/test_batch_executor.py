@@ -0,0 +1,61 @@
+from schedule2calendar.batch_executor import execute_in_batches, _get_pool
+
+from google.oauth2.credentials import Credentials
+import threading
+import socket
+
+""" Batch execution when Google can't be reached: transport errors are retried, and other chunks' results survive """
+
+class FlakyService():
+    """Batches fail with `error` the first `failures` times a chunk holding `bad_key` runs, then succeed."""
+
+    def __init__(self, error, failures, bad_key = "0"):
+        self.error = error
+        self.failures = failures
+        self.bad_key = bad_key
+        self.lock = threading.Lock()
+
+    def new_batch_http_request(self, callback):
+        return FlakyBatch(self, callback)
+
+class FlakyBatch():
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.keys = []
+
+    def add(self, request, request_id):
+        self.keys.append(request_id)
+
+    def execute(self, http = None):
+        with self.service.lock:
+            failing = self.service.bad_key in self.keys and self.service.failures > 0
+            if failing:
+                self.service.failures -= 1
+        if failing:
+            raise self.service.error
+        for key in self.keys:
+            self.callback(key, {"id": f"event-{key}"}, None)
+
+def _requests(count) -> list:
+    return [(f"event {index}", lambda: None) for index in range(count)]
+
+def test_transport_errors_are_retried():
+    service = FlakyService(socket.timeout("timed out"), failures = 2)
+    results = execute_in_batches(service, Credentials(token = "token"), _requests(3), base_delay = 0)
+
+    assert [result["status"] for result in results] == ["ok"] * 3
+    assert results[0]["attempts"] == 3
+    assert results[0]["event_id"] == "event-0"
+
+def test_unreachable_chunk_keeps_other_chunks_results():
+    service = FlakyService(ConnectionRefusedError("refused"), failures = 100)
+    results = execute_in_batches(service, Credentials(token = "token"), _requests(4), chunk_size = 2, max_retries = 2, base_delay = 0)
+
+    assert [result["status"] for result in results] == ["failed", "failed", "ok", "ok"]
+    assert results[0]["attempts"] == 3 and "code" not in results[0]
+    assert results[2]["event_id"] == "event-2"
+
+def test_pool_follows_max_workers():
+    assert _get_pool(2) is _get_pool(2)
+    assert _get_pool(3)._max_workers == 3
@@ -0,0 +1,63 @@
+from flask_wtf.csrf import generate_csrf
+from flask import session
+import json
+import pytest
+
+""" Who may call /bulk-process: scripts with BULK_API_TOKEN, or a signed-in browser sending its CSRF token """
+
+SCHEDULE = """ECS 140A - Programming Languages
+MWF 12:10 - 1:00 PM WELLMN 2 Final Exam: Mon. Dec.07 at 8:00am show details...
+"""
+
+BODY = json.dumps({"id": 1, "schedule": SCHEDULE}) + "\n"
+
+@pytest.fixture
+def api_token(app):
+    app.config["BULK_API_TOKEN"] = "bulk-secret"
+    yield "bulk-secret"
+    app.config["BULK_API_TOKEN"] = None
+
+def _post(client, **headers):
+    return client.post("/bulk-process", data = BODY, content_type = "application/x-ndjson", headers = headers)
+
+def _results(response) -> list:
+    return [json.loads(line) for line in response.get_data(as_text = True).splitlines()]
+
+def _sign_in(app, client, email) -> str:
+    """Put email in the client's session as /callback does, and return the CSRF token its page would carry."""
+    with app.test_request_context():
+        token = generate_csrf()
+        raw_token = session["csrf_token"]
+    with client.session_transaction() as client_session:
+        client_session["email"] = email
+        client_session["csrf_token"] = raw_token
+    return token
+
+def test_api_token(app, redis_client, api_token):
+    response = _post(app.test_client(), Authorization = f"Bearer {api_token}")
+    assert response.status_code == 200
+    assert _results(response)[0]["id"] == 1 and "events" in _results(response)[0]
+
+def test_wrong_api_token(app, redis_client, api_token):
+    assert _post(app.test_client(), Authorization = "Bearer wrong").status_code == 401
+
+def test_signed_in_session(app, user):
+    client = app.test_client()
+    token = _sign_in(app, client, user.email)
+
+    response = _post(client, **{"X-CSRFToken": token})
+    assert response.status_code == 200
+    assert "events" in _results(response)[0]
+
+def test_signed_in_session_needs_csrf_token(app, user):
+    client = app.test_client()
+    _sign_in(app, client, user.email)
+    assert _post(client).status_code == 400
+
+def test_signed_in_without_stored_credentials(app, redis_client):
+    client = app.test_client()
+    token = _sign_in(app, client, "nobody@example.com")
+    assert _post(client, **{"X-CSRFToken": token}).status_code == 401
+
+def test_anonymous(app, redis_client):
+    assert _post(app.test_client()).status_code == 401
@@ -0,0 +1,110 @@
+from schedule2calendar.calendar_ops import BatchWriter, add_events, delete_events, sync_events
+from schedule2calendar.event_index import created_records, LEGACY_SCANNED
+from schedule2calendar.async_calendar import AsyncWriter, new_client
+
+from google.oauth2.credentials import Credentials
+from dataclasses import replace
+import asyncio
+import uuid
+
+""" Calendar writes against the fake API: repeated clicks write by identity and never list the whole calendar """
+
+def _run(operation, user, events, writer = "batch"):
+    creds = Credentials(token = user.token)
+    if writer == "batch":
+        return asyncio.run(operation(BatchWriter(creds), user.email, events))
+
+    async def run_async():
+        async with new_client() as client:
+            return await operation(AsyncWriter(client, creds, connections = asyncio.Semaphore(5)), user.email, events)
+    return asyncio.run(run_async())
+
+def _summaries(calendar, user) -> list:
+    return sorted(event["summary"] for event in calendar.calendars.get(user.token, {}).values())
+
+def _put(calendar, user, summary, **fields) -> str:
+    """An event written outside the app, or by it before events had uids."""
+    event_id = uuid.uuid4().hex
+    calendar.calendars.setdefault(user.token, {})[event_id] = dict(fields, id = event_id, summary = summary, status = "confirmed")
+    return event_id
+
+def test_adding_twice_updates_instead_of_duplicating(user, events, calendar):
+    _run(add_events, user, events)
+    _run(add_events, user, events)
+
+    assert _summaries(calendar, user) == sorted(event.summary for event in events)
+    assert calendar.calls["list"] == 0
+    assert calendar.calls["lookup"] == 0
+    assert set(created_records(user.email)) == {event.uid for event in events}
+
+def test_delete_uses_recorded_ids(user, events, calendar):
+    _put(calendar, user, "Dentist")
+    _run(add_events, user, events)
+    result = _run(delete_events, user, events)
+
+    assert result["message"] == f"Deleted {len(events)} events from Google Calendar!"
+    assert _summaries(calendar, user) == ["Dentist"]
+    assert calendar.calls["list"] == 0
+    assert calendar.calls["lookup"] == 0
+    assert created_records(user.email) == {}
+
+def test_delete_looks_up_unrecorded_events_by_uid(user, events, calendar, redis_client):
+    _run(add_events, user, events)
+    redis_client.delete(f"user:{user.email}:created_events")
+    assert created_records(user.email) == {}
+
+    _run(delete_events, user, events, writer = "async")
+    assert _summaries(calendar, user) == []
+    assert calendar.calls["lookup"] == len(events)
+    assert calendar.calls["list"] == 0
+
+def test_legacy_events_past_the_first_page_are_deleted_once(user, events, calendar, redis_client):
+    # More than one 2500-event page, with the events written before uids at the end
+    for index in range(2600):
+        _put(calendar, user, f"Shift {index}")
+    legacy = {_put(calendar, user, event.summary) for event in events}
+
+    _run(delete_events, user, events)
+    remaining = calendar.calendars[user.token]
+    assert not legacy & remaining.keys()
+    assert len(remaining) == 2600
+    assert calendar.calls["list"] == 2
+
+    # The calendar was scanned once; later deletes trust what the scan found
+    _run(delete_events, user, events)
+    assert calendar.calls["list"] == 2
+    assert redis_client.hkeys(f"user:{user.email}:legacy_events") == [LEGACY_SCANNED.encode("utf-8")]
+
+def test_sync_patches_only_what_changed(user, events, calendar):
+    _run(add_events, user, events)
+    moved = [replace(event, location = "HUNT 110") if index == 0 else event for index, event in enumerate(events)]
+
+    result = _run(sync_events, user, moved)
+    assert result["message"] == "Calendar updated: 0 added, 1 changed, 0 removed."
+    assert calendar.calls["patch"] == 1
+    assert sorted(event["location"] for event in calendar.calendars[user.token].values()).count("HUNT 110") == 1
+
+    result = _run(sync_events, user, moved)
+    assert result["message"] == "Your calendar is already up to date."
+
+def test_sync_reimports_events_deleted_by_hand(user, events, calendar):
+    _run(add_events, user, events)
+    moved = [replace(event, location = "HUNT 110") if index == 0 else event for index, event in enumerate(events)]
+    stored = calendar.calendars[user.token]
+    del stored[next(event_id for event_id, event in stored.items() if event["iCalUID"] == events[0].uid)]
+
+    result = _run(sync_events, user, moved, writer = "async")
+    assert result["message"] == "Calendar updated: 0 added, 1 changed, 0 removed."
+    # The import that replaced the failed patch is the write's result
+    assert [(item["summary"], item["status"]) for item in result["results"]] == [(events[0].summary, "ok")]
+    assert calendar.calls["import"] == len(events) + 1
+    assert "HUNT 110" in [event["location"] for event in stored.values()]
+
+def test_sync_counts_failed_writes_once(user, events, calendar):
+    _run(add_events, user, events)
+    changed = [replace(event, location = "HUNT 110") for event in events[:2]] + events[2:]
+    calendar.rejected.add(events[0].summary)
+
+    result = _run(sync_events, user, changed)
+    assert result["message"] == "Calendar updated: 0 added, 1 changed, 0 removed. 1 changes could not be applied."
+    assert sorted(item["status"] for item in result["results"]) == ["failed", "ok"]
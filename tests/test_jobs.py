@@ -0,0 +1,101 @@
+from schedule2calendar import jobs
+from schedule2calendar.jobs import enqueue_job, claim_job, requeue_stale_jobs, run_job, get_job, QUEUE_KEY, PROCESSING_KEY
+
+import asyncio
+import time
+
+def _calendar_uids(calendar, user) -> list:
+    return sorted(event["iCalUID"] for event in calendar.calendars.get(user.token, {}).values())
+
+def test_add_job_writes_every_event(user, events, calendar, redis_client):
+    job_id = enqueue_job("add", user.email, events)
+    assert claim_job(redis_client, 1) == job_id
+    run_job(job_id)
+
+    job = get_job(job_id)
+    assert job["status"] == "done"
+    assert job["completed"] == len(events)
+    assert _calendar_uids(calendar, user) == sorted(event.uid for event in events)
+    assert redis_client.llen(PROCESSING_KEY) == 0
+
+def test_claim_moves_job_to_processing(user, events, redis_client):
+    job_id = enqueue_job("add", user.email, events)
+    assert claim_job(redis_client, 1) == job_id
+
+    assert redis_client.llen(QUEUE_KEY) == 0
+    assert redis_client.lrange(PROCESSING_KEY, 0, -1) == [job_id.encode("utf-8")]
+    assert claim_job(redis_client, 1) is None
+
+def test_stale_job_is_requeued_and_runs_once(user, events, calendar, redis_client):
+    job_id = enqueue_job("add", user.email, events)
+    claim_job(redis_client, 1) # The worker dies before running it
+
+    # Still within the visibility timeout
+    assert requeue_stale_jobs(redis_client, 60, 3) == 0
+
+    redis_client.hset(f"job:{job_id}", "heartbeat", time.time() - 120)
+    assert requeue_stale_jobs(redis_client, 60, 3) == 1
+    assert redis_client.lrange(QUEUE_KEY, 0, -1) == [job_id.encode("utf-8")]
+    assert get_job(job_id)["status"] == "queued"
+
+    assert claim_job(redis_client, 1) == job_id
+    run_job(job_id)
+    assert get_job(job_id)["status"] == "done"
+    assert _calendar_uids(calendar, user) == sorted(event.uid for event in events)
+
+def test_job_that_keeps_stalling_is_failed(user, events, redis_client):
+    job_id = enqueue_job("add", user.email, events)
+    for attempt in range(3):
+        assert claim_job(redis_client, 1) == job_id
+        redis_client.hset(f"job:{job_id}", "heartbeat", time.time() - 120)
+        assert requeue_stale_jobs(redis_client, 60, 3) == 1
+
+    job = get_job(job_id)
+    assert job["status"] == "failed"
+    assert redis_client.llen(QUEUE_KEY) == 0
+    assert redis_client.llen(PROCESSING_KEY) == 0
+
+def test_finished_and_expired_jobs_leave_processing(user, events, redis_client):
+    done = enqueue_job("add", user.email, events)
+    expired = enqueue_job("add", user.email, events)
+    claim_job(redis_client, 1)
+    claim_job(redis_client, 1)
+    redis_client.hset(f"job:{done}", "status", "done")
+    redis_client.delete(f"job:{expired}")
+
+    assert requeue_stale_jobs(redis_client, 60, 3) == 0
+    assert redis_client.llen(PROCESSING_KEY) == 0
+    assert redis_client.llen(QUEUE_KEY) == 0
+
+def test_expired_job_is_dropped(user, events, redis_client):
+    job_id = enqueue_job("add", user.email, events)
+    redis_client.delete(f"job:{job_id}")
+    assert claim_job(redis_client, 1) == job_id
+
+    run_job(job_id)
+    assert get_job(job_id) is None
+    assert redis_client.llen(PROCESSING_KEY) == 0
+
+def test_delete_job_removes_added_events(user, events, calendar, redis_client):
+    for kind in ("add", "delete"):
+        job_id = enqueue_job(kind, user.email, events)
+        claim_job(redis_client, 1)
+        run_job(job_id)
+        assert get_job(job_id)["status"] == "done"
+
+    assert _calendar_uids(calendar, user) == []
+
+def test_async_writer_job(app, user, events, calendar, redis_client):
+    from schedule2calendar.async_calendar import AsyncWriter, new_client
+
+    async def run(job_id):
+        async with new_client() as client:
+            await jobs._run_job(job_id, lambda creds: AsyncWriter(client, creds, connections = asyncio.Semaphore(5)))
+
+    job_id = enqueue_job("add", user.email, events)
+    claim_job(redis_client, 1)
+    asyncio.run(run(job_id))
+
+    assert get_job(job_id)["status"] == "done"
+    assert _calendar_uids(calendar, user) == sorted(event.uid for event in events)
+    assert redis_client.llen(PROCESSING_KEY) == 0
@@ -0,0 +1,26 @@
+from schedule2calendar.format_schedule import format_recurrence
+from schedule2calendar.preview import build_preview, render_preview
+
+from datetime import date, timedelta
+import re
+
+""" The preview shows a series' end as the local date of its last meeting, not the UTC date of its UNTIL """
+
+def test_until_is_the_local_last_day():
+    # The last second of Fri Mar 14 in Los Angeles is already Mar 15 in UTC
+    rule = ["RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR;UNTIL=20250315T065959Z"]
+    assert format_recurrence(rule, "America/Los_Angeles") == "Weekly on Mon, Wed, Fri until Mar 14, 2025"
+    assert format_recurrence(rule) == "Weekly on Mon, Wed, Fri until Mar 15, 2025"
+
+def test_rendered_until_date(app, redis_client, events):
+    # The events fixture's term ends 70 days from today; each series' last meeting is its last weekday on or before then
+    term_end = date.today() + timedelta(days = 70)
+    with app.test_request_context():
+        html = render_preview(build_preview(events))
+    shown = re.findall(r"until (\w{3} \d{2}, \d{4})", html)
+
+    for event in events:
+        if not event.weekdays:
+            continue
+        last = max(day for day in (term_end - timedelta(days = back) for back in range(7)) if event.weekdays & (1 << day.weekday()))
+        assert last.strftime("%b %d, %Y") in shown
@@ -0,0 +1,34 @@
+from schedule2calendar.schedule_handler import parse_schedule
+
+""" The single-pass tokenizer gives what the parser gave when it matched meetings within each course's block """
+
+SECOND_COURSE = "ECS 150 - Operating Systems\nMWF 1:10 - 2:00 PM WELLMN 2 Final Exam: {final} at 8:00am\n"
+
+def _parse(term_context, first_course) -> list:
+    ctx, finals = term_context
+    text = first_course.format(final = finals[0].strftime("%a. %b %d")) + SECOND_COURSE.format(final = finals[1].strftime("%a. %b %d"))
+    return [(event.summary, event.location) for event in parse_schedule(text, ctx)]
+
+def test_meeting_without_room_stops_at_next_course(term_context):
+    # Only the room-less meeting is dropped; it doesn't take "ECS 150" as its location or ECS 150's meetings
+    assert _parse(term_context, "ECS 165A - Databases\nTR 10:30 - 11:50 AM\n") == [
+        ("ECS 150 - Operating Systems (Lecture)", "WELLMN 2"),
+        ("ECS 150 - Operating Systems Final Exam", "WELLMN 2"),
+    ]
+
+def test_location_on_next_line(term_context):
+    assert _parse(term_context, "ECS 165A - Databases\nTR 10:30 - 11:50 AM\nWELLMN 2 Final Exam: {final} at 8:00am\n") == [
+        ("ECS 165A - Databases (Lecture)", "WELLMN 2"),
+        ("ECS 165A - Databases Final Exam", "WELLMN 2"),
+        ("ECS 150 - Operating Systems (Lecture)", "WELLMN 2"),
+        ("ECS 150 - Operating Systems Final Exam", "WELLMN 2"),
+    ]
+
+def test_room_taken_from_final_keeps_the_final(term_context):
+    # "Online Final" was always read as the location, and the final exam after it still counted
+    assert _parse(term_context, "ECS 165A - Databases\nTR 10:30 - 11:50 AM Online Final Exam: {final} at 8:00am\n") == [
+        ("ECS 165A - Databases (Lecture)", "ONLINE Final"),
+        ("ECS 165A - Databases Final Exam", "ONLINE Final"),
+        ("ECS 150 - Operating Systems (Lecture)", "WELLMN 2"),
+        ("ECS 150 - Operating Systems Final Exam", "WELLMN 2"),
+    ]